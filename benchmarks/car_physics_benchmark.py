@@ -0,0 +1,43 @@
+"""benchmark of how the cost of a CarPhysics tick grows with the number of cars
+
+every car drives around a big oval track with some throttle and steering, so they are spread over every surface
+and some of them are hitting walls
+
+run from the root of the project with: python -m benchmarks.car_physics_benchmark
+"""
+from __future__ import annotations
+import time
+import numpy as np
+from general_utils.vec2 import Vec2
+from world.car_physics import CarPhysics
+from world.tilemap import createOvalTileMap
+from world.track_fields import computeTrackFields
+
+CAR_COUNTS = (1, 10, 100, 1000, 10000)
+TICKS = 600
+TICK_DELTA = 1.0 / 60
+
+def createCars(trackFields, count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    carPhysics = CarPhysics(trackFields)
+    worldSize = trackFields.surfaces.shape[1] * trackFields.tileSize
+    for _ in range(count):
+        carPhysics.addCar(Vec2(*rng.uniform(worldSize * 0.1, worldSize * 0.9, 2)), rng.uniform(-np.pi, np.pi))
+    carPhysics.throttles[:] = rng.uniform(0.5, 1.0, count)
+    carPhysics.steers[:] = rng.uniform(-0.3, 0.3, count)
+    return carPhysics
+
+def main():
+    trackFields = computeTrackFields(createOvalTileMap(200, 200, 12))
+
+    print(f"{TICKS} ticks each")
+    for count in CAR_COUNTS:
+        carPhysics = createCars(trackFields, count)
+        start = time.perf_counter()
+        for _ in range(TICKS):
+            carPhysics.step(TICK_DELTA)
+        perTick = (time.perf_counter() - start) / TICKS
+        print(f"{count:>6} cars: {perTick * 1000:8.3f} ms/tick, {perTick / count * 1e6:8.3f} us/car/tick")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""benchmark of finding the collisions of a field of cars driving around a track full of barriers and pickups each tick
+
+compares the CollisionWorld (spatial hash broad phase, then the narrow phase) with checking every pair of colliders,
+and checks that they find the same collisions
+
+run from the root of the project with: python -m benchmarks.collision_benchmark
+"""
+from __future__ import annotations
+import math
+import random
+import time
+from general_utils.vec2 import Vec2
+from world.collision import CollisionWorld, BoxCollider, CircleCollider, collide
+
+CAR_COUNT = 40
+BARRIER_COUNT = 400
+PICKUP_COUNT = 200
+TICKS = 300
+WORLD_SIZE = 6000
+CAR_SIZE = Vec2(48, 24)
+
+def createWorld(seed: int = 0):
+    """return a CollisionWorld and the colliders of its cars, with the cars spread around a circle"""
+    rng = random.Random(seed)
+    collisionWorld = CollisionWorld()
+
+    for _ in range(BARRIER_COUNT):
+        collisionWorld.addCollider(BoxCollider(Vec2(rng.uniform(0, WORLD_SIZE), rng.uniform(0, WORLD_SIZE)),
+                                               Vec2(rng.uniform(20, 120), 16), rng.uniform(0, 360)), True)
+    for _ in range(PICKUP_COUNT):
+        collisionWorld.addCollider(CircleCollider(Vec2(rng.uniform(0, WORLD_SIZE), rng.uniform(0, WORLD_SIZE)), 12), True)
+
+    cars = []
+    for i in range(CAR_COUNT):
+        car = BoxCollider(Vec2(0, 0), CAR_SIZE)
+        collisionWorld.addCollider(car)
+        cars.append(car)
+    moveCars(cars, 0)
+    collisionWorld.updateDynamicColliders()
+    return collisionWorld, cars
+
+def moveCars(cars: list[BoxCollider], tick: int):
+    """drive the cars around a circle in a tight pack (so they collide with each other as well as with the barriers)"""
+    for i, car in enumerate(cars):
+        angle = tick * 0.004 + i * 0.012
+        radius = WORLD_SIZE * 0.4 + (i % 4) * 20
+        car.position.set(WORLD_SIZE / 2 + math.cos(angle) * radius, WORLD_SIZE / 2 + math.sin(angle) * radius)
+        car.angle = math.degrees(angle) + 90
+
+def getAllPairsCollisions(collisionWorld: CollisionWorld):
+    """the O(n^2) way: check every pair of colliders that aren't both static, return a set of (smaller id, bigger id)"""
+    collisions = set()
+    ids = list(collisionWorld.colliders)
+    for i, first in enumerate(ids):
+        for second in ids[i + 1:]:
+            if collisionWorld.isStatic(first) and collisionWorld.isStatic(second):
+                continue
+            if collide(collisionWorld.colliders[first], collisionWorld.colliders[second]) is not None:
+                collisions.add((first, second))
+    return collisions
+
+def main():
+    collisionWorld, cars = createWorld()
+
+    start = time.perf_counter()
+    collisionCount = 0
+    for tick in range(TICKS):
+        moveCars(cars, tick)
+        collisionWorld.updateDynamicColliders()
+        collisionCount += len(collisionWorld.getCollisions())
+    hashed = (time.perf_counter() - start) / TICKS
+
+    # all pairs is very slow, so it is only run for a few ticks
+    allPairsTicks = 10
+    start = time.perf_counter()
+    for tick in range(allPairsTicks):
+        moveCars(cars, tick)
+        expected = getAllPairsCollisions(collisionWorld)
+        collisionWorld.updateDynamicColliders()
+        # the ids in the pairs are in a different order, so sort them before comparing
+        found = {(min(first, second), max(first, second)) for first, second, _ in collisionWorld.getCollisions()}
+        assert found == expected, f"spatial hash found {len(found)} collisions, all pairs found {len(expected)}"
+    allPairs = (time.perf_counter() - start) / allPairsTicks
+
+    print(f"{CAR_COUNT} cars, {BARRIER_COUNT} barriers, {PICKUP_COUNT} pickups, {collisionCount / TICKS:.1f} collisions/tick")
+    print(f"spatial hash: {hashed * 1000:.3f} ms/tick")
+    print(f"all pairs:    {allPairs * 1000:.3f} ms/tick (includes one spatial hash tick used to check the results match)")
+
+if __name__ == '__main__':
+    main()
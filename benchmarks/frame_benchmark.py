@@ -0,0 +1,242 @@
+"""headless benchmark of whole frames, split into the phases of main.mainLoop
+
+runs each scenario for a number of frames under SDL's dummy video driver (so no window is opened), posting a stream of
+synthetic mouse events every frame, and prints the results as JSON so that runs can be compared
+
+run from the root of the project with: python -m benchmarks.frame_benchmark [--frames N] [--scenario NAME] [--output FILE]
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+# has to be set before pygame creates the display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from events.event_handler import broadcastPygameEvents
+from events.input_state import processPygameEvents
+from general_utils.vec2 import Vec2
+from guis.base_guis import RootContainer, LayeredGUIContainer
+from guis.image_guis import GUIImage
+from pygame_rendering import window, atlas
+from scenes.scenes import Scene, switchCurrentScene, getCurrentScene, updatePendingSceneSwitch
+from scenes.gui_scenes import TestScene, MainMenuScene
+from world.camera import Camera
+from world.car_physics import CarPhysics
+from world.car_renderer import CarRenderer
+from world.tilemap import createOvalTileMap
+from world.track_renderer import TrackRenderer
+
+DEFAULT_FRAMES = 300
+PHASES = ("updatePendingSceneSwitch", "broadcastPygameEvents", "onFrame", "refreshWindow")
+
+class RotatingImagesScene(Scene):
+    """many images spread over the screen that all rotate every frame"""
+
+    def __init__(self, count: int = 200, rotationStep: float = None):
+        self.images = [GUIImage("sprites/SpriteTest.png", Vec2(i * 37 % window.SCREEN_WIDTH, i * 53 % window.SCREEN_HEIGHT),
+                                size=Vec2(64, 64), rotationStep=rotationStep) for i in range(count)]
+        super().__init__(RootContainer(children=self.images))
+
+    def onFrame(self):
+        super().onFrame()
+        for i, image in enumerate(self.images):
+            image.rotateBy(1.0 + i % 7)
+
+class PanningTrackScene(Scene):
+    """a track 'size' tiles wide and tall, with the camera moving around it every frame
+
+    the frame time should be about the same whatever the size of the track, as only the chunks in view are drawn
+    """
+    # how far the camera moves each frame (in pixels)
+    cameraSpeed = 12.0
+
+    def __init__(self, size: int = 1000):
+        self.tileMap = createOvalTileMap(size, size, 12)
+        self.trackRenderer = TrackRenderer(self.tileMap)
+        self.camera = Camera()
+        self.frame = 0
+        super().__init__(RootContainer())
+
+    def onFrame(self):
+        # go around a circle at the same speed on every size of track, so new chunks come into view just as often
+        worldSize = self.tileMap.getWorldSize()
+        radius = worldSize.x / 2 - 400
+        angle = self.frame * self.cameraSpeed / radius
+        self.camera.moveTo(Vec2(worldSize.x / 2 + math.cos(angle) * radius, worldSize.y / 2 + math.sin(angle) * radius))
+        self.frame += 1
+        super().onFrame()
+
+    def draw(self):
+        self.trackRenderer.draw(self.camera)
+        super().draw()
+
+class DrivingCarsScene(Scene):
+    """'count' cars driving around in circles on screen, drawn with a CarRenderer
+
+    the size of every car's rotated image is checked on the first frame, so a car drawn at the wrong size fails the benchmark
+    """
+    carSize = Vec2(48, 24)
+
+    def __init__(self, count: int = 200):
+        self.carPhysics = CarPhysics()
+        for i in range(count):
+            self.carPhysics.addCar(Vec2(i * 37 % window.SCREEN_WIDTH, i * 53 % window.SCREEN_HEIGHT), i * 0.1)
+        self.carPhysics.throttles[:] = 0.2
+        self.carPhysics.steers[:] = 1.0
+        self.carRenderer = CarRenderer(self.carPhysics, "sprites/SpriteTest.png", self.carSize)
+        self.camera = Camera(window.getScreenSize() / 2)
+        self.hasCheckedCarSizes = False
+        super().__init__(RootContainer())
+
+    def onTick(self, tickDelta: float):
+        self.carPhysics.step(tickDelta)
+
+    def onFrame(self):
+        self.onTick(1.0 / 60)
+        super().onFrame()
+
+    def draw(self):
+        self.carRenderer.draw(self.camera)
+        if not self.hasCheckedCarSizes:
+            self.checkCarSizes()
+        super().draw()
+
+    def checkCarSizes(self):
+        self.hasCheckedCarSizes = True
+        for image in self.carRenderer.images:
+            angle = math.radians(image.quantizeRotation(image.getRotation()))
+            cos = abs(math.cos(angle))
+            sin = abs(math.sin(angle))
+            expectedSize = (self.carSize.x * cos + self.carSize.y * sin, self.carSize.x * sin + self.carSize.y * cos)
+            # the rotated surface is the box around the rotated car, which pygame rounds to whole pixels
+            if any(abs(actual - expected) > 2 for actual, expected in zip(image.image.get_size(), expectedSize)):
+                raise Exception(f"Car drawn at the wrong size: {image.image.get_size()} at {image.getRotation()} degrees")
+
+def createLayeredScene(count: int = 1000, layers: int = 10):
+    """a LayeredGUIContainer with 'count' small images spread between 'layers' layers"""
+    images = [GUIImage("sprites/SpriteTest.png", Vec2(i * 37 % window.SCREEN_WIDTH, i * 53 % window.SCREEN_HEIGHT), size=Vec2(16, 16))
+              for i in range(count)]
+    return Scene(RootContainer(children=[
+        LayeredGUIContainer(children=images, childrenLayers=[i % layers for i in range(count)])
+    ]))
+
+SCENARIOS = {
+    "main_menu": MainMenuScene,
+    "test_scene": TestScene,
+    "layered_1000": createLayeredScene,
+    "rotating_images_200": RotatingImagesScene,
+    "rotating_images_200_cached": lambda: RotatingImagesScene(rotationStep=2.0),
+    "track_100": lambda: PanningTrackScene(100),
+    "track_2000": lambda: PanningTrackScene(2000),
+    "cars_200": DrivingCarsScene,
+}
+
+def postSyntheticEvents(frame: int):
+    """post the mouse events for one frame: a few motion events along a circle, and a click every 30 frames
+    (the clicks are in the top left corner so that they don't press anything and switch scenes)"""
+    for i in range(4):
+        angle = (frame * 4 + i) * 0.05
+        pos = (int(window.SCREEN_WIDTH / 2 + math.cos(angle) * 300), int(window.SCREEN_HEIGHT / 2 + math.sin(angle) * 300))
+        pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0)))
+    if frame % 30 == 0:
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(1, 1), button=1))
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(1, 1), button=1))
+
+def summarize(samples: list[float]):
+    """return the mean, percentiles and max of a list of timings (in seconds) in milliseconds"""
+    ordered = sorted(samples)
+    def percentile(fraction: float):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+    return {
+        "meanMs": sum(ordered) / len(ordered) * 1000,
+        "p50Ms": percentile(0.5),
+        "p95Ms": percentile(0.95),
+        "p99Ms": percentile(0.99),
+        "maxMs": ordered[-1] * 1000,
+    }
+
+def runScenario(name: str, frames: int):
+    switchCurrentScene(SCENARIOS[name]())
+    pygame.event.clear()
+
+    timings = {phase: [] for phase in PHASES}
+    frameTimes = []
+    allocatedBlocks = []
+
+    start = time.perf_counter()
+    for frame in range(frames):
+        postSyntheticEvents(frame)
+        blocksBefore = sys.getallocatedblocks()
+        frameStart = time.perf_counter()
+
+        phaseStart = frameStart
+        updatePendingSceneSwitch()
+        phaseEnd = time.perf_counter()
+        timings["updatePendingSceneSwitch"].append(phaseEnd - phaseStart)
+
+        phaseStart = phaseEnd
+        broadcastPygameEvents(processPygameEvents(pygame.event.get()))
+        phaseEnd = time.perf_counter()
+        timings["broadcastPygameEvents"].append(phaseEnd - phaseStart)
+
+        phaseStart = phaseEnd
+        getCurrentScene().onFrame()
+        phaseEnd = time.perf_counter()
+        timings["onFrame"].append(phaseEnd - phaseStart)
+
+        phaseStart = phaseEnd
+        window.refreshWindow()
+        phaseEnd = time.perf_counter()
+        timings["refreshWindow"].append(phaseEnd - phaseStart)
+
+        frameTimes.append(phaseEnd - frameStart)
+        allocatedBlocks.append(sys.getallocatedblocks() - blocksBefore)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "frames": frames,
+        "framesPerSecond": frames / elapsed,
+        "frame": summarize(frameTimes),
+        "phases": {phase: summarize(samples) for phase, samples in timings.items()},
+        # the change in the number of allocated memory blocks over a frame, a rough measure of how much garbage is made
+        "allocatedBlocksPerFrame": {
+            "mean": sum(allocatedBlocks) / len(allocatedBlocks),
+            "max": max(allocatedBlocks),
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="headless benchmark of the render and GUI hot paths")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help="number of frames to run each scenario for")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="scenario to run (can be given more than once, defaults to all)")
+    parser.add_argument("--output", help="file to write the JSON results to (defaults to printing them)")
+    arguments = parser.parse_args()
+
+    window.createWindow()
+    atlas.registerAtlases(atlas.buildAtlasesFromDirectory("sprites"))
+
+    results = {
+        "pygame": pygame.version.ver,
+        "python": sys.version.split()[0],
+        "videoDriver": pygame.display.get_driver(),
+        "scenarios": {name: runScenario(name, arguments.frames) for name in (arguments.scenario or SCENARIOS)},
+    }
+
+    getCurrentScene().unload()
+    pygame.quit()
+
+    output = json.dumps(results, indent=4)
+    if arguments.output is None:
+        print(output)
+    else:
+        with open(arguments.output, "w") as file:
+            file.write(output + "\n")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""benchmark for the cost of getting the absolute positions of every element in a deep GUI tree each frame
+
+run from the root of the project with: python -m benchmarks.gui_position_benchmark
+"""
+from __future__ import annotations
+import time
+from general_utils.vec2 import Vec2
+from guis.base_guis import GUIElement, GUIContainer, RootContainer
+
+DEPTH = 10
+ELEMENT_COUNT = 1000
+FRAMES = 200
+
+class BenchmarkElement(GUIElement):
+    """A GUI element that does nothing when drawn, so only the position lookups are measured"""
+
+    def draw(self):
+        pass
+
+def createDeepTree(depth: int = DEPTH, elementCount: int = ELEMENT_COUNT):
+    """return a RootContainer and a list of all of its leaf elements
+
+    the containers are nested 'depth' levels deep, and the leaves are spread evenly across every level
+    """
+    root = RootContainer()
+    leaves: list[GUIElement] = []
+    container: GUIContainer = root
+
+    for level in range(depth):
+        child = GUIContainer(relativePos=Vec2(level, level))
+        container.addChild(child)
+        container = child
+
+        for i in range(elementCount // depth):
+            leaf = BenchmarkElement(Vec2(10, 10), Vec2(i, level))
+            container.addChild(leaf)
+            leaves.append(leaf)
+
+    return root, leaves
+
+def getUncachedAbsolutePosition(element: GUIElement):
+    """the recursive walk to the root that GUIElement.getAbsolutePosition used before positions were cached"""
+    if element.parent is None:
+        return Vec2(0, 0)
+    return element.relativePos + element.parent.getChildOffset(element) + getUncachedAbsolutePosition(element.parent)
+
+def timeFrames(leaves: list[GUIElement], getPosition: callable, frames: int = FRAMES):
+    """return the average number of seconds it took to get the position of every leaf, per frame"""
+    start = time.perf_counter()
+    for _ in range(frames):
+        for leaf in leaves:
+            getPosition(leaf)
+    return (time.perf_counter() - start) / frames
+
+def main():
+    root, leaves = createDeepTree()
+
+    uncached = timeFrames(leaves, getUncachedAbsolutePosition)
+    cached = timeFrames(leaves, GUIElement.getAbsolutePosition)
+
+    # worst case for the cache: the whole tree moves every frame
+    def invalidateThenGet(leaf: GUIElement):
+        if leaf is leaves[0]:
+            root.invalidateAbsolutePosition()
+        return leaf.getAbsolutePosition()
+    invalidated = timeFrames(leaves, invalidateThenGet)
+
+    print(f"{len(leaves)} elements, {DEPTH} levels deep, averaged over {FRAMES} frames")
+    print(f"uncached:                  {uncached * 1000:.3f} ms/frame")
+    print(f"cached:                    {cached * 1000:.3f} ms/frame")
+    print(f"cached, invalidated/frame: {invalidated * 1000:.3f} ms/frame")
+
+if __name__ == '__main__':
+    main()
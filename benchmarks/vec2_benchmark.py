@@ -0,0 +1,101 @@
+"""micro benchmarks comparing Vec2 and Rect to the versions before they used __slots__ and in-place operators
+
+run from the root of the project with: python -m benchmarks.vec2_benchmark
+"""
+from __future__ import annotations
+import math
+import sys
+import timeit
+import tracemalloc
+from general_utils.vec2 import Vec2
+from general_utils.rect import Rect
+
+NUMBER = 200000
+INSTANCE_COUNT = 100000
+
+class LegacyVec2:
+    """Vec2 as it was before (no __slots__, float() conversions and isinstance checks)"""
+
+    def __init__(self, x: float = 0.0, y: float = 0.0):
+        self.x: float = float(x)
+        self.y: float = float(y)
+
+    def __add__(self, other: LegacyVec2 | float | int):
+        if isinstance(other, LegacyVec2):
+            return LegacyVec2(self.x + other.x, self.y + other.y)
+        else:
+            return LegacyVec2(self.x + other, self.y + other)
+
+    def __mul__(self, other: LegacyVec2 | float | int):
+        if isinstance(other, LegacyVec2):
+            return LegacyVec2(self.x * other.x, self.y * other.y)
+        else:
+            return LegacyVec2(self.x * other, self.y * other)
+
+    def rotateRadians(self, angle: float):
+        return LegacyVec2(self.x * math.cos(angle) - self.y * math.sin(angle),
+                          self.x * math.sin(angle) + self.y * math.cos(angle))
+
+    def length(self):
+        return math.sqrt(self.x ** 2 + self.y ** 2)
+
+class LegacyRect:
+    """Rect as it was before (no __slots__)"""
+
+    def __init__(self, topLeft: LegacyVec2, size: LegacyVec2):
+        self.topLeft = topLeft
+        self.size = size
+
+    def isPointInside(self, point: LegacyVec2):
+        return self.topLeft.x <= point.x < self.topLeft.x + self.size.x and self.topLeft.y <= point.y < self.topLeft.y + self.size.y
+
+    def isRectInside(self, rect: LegacyRect):
+        return self.isPointInside(rect.topLeft) and self.isPointInside(rect.topLeft + rect.size + LegacyVec2(-1.0, -1.0))
+
+def getAllocatedBytes(create: callable):
+    """return the number of bytes allocated by creating INSTANCE_COUNT objects with 'create'"""
+    tracemalloc.start()
+    objects = [create(i) for i in range(INSTANCE_COUNT)]
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return allocated
+
+def compare(name: str, legacy: callable, current: callable):
+    legacyTime = timeit.timeit(legacy, number=NUMBER)
+    currentTime = timeit.timeit(current, number=NUMBER)
+    print(f"{name:<24} legacy {legacyTime / NUMBER * 1e9:7.1f} ns   current {currentTime / NUMBER * 1e9:7.1f} ns   ({legacyTime / currentTime:.2f}x)")
+
+def main():
+    a, b = Vec2(1.5, 2.5), Vec2(3.0, 4.0)
+    legacyA, legacyB = LegacyVec2(1.5, 2.5), LegacyVec2(3.0, 4.0)
+
+    compare("construct", lambda: LegacyVec2(1.0, 2.0), lambda: Vec2(1.0, 2.0))
+    compare("add vector", lambda: legacyA + legacyB, lambda: a + b)
+    compare("multiply scalar", lambda: legacyA * 2.0, lambda: a * 2.0)
+
+    accumulator = Vec2()
+    legacyAccumulator = LegacyVec2()
+    def legacyAddInPlace():
+        nonlocal legacyAccumulator
+        legacyAccumulator += legacyB
+    def addInPlace():
+        nonlocal accumulator
+        accumulator += b
+    compare("add in place", legacyAddInPlace, addInPlace)
+
+    compare("rotate", lambda: legacyA.rotateRadians(0.5), lambda: a.rotateRadians(0.5))
+    compare("length", legacyA.length, a.length)
+
+    rect, inner = Rect(Vec2(0, 0), Vec2(100, 100)), Rect(Vec2(10, 10), Vec2(20, 20))
+    legacyRect, legacyInner = LegacyRect(LegacyVec2(0, 0), LegacyVec2(100, 100)), LegacyRect(LegacyVec2(10, 10), LegacyVec2(20, 20))
+    compare("rect inside rect", lambda: legacyRect.isRectInside(legacyInner), lambda: rect.isRectInside(inner))
+
+    print()
+    print(f"{'size of one instance':<24} legacy {sys.getsizeof(legacyA) + sys.getsizeof(legacyA.__dict__)} bytes   current {sys.getsizeof(a)} bytes")
+    legacyBytes = getAllocatedBytes(lambda i: LegacyVec2(i, i))
+    currentBytes = getAllocatedBytes(lambda i: Vec2(float(i), float(i)))
+    print(f"{str(INSTANCE_COUNT) + ' vectors':<24} legacy {legacyBytes / 1e6:.2f} MB   current {currentBytes / 1e6:.2f} MB")
+
+if __name__ == '__main__':
+    main()
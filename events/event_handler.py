@@ -1,42 +1,171 @@
 from __future__ import annotations
+import heapq
 import pygame
 
-pygameEventListeners: dict[int, list[PygameEventListener]] = dict()
+# listeners by (event type, filter attribute, filter value), then by their handle
+# listeners that don't filter events have None as both the filter attribute and value
+pygameEventListeners: dict[tuple[int, str | type(None), object], dict[int, PygameEventListener]] = dict()
+
+# for each event type, the attributes that listeners filter on and how many listeners filter on each of them
+filterAttributes: dict[int, dict[str, int]] = dict()
+
+# sorted copies of the listeners in pygameEventListeners that are iterated over while broadcasting
+# a copy is thrown away (and rebuilt when it is next needed) whenever a listener is added or removed, so listeners
+# can be safely added or removed while an event is being broadcast
+listenerSnapshots: dict[tuple[int, str | type(None), object], tuple[PygameEventListener, ...]] = dict()
+
+nextHandle = 0
+
+# whether event types that nothing listens for are blocked from the pygame event queue (see blockUnusedEvents)
+isBlockingUnusedEvents = False
+# event types that are never blocked
+alwaysAllowedEvents: set[int] = set()
 
 class PygameEventListener:
     """a wrapper class for a function that should be called when its corresponding pygameEvent occurs
 
-    note: if an instance is instantiated directly, it will not successfully listen for events
-          to make it successfully listen for events use the createPygameEventListener function instead"""
-    def __init__(self, eventToListenFor: int, onEvent: callable, passEvent: bool = False, *args):
+    note: creating an instance does not make it listen for events, the add method has to be called as well
+
+    listeners with a higher priority are called first (listeners with the same priority are called in the order they were added)
+    if the function returns True, the event is consumed and is not passed on to any of the listeners after it
+
+    if filterAttribute is given, the listener is only called for events where that attribute equals filterValue
+    (for example filterAttribute="key" and filterValue=pygame.K_SPACE for a KEYDOWN listener that only cares about the space bar)
+    this is done with a lookup rather than by checking every listener, so listeners are never woken for events they would ignore
+    """
+    def __init__(self, eventToListenFor: int, onEvent: callable, passEvent: bool = False, *args,
+                 priority: int = 0, filterAttribute: str = None, filterValue: object = None):
         self.eventToListenFor = eventToListenFor
         self.onEvent = onEvent
         self.passEvent = passEvent
         self.onEventArgs = args
+        self.priority = priority
+        self.filterAttribute = filterAttribute
+        self.filterValue = filterValue if filterAttribute is not None else None
+        # a unique number given to this listener when it is added, None while it is not added
+        self.handle: int | type(None) = None
 
     def executeFunction(self, event: pygame.event.EventType):
+        """call this listener's function and return what it returns (True means the event was consumed)"""
         if self.passEvent:
-            self.onEvent(event, *self.onEventArgs)
+            return self.onEvent(event, *self.onEventArgs)
         else:
-            self.onEvent(*self.onEventArgs)
+            return self.onEvent(*self.onEventArgs)
+
+    def getKey(self):
+        return self.eventToListenFor, self.filterAttribute, self.filterValue
+
+    def getDispatchOrder(self):
+        return -self.priority, self.handle
+
+    def isAdded(self):
+        return self.handle is not None
 
     def add(self):
-        """add this PygameEventListener to the pygmeEventListeners dict
+        """add this PygameEventListener to the pygameEventListeners dict
 
         this will allow self's onEvent function to be called when the event is broadcasted
+        note: does nothing if it has already been added
         """
-        if self.eventToListenFor not in pygameEventListeners.keys():
-            pygameEventListeners[self.eventToListenFor] = [self]
-        else:
-            pygameEventListeners[self.eventToListenFor].append(self)
+        global nextHandle
+        if self.handle is not None:
+            return
+
+        self.handle = nextHandle
+        nextHandle += 1
+
+        if isBlockingUnusedEvents and pygame.event.get_blocked(self.eventToListenFor):
+            pygame.event.set_allowed(self.eventToListenFor)
+
+        key = self.getKey()
+        if key not in pygameEventListeners:
+            pygameEventListeners[key] = dict()
+        pygameEventListeners[key][self.handle] = self
+        listenerSnapshots.pop(key, None)
+
+        if self.filterAttribute is not None:
+            attributes = filterAttributes.setdefault(self.eventToListenFor, dict())
+            attributes[self.filterAttribute] = attributes.get(self.filterAttribute, 0) + 1
 
     def remove(self):
         """remove this PygameEventListener from the pygameEventListeners dict
 
         this should be done whenever it is done being used, otherwise it will just sit in the dict until the program terminates
+        if it is removed while an event is being broadcast, it will not be called for that event (if it hasn't been already)
         """
-        if self.eventToListenFor in pygameEventListeners and self in pygameEventListeners[self.eventToListenFor]:
-            pygameEventListeners[self.eventToListenFor].remove(self)
+        if self.handle is None:
+            return
+
+        key = self.getKey()
+        del pygameEventListeners[key][self.handle]
+        if not pygameEventListeners[key]:
+            del pygameEventListeners[key]
+        listenerSnapshots.pop(key, None)
+        self.handle = None
+
+        if self.filterAttribute is not None:
+            attributes = filterAttributes[self.eventToListenFor]
+            attributes[self.filterAttribute] -= 1
+            if attributes[self.filterAttribute] == 0:
+                del attributes[self.filterAttribute]
+                if not attributes:
+                    del filterAttributes[self.eventToListenFor]
+
+def getListenedEventTypes():
+    """return a set of every event type that at least one listener is listening for"""
+    return {eventType for eventType, _, _ in pygameEventListeners.keys()}
+
+def blockUnusedEvents(allowedEvents: set[int] | list[int] = ()):
+    """stop pygame from putting events into the event queue that no listener is listening for
+
+    event types in 'allowedEvents' are always allowed, and adding a listener for a blocked event type allows it again
+    note: has to be called after pygame is initialized
+    """
+    global isBlockingUnusedEvents
+    isBlockingUnusedEvents = True
+    alwaysAllowedEvents.update(allowedEvents)
+
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(list(alwaysAllowedEvents | getListenedEventTypes()))
+
+def allowAllEvents():
+    """undo blockUnusedEvents"""
+    global isBlockingUnusedEvents
+    isBlockingUnusedEvents = False
+    pygame.event.set_allowed(None)
+
+def getListenerSnapshot(key: tuple[int, str | type(None), object]):
+    """return the listeners for a key of pygameEventListeners in the order they should be called"""
+    snapshot = listenerSnapshots.get(key)
+    if snapshot is None:
+        listeners = pygameEventListeners.get(key)
+        snapshot = tuple(sorted(listeners.values(), key=PygameEventListener.getDispatchOrder)) if listeners else ()
+        listenerSnapshots[key] = snapshot
+    return snapshot
+
+def getListenersForEvent(event: pygame.event.EventType):
+    """return an iterable of every listener that should be called for an event, in the order they should be called"""
+    listeners = getListenerSnapshot((event.type, None, None))
+    if event.type not in filterAttributes:
+        return listeners
+
+    groups = [listeners] if listeners else []
+    for attribute in tuple(filterAttributes[event.type]):
+        filtered = getListenerSnapshot((event.type, attribute, event.dict.get(attribute)))
+        if filtered:
+            groups.append(filtered)
+
+    if len(groups) == 1:
+        return groups[0]
+    return heapq.merge(*groups, key=PygameEventListener.getDispatchOrder)
+
+def dispatchPygameEvent(event: pygame.event.EventType):
+    """pass one event to its listeners, return whether it was consumed by one of them"""
+    for listener in getListenersForEvent(event):
+        # it may have been removed by a listener called before it
+        if listener.handle is not None and listener.executeFunction(event) is True:
+            return True
+    return False
 
 def broadcastPygameEvents(events: list[pygame.event.EventType]):
     """broadcast all events to their listeners
@@ -44,6 +173,4 @@ def broadcastPygameEvents(events: list[pygame.event.EventType]):
     uses the 'pygameEventListeners' dict to execute the functions of all PygameEventListeners for all pygame events
     """
     for event in events:
-        if event.type in pygameEventListeners.keys():
-            for listener in pygameEventListeners[event.type]:
-                listener.executeFunction(event)
+        dispatchPygameEvent(event)
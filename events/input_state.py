@@ -0,0 +1,108 @@
+"""an input layer between the pygame event queue and the event handler
+
+processPygameEvents coalesces the high rate events of a frame (only the latest mouse motion and joystick axis values are
+passed on) and keeps an InputState up to date, so that game logic like car controls can just read what is held down
+and where the axes are each tick instead of reacting to every single event
+"""
+from __future__ import annotations
+import pygame
+from general_utils.vec2 import Vec2
+
+# event types that the input state needs, even if no listener is listening for them (see event_handler.blockUnusedEvents)
+INPUT_EVENT_TYPES = (pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
+                     pygame.JOYAXISMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.WINDOWFOCUSLOST)
+
+class InputState:
+    """a snapshot of everything that is currently held down and where the mouse and joystick axes are"""
+    __slots__ = ("keysHeld", "mouseButtonsHeld", "mousePosition", "joystickButtonsHeld", "axes")
+
+    def __init__(self):
+        self.keysHeld: set[int] = set()
+        self.mouseButtonsHeld: set[int] = set()
+        self.mousePosition = Vec2(0, 0)
+        # (joystick instance id, button)
+        self.joystickButtonsHeld: set[tuple[int, int]] = set()
+        # (joystick instance id, axis) -> value from -1 to 1
+        self.axes: dict[tuple[int, int], float] = dict()
+
+    def isKeyHeld(self, key: int):
+        return key in self.keysHeld
+
+    def isMouseButtonHeld(self, button: int):
+        return button in self.mouseButtonsHeld
+
+    def getAxis(self, joystick: int, axis: int):
+        """return the value of a joystick axis (0 if it hasn't moved yet)"""
+        return self.axes.get((joystick, axis), 0.0)
+
+    def clearHeld(self):
+        """release everything that is held (used when the window loses focus, as the releases would never arrive)"""
+        self.keysHeld.clear()
+        self.mouseButtonsHeld.clear()
+        self.joystickButtonsHeld.clear()
+
+    def update(self, event: pygame.event.EventType):
+        """update the state from a single event"""
+        eventType = event.type
+        if eventType == pygame.KEYDOWN:
+            self.keysHeld.add(event.key)
+        elif eventType == pygame.KEYUP:
+            self.keysHeld.discard(event.key)
+        elif eventType == pygame.MOUSEMOTION:
+            self.mousePosition = Vec2(*event.pos)
+        elif eventType == pygame.MOUSEBUTTONDOWN:
+            self.mouseButtonsHeld.add(event.button)
+            self.mousePosition = Vec2(*event.pos)
+        elif eventType == pygame.MOUSEBUTTONUP:
+            self.mouseButtonsHeld.discard(event.button)
+            self.mousePosition = Vec2(*event.pos)
+        elif eventType == pygame.JOYAXISMOTION:
+            self.axes[(event.instance_id, event.axis)] = event.value
+        elif eventType == pygame.JOYBUTTONDOWN:
+            self.joystickButtonsHeld.add((event.instance_id, event.button))
+        elif eventType == pygame.JOYBUTTONUP:
+            self.joystickButtonsHeld.discard((event.instance_id, event.button))
+        elif eventType == pygame.WINDOWFOCUSLOST:
+            self.clearHeld()
+
+inputState = InputState()
+
+def getInputState():
+    return inputState
+
+def coalesceEvents(events: list[pygame.event.EventType]):
+    """return the events with all but the last MOUSEMOTION event (and all but the last JOYAXISMOTION event of each axis) removed
+
+    the kept mouse motion event's 'rel' is the total of all of the removed ones, and the kept events are left where
+    the last of their kind was, so they stay in order with everything else (like clicks)
+    """
+    lastMotionIndex = -1
+    lastAxisIndices: dict[tuple[int, int], int] = dict()
+    totalRelX = totalRelY = 0
+    for i, event in enumerate(events):
+        if event.type == pygame.MOUSEMOTION:
+            lastMotionIndex = i
+            totalRelX += event.rel[0]
+            totalRelY += event.rel[1]
+        elif event.type == pygame.JOYAXISMOTION:
+            lastAxisIndices[(event.instance_id, event.axis)] = i
+
+    kept = set(lastAxisIndices.values())
+    coalesced = []
+    for i, event in enumerate(events):
+        if event.type == pygame.MOUSEMOTION:
+            if i == lastMotionIndex:
+                coalesced.append(pygame.event.Event(pygame.MOUSEMOTION, {**event.dict, "rel": (totalRelX, totalRelY)}))
+        elif event.type == pygame.JOYAXISMOTION:
+            if i in kept:
+                coalesced.append(event)
+        else:
+            coalesced.append(event)
+    return coalesced
+
+def processPygameEvents(events: list[pygame.event.EventType]):
+    """update the input state from a frame's events and return the coalesced events (see coalesceEvents) to be broadcast"""
+    coalesced = coalesceEvents(events)
+    for event in coalesced:
+        inputState.update(event)
+    return coalesced
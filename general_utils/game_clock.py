@@ -0,0 +1,75 @@
+"""timing for a game loop with a fixed simulation tick rate that is separate from the rate frames are rendered at
+
+every frame, advance works out how many fixed length ticks the simulation needs to catch up to the current time
+(so the simulation runs at the same speed no matter how fast frames are rendered), and getInterpolationAlpha gives how far
+between the last tick and the next one the frame is, so that rendering can interpolate between the last two ticks
+limitFrameRate can then be used to stop frames from being rendered faster than they need to be
+"""
+import time
+
+# the number of simulation ticks per second
+TICK_RATE = 60
+# the most ticks that will be run in one frame, if the simulation falls further behind than this the extra time is dropped
+# (so that a slow frame can't cause even slower frames trying to catch up)
+MAX_TICKS_PER_FRAME = 5
+# the most frames that will be rendered per second, or None for no limit
+MAX_FRAME_RATE: float | type(None) = 144
+# how long before the end of a frame limitFrameRate stops sleeping and starts busy waiting (sleep is not very precise)
+SLEEP_MARGIN = 0.002
+
+accumulator = 0.0
+lastAdvanceTime = 0.0
+tickCount = 0
+lastFrameLimitTime = 0.0
+
+def reset():
+    """start timing from now (should be called right before the first frame)"""
+    global accumulator, lastAdvanceTime, lastFrameLimitTime
+    accumulator = 0.0
+    lastAdvanceTime = time.perf_counter()
+    lastFrameLimitTime = lastAdvanceTime
+
+def getTickDelta():
+    """return the length of one simulation tick in seconds"""
+    return 1.0 / TICK_RATE
+
+def advance():
+    """add the time since the last call to the accumulator and return how many ticks should be simulated this frame"""
+    global accumulator, lastAdvanceTime, tickCount
+    now = time.perf_counter()
+    accumulator += now - lastAdvanceTime
+    lastAdvanceTime = now
+
+    tickDelta = getTickDelta()
+    ticks = int(accumulator // tickDelta)
+    if ticks > MAX_TICKS_PER_FRAME:
+        ticks = MAX_TICKS_PER_FRAME
+        # drop the time that can't be caught up on
+        accumulator = tickDelta * ticks
+    accumulator -= tickDelta * ticks
+
+    tickCount += ticks
+    return ticks
+
+def getInterpolationAlpha():
+    """return how far (from 0 to 1) the current frame is between the last simulation tick and the next one"""
+    return accumulator / getTickDelta()
+
+def limitFrameRate():
+    """wait until enough time has passed since the last call for the frame rate to stay at or under MAX_FRAME_RATE"""
+    global lastFrameLimitTime
+    if MAX_FRAME_RATE is None:
+        return
+
+    frameDelta = 1.0 / MAX_FRAME_RATE
+    target = lastFrameLimitTime + frameDelta
+    remaining = target - time.perf_counter()
+    if remaining > SLEEP_MARGIN:
+        time.sleep(remaining - SLEEP_MARGIN)
+    while time.perf_counter() < target:
+        pass
+
+    now = time.perf_counter()
+    # aim for the next frame relative to when this one should have ended so the frame rate doesn't drift,
+    # unless this frame was already late, in which case start again from now
+    lastFrameLimitTime = target if now - target < frameDelta else now
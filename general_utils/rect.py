@@ -3,6 +3,7 @@ from general_utils.vec2 import Vec2
 import pygame
 
 class Rect:
+    __slots__ = ("topLeft", "size")
 
     def __init__(self, topLeft: Vec2, size: Vec2):
         self.topLeft = topLeft
@@ -11,30 +12,45 @@ class Rect:
     def __repr__(self):
         return f"Rect({self.topLeft}, {self.size})"
 
+    def __eq__(self, other: Rect):
+        if other.__class__ is not Rect:
+            return NotImplemented
+        return self.topLeft == other.topLeft and self.size == other.size
+
+    def __hash__(self):
+        return hash((self.topLeft.x, self.topLeft.y, self.size.x, self.size.y))
+
     @staticmethod
     def fromValues(x, y, width, height):
         return Rect(Vec2(x, y), Vec2(width, height))
 
     @staticmethod
     def fromCorners(topLeft: Vec2, topRight: Vec2):
-        return Rect(topLeft, topRight - topLeft + Vec2(1.0, 1.0))
+        return Rect(topLeft, Vec2(topRight.x - topLeft.x + 1.0, topRight.y - topLeft.y + 1.0))
 
     @staticmethod
     def fromCornersValues(x1, y1, x2, y2):
-        return Rect.fromCorners(Vec2(x1, y1), Vec2(x2, y2))
+        return Rect(Vec2(x1, y1), Vec2(x2 - x1 + 1.0, y2 - y1 + 1.0))
 
     @staticmethod
     def fromPygameRect(rect: pygame.Rect):
-        return Rect.fromValues(rect.x, rect.y, rect.width, rect.height)
+        return Rect(Vec2(rect.x, rect.y), Vec2(rect.width, rect.height))
 
     def toPygameRect(self):
-        return pygame.Rect(self.topLeft.asTuple(), self.size.asTuple())
+        return pygame.Rect(self.topLeft.x, self.topLeft.y, self.size.x, self.size.y)
 
     def isPointInside(self, point: Vec2):
         return self.topLeft.x <= point.x < self.topLeft.x + self.size.x and self.topLeft.y <= point.y < self.topLeft.y + self.size.y
 
     def isRectInside(self, rect: Rect):
-        return self.isPointInside(rect.topLeft) and self.isPointInside(rect.topLeft + rect.size - Vec2(1.0, 1.0))
+        x = rect.topLeft.x
+        y = rect.topLeft.y
+        return (self.isPointValuesInside(x, y) and
+                self.isPointValuesInside(x + rect.size.x - 1.0, y + rect.size.y - 1.0))
+
+    def isPointValuesInside(self, x: float, y: float):
+        """the same as isPointInside, but without needing to create a Vec2"""
+        return self.topLeft.x <= x < self.topLeft.x + self.size.x and self.topLeft.y <= y < self.topLeft.y + self.size.y
 
     def isRectColliding(self, rect: Rect):
         return (self.topLeft.x < rect.topLeft.x + rect.size.x - 1.0 and
@@ -42,6 +58,16 @@ class Rect:
                 self.topLeft.y < rect.topLeft.y + rect.size.y - 1.0 and
                 self.topLeft.y + self.size.y - 1.0 > rect.topLeft.y)
 
+    def getIntersection(self, rect: Rect):
+        """return a Rect of the area inside both rects, or None if they don't overlap"""
+        left = max(self.topLeft.x, rect.topLeft.x)
+        top = max(self.topLeft.y, rect.topLeft.y)
+        right = min(self.topLeft.x + self.size.x, rect.topLeft.x + rect.size.x)
+        bottom = min(self.topLeft.y + self.size.y, rect.topLeft.y + rect.size.y)
+        if right <= left or bottom <= top:
+            return None
+        return Rect(Vec2(left, top), Vec2(right - left, bottom - top))
+
     def getX(self):
         return self.topLeft.x
 
@@ -55,4 +81,4 @@ class Rect:
         return self.size.y
 
     def toTuple(self):
-        return self.topLeft.x, self.topLeft.x, self.size.x, self.size.y
+        return self.topLeft.x, self.topLeft.y, self.size.x, self.size.y
@@ -2,11 +2,19 @@ from __future__ import annotations
 import math
 
 class Vec2:
-    """Multi purpose vector class"""
+    """Multi purpose vector class
+
+    x and y are stored as they are given (ints are not converted to floats) to keep creating vectors cheap
+
+    the in-place operators (+=, -=, *=, /=) change the vector itself instead of creating a new one,
+    so they should not be used on vectors that might be shared with something else (default arguments, for example)
+    or that are being used as dict keys
+    """
+    __slots__ = ("x", "y")
 
     def __init__(self, x: float = 0.0, y: float = 0.0):
-        self.x: float = float(x)
-        self.y: float = float(y)
+        self.x: float = x
+        self.y: float = y
 
     @staticmethod
     def fromTuple(xy: tuple[float | int]):
@@ -26,39 +34,96 @@ class Vec2:
     
     Vec2(10.0, 2.0) == Vec2(10.0, 3.0) -> False
     Vec2(13.0, 1.0) == Vec2(13.0, 1.0) -> True
+
+    v = Vec2(1.0, 1.0); v += Vec2(2.0, 3.0) -> v is now Vec2(3.0, 4.0) (and is still the same object)
     """
 
+    # note: 'other.__class__ is Vec2' is used instead of isinstance because it is noticeably faster
+    # and these methods are called a huge number of times every frame
+
     def __add__(self, other: Vec2 | float | int):
-        if isinstance(other, Vec2):
+        if other.__class__ is Vec2:
             return Vec2(self.x + other.x, self.y + other.y)
         else:
             return Vec2(self.x + other, self.y + other)
 
     def __sub__(self, other: Vec2 | float | int):
-        if isinstance(other, Vec2):
+        if other.__class__ is Vec2:
             return Vec2(self.x - other.x, self.y - other.y)
         else:
             return Vec2(self.x - other, self.y - other)
 
     def __mul__(self, other: Vec2 | float | int):
-        if isinstance(other, Vec2):
+        if other.__class__ is Vec2:
             return Vec2(self.x * other.x, self.y * other.y)
         else:
             return Vec2(self.x * other, self.y * other)
 
     def __truediv__(self, other: Vec2 | float | int):
-        if isinstance(other, Vec2):
+        if other.__class__ is Vec2:
             return Vec2(self.x / other.x, self.y / other.y)
         else:
             return Vec2(self.x / other, self.y / other)
 
+    def __iadd__(self, other: Vec2 | float | int):
+        if other.__class__ is Vec2:
+            self.x += other.x
+            self.y += other.y
+        else:
+            self.x += other
+            self.y += other
+        return self
+
+    def __isub__(self, other: Vec2 | float | int):
+        if other.__class__ is Vec2:
+            self.x -= other.x
+            self.y -= other.y
+        else:
+            self.x -= other
+            self.y -= other
+        return self
+
+    def __imul__(self, other: Vec2 | float | int):
+        if other.__class__ is Vec2:
+            self.x *= other.x
+            self.y *= other.y
+        else:
+            self.x *= other
+            self.y *= other
+        return self
+
+    def __itruediv__(self, other: Vec2 | float | int):
+        if other.__class__ is Vec2:
+            self.x /= other.x
+            self.y /= other.y
+        else:
+            self.x /= other
+            self.y /= other
+        return self
+
     def __eq__(self, other: Vec2):
+        if other.__class__ is not Vec2:
+            return NotImplemented
         return self.x == other.x and self.y == other.y
 
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def set(self, x: float, y: float):
+        """set x and y without creating a new vector"""
+        self.x = x
+        self.y = y
+        return self
+
+    def copy(self):
+        return Vec2(self.x, self.y)
+
     def rotateRadians(self, angle: float):
         """return a vector rotated around the origin by 'angle' radians"""
-        return Vec2(self.x * math.cos(angle) - self.y * math.sin(angle),
-                    self.x * math.sin(angle) + self.y * math.cos(angle))
+        cos = math.cos(angle)
+        sin = math.sin(angle)
+        return Vec2(self.x * cos - self.y * sin,
+                    self.x * sin + self.y * cos)
 
     def rotate(self, angle: float):
         """return a vector rotated around the origin by 'angle' degrees"""
@@ -69,7 +134,7 @@ class Vec2:
         return (self - point).rotateRadians(angle) + point
 
     def rotateAround(self, point: Vec2, angle: float):
-        """return a vector rotated around 'point' by 'angle' radians"""
+        """return a vector rotated around 'point' by 'angle' degrees"""
         return (self - point).rotate(angle) + point
 
     def asTuple(self):
@@ -77,15 +142,16 @@ class Vec2:
 
     def length(self):
         """return the length of this vector from the origin (its magnitude)"""
-        return math.sqrt(self.x ** 2 + self.y ** 2)
+        return math.hypot(self.x, self.y)
 
     def lengthSquared(self):
         """return the length of this vector from the origin squared (its magnitude squared)
 
         this is useful because taking the square root (which is needed for regular length) can be somewhat computationally expensive
         """
-        return self.x ** 2 + self.y ** 2
+        return self.x * self.x + self.y * self.y
 
     def normalized(self):
         """return a new Vector with the same X:Y ratio but a length of 1 (or normalized)"""
-        return self / self.length()
+        length = math.hypot(self.x, self.y)
+        return Vec2(self.x / length, self.y / length)
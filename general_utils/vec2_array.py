@@ -0,0 +1,150 @@
+from __future__ import annotations
+from general_utils.vec2 import Vec2
+import numpy as np
+
+class Vec2Array:
+    """An array of 2d vectors stored in a single contiguous NumPy array (with shape (n, 2))
+
+    supports the same math as Vec2, but applied to every vector at once so that things like
+    the positions of every car can be updated with one call instead of one call per vector
+
+    the other side of a math operator can be a Vec2Array of the same length, a single Vec2 (applied to every vector),
+    a number, or a NumPy array with one number per vector
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data: np.ndarray | list = None):
+        if data is None:
+            data = np.zeros((0, 2))
+        self.data: np.ndarray = np.ascontiguousarray(data, dtype=np.float64).reshape(-1, 2)
+
+    @staticmethod
+    def zeros(count: int):
+        return Vec2Array(np.zeros((count, 2)))
+
+    @staticmethod
+    def fromVec2s(vectors: list[Vec2]):
+        return Vec2Array(np.array([(vector.x, vector.y) for vector in vectors], dtype=np.float64).reshape(-1, 2))
+
+    @staticmethod
+    def fromComponents(xs: np.ndarray | list[float], ys: np.ndarray | list[float]):
+        """return a Vec2Array from a list of x values and a list of y values"""
+        return Vec2Array(np.column_stack((xs, ys)))
+
+    def toVec2s(self):
+        return [Vec2(x, y) for x, y in self.data.tolist()]
+
+    def __repr__(self):
+        return f"Vec2Array({self.data.tolist()})"
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index: int | slice | np.ndarray):
+        """return a Vec2 if index is an int, otherwise a Vec2Array of the selected vectors"""
+        if isinstance(index, (int, np.integer)):
+            x, y = self.data[index]
+            return Vec2(float(x), float(y))
+        return Vec2Array(self.data[index])
+
+    def __setitem__(self, index: int | slice | np.ndarray, value: Vec2 | Vec2Array):
+        self.data[index] = _asOperand(value)
+
+    @property
+    def x(self):
+        """a view of the x values of every vector (changing it changes this array)"""
+        return self.data[:, 0]
+
+    @property
+    def y(self):
+        """a view of the y values of every vector (changing it changes this array)"""
+        return self.data[:, 1]
+
+    def __add__(self, other: Vec2Array | Vec2 | np.ndarray | float):
+        return Vec2Array(self.data + _asOperand(other))
+
+    def __sub__(self, other: Vec2Array | Vec2 | np.ndarray | float):
+        return Vec2Array(self.data - _asOperand(other))
+
+    def __mul__(self, other: Vec2Array | Vec2 | np.ndarray | float):
+        return Vec2Array(self.data * _asOperand(other))
+
+    def __truediv__(self, other: Vec2Array | Vec2 | np.ndarray | float):
+        return Vec2Array(self.data / _asOperand(other))
+
+    def __iadd__(self, other: Vec2Array | Vec2 | np.ndarray | float):
+        self.data += _asOperand(other)
+        return self
+
+    def __isub__(self, other: Vec2Array | Vec2 | np.ndarray | float):
+        self.data -= _asOperand(other)
+        return self
+
+    def __imul__(self, other: Vec2Array | Vec2 | np.ndarray | float):
+        self.data *= _asOperand(other)
+        return self
+
+    def __itruediv__(self, other: Vec2Array | Vec2 | np.ndarray | float):
+        self.data /= _asOperand(other)
+        return self
+
+    def __eq__(self, other: Vec2Array):
+        if not isinstance(other, Vec2Array):
+            return NotImplemented
+        return np.array_equal(self.data, other.data)
+
+    # mutable and compared by value, so it can't be hashed
+    __hash__ = None
+
+    def copy(self):
+        return Vec2Array(self.data.copy())
+
+    def rotateRadians(self, angle: float | np.ndarray):
+        """return the vectors rotated around the origin by 'angle' radians
+
+        'angle' can be a single angle for every vector or an array with an angle for each vector
+        """
+        cos = np.cos(angle)
+        sin = np.sin(angle)
+        x = self.data[:, 0]
+        y = self.data[:, 1]
+        return Vec2Array(np.column_stack((x * cos - y * sin, x * sin + y * cos)))
+
+    def rotate(self, angle: float | np.ndarray):
+        """return the vectors rotated around the origin by 'angle' degrees"""
+        return self.rotateRadians(np.radians(angle))
+
+    def rotateAroundRadians(self, point: Vec2 | Vec2Array, angle: float | np.ndarray):
+        """return the vectors rotated around 'point' (or each vector around its own point) by 'angle' radians"""
+        return (self - point).rotateRadians(angle) + point
+
+    def rotateAround(self, point: Vec2 | Vec2Array, angle: float | np.ndarray):
+        """return the vectors rotated around 'point' (or each vector around its own point) by 'angle' degrees"""
+        return (self - point).rotate(angle) + point
+
+    def length(self):
+        """return an array of the length of every vector"""
+        return np.hypot(self.data[:, 0], self.data[:, 1])
+
+    def lengthSquared(self):
+        """return an array of the length squared of every vector (see Vec2.lengthSquared)"""
+        return np.einsum("ij,ij->i", self.data, self.data)
+
+    def normalized(self):
+        """return the vectors with a length of 1
+
+        note: unlike Vec2.normalized, vectors with a length of 0 stay as 0 instead of raising an error
+        """
+        length = self.length()
+        return Vec2Array(np.divide(self.data, length[:, None], out=np.zeros_like(self.data), where=length[:, None] != 0.0))
+
+def _asOperand(other: Vec2Array | Vec2 | np.ndarray | float):
+    """convert the other side of a math operation to something that NumPy can broadcast against an (n, 2) array"""
+    if other.__class__ is Vec2Array:
+        return other.data
+    if other.__class__ is Vec2:
+        return np.array((other.x, other.y))
+    if isinstance(other, np.ndarray) and other.ndim == 1:
+        # one value per vector
+        return other[:, None]
+    return other
@@ -1,7 +1,15 @@
 from __future__ import annotations
+import bisect
 from general_utils.vec2 import Vec2
+from general_utils.rect import Rect
 from abc import abstractmethod, ABC
 from pygame_rendering import window
+from events.event_handler import PygameEventListener
+from guis.hit_testing import HitTestGrid
+import pygame
+
+# GUIs get mouse events before anything else listening for them (see PygameEventListener)
+GUI_EVENT_PRIORITY = 100
 
 class GUIElement(ABC):
     """Base class for all GUI elements
@@ -12,12 +20,16 @@ class GUIElement(ABC):
     All GUI elements (including containers) can be added to containers
     This should make a sort of tree structure with a RootContainer as the root
     """
+    # whether the RootContainer should pass mouse events to this element (see RootContainer)
+    isInteractable = False
 
     def __init__(self, size: Vec2 = Vec2(), relativePos: Vec2 = Vec2(0, 0), visible: bool = True):
+        self.parent: GUIContainer | type(None) = None
+        # cached result of getAbsolutePosition, None when it needs to be recalculated
+        self._absolutePosition: Vec2 | type(None) = None
         self.relativePos = relativePos
         self.__size = size
         self.visible = visible
-        self.parent: GUIContainer | type(None) = None
         self.isLoaded: bool = False
 
     @abstractmethod
@@ -35,11 +47,29 @@ class GUIElement(ABC):
         """function to be called when this element is unloaded"""
         assert not self.isLoaded
         self.isLoaded = True
+        self.addEventListeners()
 
     def unload(self):
         """function to be called when this element is unloaded"""
         assert self.isLoaded
         self.isLoaded = False
+        self.removeEventListeners()
+
+    def suspend(self):
+        """stop this element reacting to events while its scene is suspended, without unloading it"""
+        self.removeEventListeners()
+
+    def resume(self):
+        """start reacting to events again after being suspended"""
+        self.addEventListeners()
+
+    def addEventListeners(self):
+        """add the event listeners of this element (called when it is loaded or resumed)"""
+        pass
+
+    def removeEventListeners(self):
+        """remove the event listeners of this element (called when it is unloaded or suspended)"""
+        pass
 
     def addToContainer(self, container: GUIContainer):
         container.addChild(self)
@@ -48,27 +78,69 @@ class GUIElement(ABC):
         """callback function so that inheritors can detect when they are added to a container"""
         pass
 
+    def markChanged(self):
+        """notify this element's ancestors that the way it is drawn has changed
+
+        should be called whenever the size, position, visibility or image of an element changes
+        so that any containers that cache their drawing know to redraw
+        """
+        if self.parent is not None:
+            self.parent.onDescendantChanged(self)
+
+    @property
+    def relativePos(self):
+        return self.__relativePos
+
+    @relativePos.setter
+    def relativePos(self, relativePos: Vec2):
+        self.__relativePos = relativePos
+        self.invalidateAbsolutePosition()
+        self.markChanged()
+
+    @property
+    def visible(self):
+        return self.__visible
+
+    @visible.setter
+    def visible(self, visible: bool):
+        self.__visible = visible
+        self.markChanged()
+
     def toggleVisible(self):
         self.visible = not self.visible
 
     def setSize(self, size: Vec2):
         self.__size = size
+        # the offset a container gives an element can depend on the element's size
+        self.invalidateAbsolutePosition()
+        self.markChanged()
 
     def getSize(self):
         return self.__size
 
-    # TODO: create an absolutePosition field that gets updated with relative
-    #  positions so that this doesn't need to called every frame for every image
-    # (maybe it would be better to calculate it every frame idk)
     def getAbsolutePosition(self):
         """return the absolute position of this element
 
         the absolute position is calculated from adding any offsets of itself or any parent containers
+        it is cached until invalidateAbsolutePosition is called, so it is usually just a lookup
+        a copy of the cached position is returned, so callers can change it (e.g. with +=) without corrupting the cache
         """
-        if self.parent is None:
-            return Vec2(0, 0)
-        else:
-            return self.relativePos + self.parent.getChildOffset(self) + self.parent.getAbsolutePosition()
+        if self._absolutePosition is None:
+            if self.parent is None:
+                self._absolutePosition = Vec2(0, 0)
+            else:
+                self._absolutePosition = self.relativePos + self.parent.getChildOffset(self) + self.parent.getAbsolutePosition()
+        return self._absolutePosition.copy()
+
+    def invalidateAbsolutePosition(self):
+        """clear the cached absolute position of this element (and any descendants) so it is recalculated the next time it is needed
+
+        should be called whenever anything that the absolute position depends on changes
+        (relativePos, size, parent, or the layout of the parent container)
+        note: elements only cache their position after their parent has, so if this element's cache is already clear,
+              so are all of its descendants'
+        """
+        self._absolutePosition = None
 
 
 class GUIContainer(GUIElement):
@@ -89,6 +161,7 @@ class GUIContainer(GUIElement):
 
             child.parent = self
             self._children.append(child)
+            child.invalidateAbsolutePosition()
             child.onAddedToContainer(self)
 
     def draw(self):
@@ -110,32 +183,93 @@ class GUIContainer(GUIElement):
         for child in self.getChildren():
             child.unload()
 
+    def suspend(self):
+        super().suspend()
+        for child in self.getChildren():
+            child.suspend()
+
+    def resume(self):
+        super().resume()
+        for child in self.getChildren():
+            child.resume()
+
     def addChild(self, child: GUIElement):
         assert child.parent is None, "Element already added to a container"
 
         child.parent = self
         self._children.append(child)
+        child.invalidateAbsolutePosition()
         child.onAddedToContainer(self)
+        self.onDescendantChanged(child)
+        return self
+
+    def removeChild(self, child: GUIElement):
+        """remove a child from this container (unloading it first if it is loaded)"""
+        assert child.parent is self, "Element not a child of this container"
+        self._children.remove(child)
+        self.onChildRemoved(child)
         return self
 
+    def onChildRemoved(self, child: GUIElement):
+        """detach a child that has just been taken out of this container's children
+
+        should be called by any subclass that overrides removeChild, after removing the child from its own structures
+        """
+        if child.isLoaded:
+            child.unload()
+        child.parent = None
+        child.invalidateAbsolutePosition()
+        self.onDescendantChanged(child)
+
+    def invalidateAbsolutePosition(self):
+        if self._absolutePosition is not None:
+            super().invalidateAbsolutePosition()
+            self.invalidateLayout()
+
+    def invalidateLayout(self):
+        """clear the cached absolute positions of all children (and their descendants)
+
+        should be called by subclasses whenever the offsets they give their children change
+        """
+        for child in self.getChildren():
+            child.invalidateAbsolutePosition()
+
+    def onDescendantChanged(self, descendant: GUIElement):
+        """callback for when the way a descendant of this container is drawn has changed (see markChanged)
+
+        by default this just passes the notification on to this container's parent
+        """
+        self.markChanged()
+
     def getChildOffset(self, child: GUIElement):
         """return a Vec2 of a specific child's position relative to this container
 
         should be overridden by subclasses that modifies the position of their children individually rather
         than all together (which would be done by changing the relativePos attribute of the container)
         """
-        assert child in self.getChildren(), "Element not a child of this container"
+        assert child.parent is self, "Element not a child of this container"
         return Vec2()
 
     def getChildren(self):
         return self._children
 
+    def getClipRect(self):
+        """return a Rect (in screen coordinates) that this container's descendants are clipped to, or None if they aren't clipped
+
+        used so that the parts of interactable elements that are clipped off can't be clicked
+        """
+        return None
+
 class LayeredGUIContainer(GUIContainer):
     """A gui container that orders elements based on an int value they are assigned
 
     children are put into a dict instead of a list with the keys being the int that represents their 'layer'
     the 'getChildren' method is used to get a list of all children in ascending order of layer
     consequently, children are also drawn in ascending order of layer
+
+    the layers are kept in a sorted list that is only added to or removed from when a layer gains its first child or loses its last,
+    and the list returned by getChildren is cached until a child is added, removed or moved to another layer,
+    so nothing is sorted or rebuilt while drawing
     """
 
     def __init__(self, size: Vec2 = Vec2(0.0, 0.0), relativePos: Vec2 = Vec2(0, 0),
@@ -149,7 +283,12 @@ class LayeredGUIContainer(GUIContainer):
 
         assert len(children) == len(childrenLayers)
 
-        self._children = dict()
+        self._children: dict[int, list[GUIElement]] = dict()
+        # every layer that has children, in ascending order
+        self._layers: list[int] = []
+        self._childrenLayers: dict[GUIElement, int] = dict()
+        # the cached result of getChildren, None when it needs to be rebuilt
+        self._orderedChildren: list[GUIElement] | type(None) = []
 
         for i in range(len(children)):
             self.addChild(children[i], childrenLayers[i])
@@ -158,22 +297,137 @@ class LayeredGUIContainer(GUIContainer):
         assert child.parent is None, "Element already added to a container"
 
         child.parent = self
+        child.invalidateAbsolutePosition()
+        self.addToLayer(child, layer)
+
+        child.onAddedToContainer(self)
+        self.onDescendantChanged(child)
+
+        return self
+
+    def removeChild(self, child: GUIElement):
+        assert child.parent is self, "Element not a child of this container"
+        self.removeFromLayer(child)
+        self.onChildRemoved(child)
+        return self
+
+    def moveChildToLayer(self, child: GUIElement, layer: int):
+        """move a child to a different layer (it will be put on top of any children already in that layer)"""
+        assert child.parent is self, "Element not a child of this container"
+        self.removeFromLayer(child)
+        self.addToLayer(child, layer)
+        # the draw order changed, so anything on top of other things may have changed
+        self.onDescendantChanged(child)
 
-        if layer in self._children.keys():
+    def getLayerOfChild(self, child: GUIElement):
+        assert child.parent is self, "Element not a child of this container"
+        return self._childrenLayers[child]
+
+    def addToLayer(self, child: GUIElement, layer: int):
+        if layer in self._children:
             self._children[layer].append(child)
         else:
             self._children[layer] = [child]
+            bisect.insort(self._layers, layer)
 
-        child.onAddedToContainer(self)
+        self._childrenLayers[child] = layer
+        self._orderedChildren = None
 
-        return self
+    def removeFromLayer(self, child: GUIElement):
+        layer = self._childrenLayers.pop(child)
+        self._children[layer].remove(child)
+        if not self._children[layer]:
+            del self._children[layer]
+            del self._layers[bisect.bisect_left(self._layers, layer)]
+
+        self._orderedChildren = None
 
     def getChildren(self):
-        """return all children in ascending order based on their layer"""
-        return [child for layer in sorted(self._children.keys()) for child in self._children[layer]]
+        """return all children in ascending order based on their layer
 
-class RootContainer(GUIContainer):  # not sure if this needs its own class or not, but I thought why not
+        note: the list is cached, so it should not be changed
+        """
+        if self._orderedChildren is None:
+            self._orderedChildren = [child for layer in self._layers for child in self._children[layer]]
+        return self._orderedChildren
+
+class RootContainer(GUIContainer):
+    """The container at the root of a tree of GUI elements
+
+    instead of every interactable element listening for mouse events on its own, the root listens for them
+    and passes each one only to the topmost visible interactable element under the mouse (the one drawn last)
+    the areas of interactable elements are kept in a HitTestGrid, which is rebuilt when it is needed after anything changes
+    """
+
+    def __init__(self, size: Vec2 = Vec2(0.0, 0.0), relativePos: Vec2 = Vec2(0, 0),
+                 visible: bool = True, children: list[GUIElement] = None):
+        self.hitTestGrid = HitTestGrid()
+        self.isHitTestGridValid = False
+        self.mouseDownEventListener = PygameEventListener(pygame.MOUSEBUTTONDOWN, self.onMouseEvent, True, priority=GUI_EVENT_PRIORITY)
+        self.mouseUpEventListener = PygameEventListener(pygame.MOUSEBUTTONUP, self.onMouseEvent, True, priority=GUI_EVENT_PRIORITY)
+        super().__init__(size, relativePos, visible, children)
 
     def draw(self):
         assert self.isLoaded
         super().draw()
+
+    def addEventListeners(self):
+        self.mouseDownEventListener.add()
+        self.mouseUpEventListener.add()
+
+    def removeEventListeners(self):
+        self.mouseDownEventListener.remove()
+        self.mouseUpEventListener.remove()
+
+    def onDescendantChanged(self, descendant: GUIElement):
+        self.isHitTestGridValid = False
+        super().onDescendantChanged(descendant)
+
+    def rebuildHitTestGrid(self):
+        """add the areas of every visible interactable descendant to the hit test grid, in the order they are drawn"""
+        self.hitTestGrid.clear()
+        self.addChildrenToHitTestGrid(self)
+        self.isHitTestGridValid = True
+
+    def addChildrenToHitTestGrid(self, container: GUIContainer, clipRect: Rect = None):
+        """add the visible interactable descendants of 'container', only including the parts of them inside 'clipRect'"""
+        containerClipRect = container.getClipRect()
+        if containerClipRect is not None:
+            clipRect = containerClipRect if clipRect is None else clipRect.getIntersection(containerClipRect)
+            if clipRect is None:
+                # everything in this container is clipped off
+                return
+
+        for child in container.getChildren():
+            if not child.visible:
+                continue
+            if child.isInteractable:
+                rect = Rect(child.getAbsolutePosition(), child.getSize())
+                if clipRect is not None:
+                    rect = clipRect.getIntersection(rect)
+                if rect is not None:
+                    self.hitTestGrid.add(child, rect)
+            if isinstance(child, GUIContainer):
+                self.addChildrenToHitTestGrid(child, clipRect)
+
+    def getInteractableAt(self, x: float, y: float):
+        """return the topmost visible interactable element at (x, y), or None if there isn't one"""
+        if not self.isHitTestGridValid:
+            self.rebuildHitTestGrid()
+        return self.hitTestGrid.getTopmostAt(x, y)
+
+    def onMouseEvent(self, event: pygame.event.EventType):
+        """pass a mouse event to the interactable element under the mouse
+
+        the event is consumed (see PygameEventListener) if there was an element to pass it to, so clicking on GUIs doesn't
+        also affect anything that listens for mouse events with a lower priority (like the game world)
+        """
+        element = self.getInteractableAt(*event.dict["pos"])
+        if element is None:
+            return False
+
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            element.onMouseDown(event)
+        else:
+            element.onMouseUp(event)
+        return True
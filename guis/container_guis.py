@@ -1,10 +1,28 @@
-from guis.base_guis import GUIContainer, GUIElement
+from guis.base_guis import GUIContainer, GUIElement, GUI_EVENT_PRIORITY
 from general_utils.vec2 import Vec2
+from general_utils.rect import Rect
+from events.event_handler import PygameEventListener
 from pygame_rendering import window
+import pygame
 
 VALID_ALIGNMENTS = ("TOP_LEFT", "TOP", "TOP_RIGHT", "LEFT", "CENTER", "RIGHT", "BOTTOM_LEFT", "BOTTOM", "BOTTOM_RIGHT")
 ALIGNMENT_SHORTHANDS = ("TL", "T", "TR", "L", "C", "R", "BL", "B", "BR")
 
+# how far across the free space (this container's size minus the child's size) a child is put for each alignment, as (x, y)
+ALIGNMENT_FACTORS = {
+    "TOP_LEFT": (0.0, 0.0), "TOP": (0.5, 0.0), "TOP_RIGHT": (1.0, 0.0),
+    "LEFT": (0.0, 0.5), "CENTER": (0.5, 0.5), "RIGHT": (1.0, 0.5),
+    "BOTTOM_LEFT": (0.0, 1.0), "BOTTOM": (0.5, 1.0), "BOTTOM_RIGHT": (1.0, 1.0),
+}
+
+def getFullAlignment(alignment: str):
+    """return the full name of an alignment (converting shorthands), or None if it is not a valid alignment"""
+    if alignment in ALIGNMENT_SHORTHANDS:
+        return VALID_ALIGNMENTS[ALIGNMENT_SHORTHANDS.index(alignment)]
+    if alignment in VALID_ALIGNMENTS:
+        return alignment
+    return None
+
 class AlignmentContainer(GUIContainer):
     """Alignment Container to align child elements to corners, faces, or the center of this container
 
@@ -12,64 +30,228 @@ class AlignmentContainer(GUIContainer):
     (for example, if the alignment was TOP_RIGHT the top right of the element would be the same as the top right of this container)
     If not aligned to a corner (for example if the alignment was BOTTOM), then the centers would be aligned
     (the middle X of the element would be the same as the middle X of this container)
+
+    the alignment of each child is kept in a dict, and the offsets of children are calculated by a layout pass (updateLayout)
+    that only runs for children whose offset is out of date (because they, or this container, changed size or alignment)
     """
 
     def __init__(self, size: Vec2 = None, relativePos: Vec2 = Vec2(0.0, 0.0), visible: bool = True, children: list[GUIElement] = None, childrenAlignments: list[str] = None):
         if size is None:
             size = window.getScreenSize()
+        self.childrenAlignments: dict[GUIElement, str] = dict()
+        # the offset of every child whose offset is up to date
+        self.childOffsets: dict[GUIElement, Vec2] = dict()
         super().__init__(size, relativePos, visible, children)
         if childrenAlignments is None:
             childrenAlignments = []
 
-        # ensures they are the same length
-        for i in range(len(self.getChildren()) - len(childrenAlignments)):
-            childrenAlignments.append("CENTER")
-        childrenAlignments = childrenAlignments[:len(self.getChildren())]
-
-        # sets all shorthand values to their full name or CENTER if not valid
-        for i in range(len(childrenAlignments)):
-            if childrenAlignments[i] in ALIGNMENT_SHORTHANDS:
-                childrenAlignments[i] = VALID_ALIGNMENTS[i]
-            elif childrenAlignments[i] not in VALID_ALIGNMENTS:
-                childrenAlignments[i] = "CENTER"
-
-        self.childrenAlignments = childrenAlignments
+        # children without an alignment (or with one that is not valid) are put in the CENTER
+        for i, child in enumerate(self.getChildren()):
+            alignment = getFullAlignment(childrenAlignments[i]) if i < len(childrenAlignments) else None
+            self.childrenAlignments[child] = "CENTER" if alignment is None else alignment
 
     def addChild(self, child: GUIElement, alignment: str = "CENTER"):
-        super().addChild(child)
+        fullAlignment = getFullAlignment(alignment)
+        if fullAlignment is None:
+            raise Exception("Not valid alignment: " + alignment)
 
-        if alignment in ALIGNMENT_SHORTHANDS:
-            alignment = VALID_ALIGNMENTS[ALIGNMENT_SHORTHANDS.index(alignment)]
+        self.childrenAlignments[child] = fullAlignment
+        return super().addChild(child)
 
-        self.childrenAlignments.append(alignment)
+    def removeChild(self, child: GUIElement):
+        super().removeChild(child)
+        del self.childrenAlignments[child]
+        self.childOffsets.pop(child, None)
+        return self
 
     def getAlignmentOfChild(self, child: GUIElement):
-        assert child in self.getChildren(), "Element not a child of this container"
-        return self.childrenAlignments[self.getChildren().index(child)]
+        assert child.parent is self, "Element not a child of this container"
+        return self.childrenAlignments[child]
+
+    def setAlignmentOfChild(self, child: GUIElement, alignment: str):
+        assert child.parent is self, "Element not a child of this container"
+        fullAlignment = getFullAlignment(alignment)
+        if fullAlignment is None:
+            raise Exception("Not valid alignment: " + alignment)
+
+        self.childrenAlignments[child] = fullAlignment
+        self.childOffsets.pop(child, None)
+        child.invalidateAbsolutePosition()
+        self.onDescendantChanged(child)
+
+    def updateLayout(self):
+        """calculate the offsets of every child whose offset is out of date
+
+        note: this usually isn't necessary as getChildOffset calls it whenever it is needed
+        """
+        width = self.getSize().x
+        height = self.getSize().y
+        for child in self.getChildren():
+            if child not in self.childOffsets:
+                factorX, factorY = ALIGNMENT_FACTORS[self.childrenAlignments[child]]
+                childSize = child.getSize()
+                self.childOffsets[child] = Vec2((width - childSize.x) * factorX, (height - childSize.y) * factorY)
 
     def getChildOffset(self, child: GUIElement):
         """return the offset of a specific child
 
-        calculates the offset of a child based on its offset and returns it"""
-        alignment = self.getAlignmentOfChild(child)
-
-        if alignment == "TOP_LEFT":
-            return super().getChildOffset(child) + Vec2(0, 0)
-        elif alignment == "TOP":
-            return super().getChildOffset(child) + Vec2((self.getSize().x - child.getSize().x) / 2, 0)
-        elif alignment == "TOP_RIGHT":
-            return super().getChildOffset(child) + Vec2(self.getSize().x - child.getSize().x, 0)
-        elif alignment == "LEFT":
-            return super().getChildOffset(child) + Vec2(0, self.getSize().y - child.getSize().y / 2)
-        elif alignment == "CENTER":
-            return super().getChildOffset(child) + Vec2((self.getSize().x - child.getSize().x) / 2, (self.getSize().y - child.getSize().y) / 2)
-        elif alignment == "RIGHT":
-            return super().getChildOffset(child) + Vec2(self.getSize().x - child.getSize().x, (self.getSize().y - child.getSize().y) / 2)
-        elif alignment == "BOTTOM_LEFT":
-            return super().getChildOffset(child) + Vec2(0, self.getSize().y - child.getSize().y)
-        elif alignment == "BOTTOM":
-            return super().getChildOffset(child) + Vec2((self.getSize().x - child.getSize().x) / 2, self.getSize().y - child.getSize().y)
-        elif alignment == "BOTTOM_RIGHT":
-            return super().getChildOffset(child) + Vec2(self.getSize().x - child.getSize().x, self.getSize().y - child.getSize().y)
-        else:
-            raise Exception("Not valid alignment: " + alignment)
+        the offset is only recalculated (by updateLayout) if the child or this container has changed since it was last calculated"""
+        if child not in self.childOffsets:
+            assert child.parent is self, "Element not a child of this container"
+            self.updateLayout()
+        return self.childOffsets[child]
+
+    def invalidateLayout(self):
+        self.childOffsets.clear()
+        super().invalidateLayout()
+
+    def setSize(self, size: Vec2):
+        # every child's offset depends on this container's size
+        self.childOffsets.clear()
+        super().setSize(size)
+
+    def onDescendantChanged(self, descendant: GUIElement):
+        # a child's offset depends on its size, so it has to be recalculated if it might have changed
+        if descendant.parent is self:
+            self.childOffsets.pop(descendant, None)
+        super().onDescendantChanged(descendant)
+
+
+class CachedGUIContainer(GUIContainer):
+    """A gui container that draws all of its descendants to a surface once and then just draws that surface every frame
+
+    the surface is only redrawn when the size, position, visibility or image of a descendant changes (see GUIElement.markChanged),
+    so this is meant for groups of elements that rarely change, like menus or HUD panels
+
+    only the area of the surface that was drawn to (see cachedArea) is drawn each frame, so a mostly empty container
+    (like a full screen menu with a few buttons) costs about the same as drawing its descendants' images directly
+
+    note: descendants are drawn relative to the top left of this container, and anything outside its size is cut off
+    """
+
+    def __init__(self, size: Vec2 = None, relativePos: Vec2 = Vec2(0.0, 0.0), visible: bool = True, children: list[GUIElement] = None):
+        if size is None:
+            size = window.getScreenSize()
+        self.cachedSurface: pygame.Surface | type(None) = None
+        # the smallest area of the cached surface that has every non transparent pixel in it
+        self.cachedArea: pygame.Rect | type(None) = None
+        self.isCacheValid = False
+        super().__init__(size, relativePos, visible, children)
+
+    def draw(self):
+        position = self.getAbsolutePosition()
+        if not self.isCacheValid:
+            self.updateCachedSurface(position)
+        if self.cachedArea.width > 0 and self.cachedArea.height > 0:
+            window.blit(self.cachedSurface, Vec2(position.x + self.cachedArea.x, position.y + self.cachedArea.y), self.cachedArea)
+
+    def updateCachedSurface(self, position: Vec2):
+        """redraw all visible descendants to the cached surface
+
+        note: this usually isn't necessary as it is called by draw whenever the cache is out of date
+        """
+        size = (int(self.getSize().x), int(self.getSize().y))
+        if self.cachedSurface is None or self.cachedSurface.get_size() != size:
+            self.cachedSurface = pygame.Surface(size, pygame.SRCALPHA)
+        self.cachedSurface.fill((0, 0, 0, 0))
+
+        window.pushRenderTarget(self.cachedSurface, position)
+        super().draw()
+        window.popRenderTarget()
+
+        self.cachedArea = self.cachedSurface.get_bounding_rect()
+        self.isCacheValid = True
+
+    def invalidateCache(self):
+        self.isCacheValid = False
+
+    def onDescendantChanged(self, descendant: GUIElement):
+        self.invalidateCache()
+        super().onDescendantChanged(descendant)
+
+    def setSize(self, size: Vec2):
+        super().setSize(size)
+        self.invalidateCache()
+
+
+class ScrollContainer(GUIContainer):
+    """A gui container that shows a scrollable view of its children, clipping anything outside of its area
+
+    children are positioned relative to the top left of the content, which is moved by the scroll offset
+    anything outside of this container is clipped (see window.pushClipRect), so children that are partly visible
+    are drawn with the area argument of blit instead of creating cropped surfaces, and children that are scrolled
+    completely out of view are culled
+
+    scrolling the mouse wheel over the container scrolls it by scrollSpeed pixels per step
+    the content can be scrolled until the bottom right of the furthest child reaches the bottom right of this container
+    """
+
+    def __init__(self, size: Vec2 = None, relativePos: Vec2 = Vec2(0.0, 0.0), visible: bool = True, children: list[GUIElement] = None,
+                 scrollSpeed: float = 40.0):
+        if size is None:
+            size = window.getScreenSize()
+        self.scrollOffset = Vec2(0.0, 0.0)
+        # the offset given to every child (the negative of the scroll offset)
+        self.contentOffset = Vec2(0.0, 0.0)
+        self.scrollSpeed = scrollSpeed
+        self.mouseWheelEventListener = PygameEventListener(pygame.MOUSEWHEEL, self.onMouseWheel, True, priority=GUI_EVENT_PRIORITY)
+        super().__init__(size, relativePos, visible, children)
+
+    def draw(self):
+        window.pushClipRect(self.getClipRect())
+        super().draw()
+        window.popClipRect()
+
+    def addEventListeners(self):
+        self.mouseWheelEventListener.add()
+
+    def removeEventListeners(self):
+        self.mouseWheelEventListener.remove()
+
+    def getChildOffset(self, child: GUIElement):
+        assert child.parent is self, "Element not a child of this container"
+        return self.contentOffset
+
+    def getClipRect(self):
+        return Rect(self.getAbsolutePosition(), self.getSize())
+
+    def getContentSize(self):
+        """return the size of the area that the children cover (from the top left of the content)"""
+        width = 0.0
+        height = 0.0
+        for child in self.getChildren():
+            childSize = child.getSize()
+            width = max(width, child.relativePos.x + childSize.x)
+            height = max(height, child.relativePos.y + childSize.y)
+        return Vec2(width, height)
+
+    def getMaxScrollOffset(self):
+        contentSize = self.getContentSize()
+        return Vec2(max(0.0, contentSize.x - self.getSize().x), max(0.0, contentSize.y - self.getSize().y))
+
+    def scrollTo(self, offset: Vec2):
+        """scroll so that 'offset' of the content is at the top left of this container (kept within the content)"""
+        maxOffset = self.getMaxScrollOffset()
+        x = min(max(offset.x, 0.0), maxOffset.x)
+        y = min(max(offset.y, 0.0), maxOffset.y)
+        if x == self.scrollOffset.x and y == self.scrollOffset.y:
+            return
+
+        self.scrollOffset = Vec2(x, y)
+        self.contentOffset = Vec2(-x, -y)
+        self.invalidateLayout()
+        self.markChanged()
+
+    def scrollBy(self, amount: Vec2):
+        self.scrollTo(self.scrollOffset + amount)
+
+    def getScrollOffset(self):
+        return self.scrollOffset
+
+    def onMouseWheel(self, event: pygame.event.EventType):
+        """scroll if the mouse is over this container, consuming the event if it is"""
+        if not self.visible or not self.getClipRect().isPointValuesInside(*pygame.mouse.get_pos()):
+            return False
+        # scrolling the wheel up (a positive y) should move the content down
+        self.scrollBy(Vec2(event.x * self.scrollSpeed, -event.y * self.scrollSpeed))
+        return True
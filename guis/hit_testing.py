@@ -0,0 +1,54 @@
+from __future__ import annotations
+from general_utils.rect import Rect
+
+# the width and height (in pixels) of each cell of a HitTestGrid
+HIT_TEST_CELL_SIZE = 128
+
+class HitTestGrid:
+    """A uniform grid spatial index of the areas of interactable GUI elements
+
+    every element is added to each cell its area touches, so finding the elements under a point only needs
+    to look at the few elements in a single cell instead of every element
+    elements are given an order when they are added (the order they are drawn in), which is used to find the topmost one
+    """
+
+    def __init__(self, cellSize: int = HIT_TEST_CELL_SIZE):
+        self.cellSize = cellSize
+        self.cells: dict[tuple[int, int], list[tuple[int, object, Rect]]] = dict()
+        self.elementCount = 0
+
+    def clear(self):
+        self.cells.clear()
+        self.elementCount = 0
+
+    def add(self, element: object, rect: Rect):
+        """add an element with the area it covers, elements added later are considered to be on top of earlier ones"""
+        entry = (self.elementCount, element, rect)
+        self.elementCount += 1
+
+        for cell in self.getCellsInRect(rect):
+            if cell in self.cells:
+                self.cells[cell].append(entry)
+            else:
+                self.cells[cell] = [entry]
+
+    def getCellsInRect(self, rect: Rect):
+        left = int(rect.topLeft.x // self.cellSize)
+        top = int(rect.topLeft.y // self.cellSize)
+        right = int((rect.topLeft.x + rect.size.x - 1) // self.cellSize)
+        bottom = int((rect.topLeft.y + rect.size.y - 1) // self.cellSize)
+        return [(x, y) for x in range(left, right + 1) for y in range(top, bottom + 1)]
+
+    def getTopmostAt(self, x: float, y: float):
+        """return the element on top at the point (x, y), or None if there are no elements there"""
+        cell = (int(x // self.cellSize), int(y // self.cellSize))
+        if cell not in self.cells:
+            return None
+
+        topmost = None
+        topmostOrder = -1
+        for order, element, rect in self.cells[cell]:
+            if order > topmostOrder and rect.isPointValuesInside(x, y):
+                topmost = element
+                topmostOrder = order
+        return topmost
@@ -3,12 +3,23 @@ from pygame_rendering.images import Image
 from general_utils.vec2 import Vec2
 
 class GUIImage(GUIElement):
-    """A GUI element for displaying images"""
-    def __init__(self, filePath: str, relativePos: Vec2 = Vec2(), visible: bool = True, rotation: float = 0.0, size: Vec2 = None):
-        self.image = Image(filePath, rotation)
+    """A GUI element for displaying images
+
+    if prewarmRotations is True (and rotationStep is set), every rotation of the image is cached when it is loaded
+    (see the Image class for how rotationStep works)
+    """
+    def __init__(self, filePath: str, relativePos: Vec2 = Vec2(), visible: bool = True, rotation: float = 0.0, size: Vec2 = None,
+                 rotationStep: float = None, prewarmRotations: bool = False):
+        self.image = Image(filePath, rotation, rotationStep=rotationStep)
+        self.prewarmRotations = prewarmRotations
         super().__init__(Vec2(), relativePos, visible)
         self.setSize(size)
 
+    def load(self):
+        super().load()
+        if self.prewarmRotations:
+            self.image.prewarmRotationCache()
+
     def draw(self):
         self.image.blitAt(self.getAbsolutePosition())
 
@@ -20,12 +31,18 @@ class GUIImage(GUIElement):
 
     def scaleTo(self, size: Vec2):
         self.image.scaleTo(size)
+        self.invalidateAbsolutePosition()
+        self.markChanged()
 
     def scaleBy(self, scale: Vec2):
         self.image.scaleBy(scale)
+        self.invalidateAbsolutePosition()
+        self.markChanged()
 
     def rotateBy(self, rotation: float):
         self.image.rotateBy(rotation)
+        self.markChanged()
 
     def rotateTo(self, rotation: float):
         self.image.rotateTo(rotation)
+        self.markChanged()
@@ -1,38 +1,86 @@
 import pygame
-from events.event_handler import PygameEventListener, broadcastPygameEvents
-from pygame_rendering import window
+import sys
+from events.event_handler import PygameEventListener, broadcastPygameEvents, blockUnusedEvents
+from events.input_state import processPygameEvents, INPUT_EVENT_TYPES
+from pygame_rendering import window, atlas
+from general_utils import game_clock
 from guis.base_guis import RootContainer
 from guis.image_guis import GUIImage
 from pygame_rendering.images import Image
-from scenes.scenes import stopGame, switchCurrentScene, getCurrentScene
+from typing import Type
+from scenes.scenes import Scene, stopGame, switchCurrentScene, getCurrentScene, updatePendingSceneSwitch
 from scenes.gui_scenes import MainMenuScene
+from scenes.world_scenes import TrackScene, ReplayScene
+from profiling import frame_profiler
+
+# command line flags for turning on the frame profiler (see profiling.frame_profiler)
+PROFILE_FLAG = "--profile"
+PROFILE_TRACE_FLAG = "--profile-trace"
+PROFILE_TRACE_FILE = "profile_trace.json"
+# command line flag for waiting for the monitor's refresh instead of using game_clock's frame limiter
+VSYNC_FLAG = "--vsync"
+# command line flag for only updating the areas of the display that were drawn to (see window.setDirtyRectMode)
+DIRTY_RECTS_FLAG = "--dirty-rects"
+# command line flags for starting on the track (driving) or playing back the last replay recorded on it, instead of the main menu
+TRACK_FLAG = "--track"
+REPLAY_FLAG = "--replay"
 
 rootGUI: RootContainer = None
 image: GUIImage = None
 testImage: Image = None
 
 def main():
-    start()
+    firstSceneType = MainMenuScene
+    if TRACK_FLAG in sys.argv:
+        firstSceneType = TrackScene
+    elif REPLAY_FLAG in sys.argv:
+        firstSceneType = ReplayScene
+    start(vsync=VSYNC_FLAG in sys.argv, firstSceneType=firstSceneType)
+    if DIRTY_RECTS_FLAG in sys.argv:
+        window.setDirtyRectMode(True)
+    if PROFILE_FLAG in sys.argv or PROFILE_TRACE_FLAG in sys.argv:
+        frame_profiler.enableProfiling(overlay=PROFILE_FLAG in sys.argv, trace=PROFILE_TRACE_FLAG in sys.argv)
     while window.isOpen:
         mainLoop()
+    if frame_profiler.traceEvents is not None:
+        frame_profiler.dumpChromeTrace(PROFILE_TRACE_FILE)
     pygame.quit()
 
-def start():
-    window.createWindow()
+def start(vsync: bool = False, firstSceneType: Type[Scene] = MainMenuScene):
+    window.createWindow(vsync)
+    atlas.registerAtlases(atlas.buildAtlasesFromDirectory("sprites"))
 
     quitEvent = PygameEventListener(pygame.QUIT, stopGame)
     quitEvent.add()
 
-    switchCurrentScene(MainMenuScene())
+    # noinspection PyArgumentList
+    switchCurrentScene(firstSceneType())
+
+    blockUnusedEvents(INPUT_EVENT_TYPES)
+
+    game_clock.reset()
 
 def mainLoop():
 
-    getCurrentScene().onFrame()
+    updatePendingSceneSwitch()
 
-    broadcastPygameEvents(pygame.event.get())
+    # events are handled before the ticks, so that the ticks see this frame's input instead of the last one's
+    broadcastPygameEvents(processPygameEvents(pygame.event.get()))
+    # an event (like pressing quit) can stop the game, leaving no scene to tick or draw
+    if not window.isOpen:
+        return
+
+    for _ in range(game_clock.advance()):
+        getCurrentScene().onTick(game_clock.getTickDelta())
+
+    getCurrentScene().onFrame()
 
     window.refreshWindow()
 
+    # with vsync, refreshing the window already waits for the monitor, so the frame limiter would only add more waiting
+    if not window.isVsyncEnabled:
+        game_clock.limitFrameRate()
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,189 @@
+"""opt-in instrumentation for finding out what makes a frame slow
+
+when enabled, every draw method of every GUIElement class, every PygameEventListener's function, every Scene's onFrame
+and onTick, and window.refreshWindow are timed. the times are added up for each frame and kept for the last ROLLING_FRAMES frames
+so that percentiles can be calculated, and can be shown in an overlay on the screen or saved as a Chrome trace file
+(which can be opened in chrome://tracing or https://ui.perfetto.dev)
+
+the instrumentation works by replacing the methods with timed versions in enableProfiling and putting the originals back
+in disableProfiling, so while it is disabled it costs nothing at all
+note: only classes that exist when enableProfiling is called are instrumented
+note: times are inclusive, so a container's draw time includes the draw times of its children
+"""
+from __future__ import annotations
+import json
+import time
+from collections import deque
+import pygame
+from events.event_handler import PygameEventListener
+from general_utils.vec2 import Vec2
+from guis.base_guis import GUIElement
+from pygame_rendering import window
+from scenes.scenes import Scene
+
+# the number of frames that percentiles are calculated over
+ROLLING_FRAMES = 120
+# the maximum number of trace events kept (the oldest are dropped first)
+MAX_TRACE_EVENTS = 500000
+# how many frames go by before the overlay's text is updated (rendering text is not free)
+OVERLAY_UPDATE_FRAMES = 30
+OVERLAY_LINES = 12
+
+FRAME_LABEL = "frame"
+
+isEnabled = False
+isOverlayEnabled = False
+
+# (owner, attribute name, original value) of everything that has been replaced with a timed version
+originals: list[tuple[object, str, object]] = []
+
+# the total time (in seconds) spent in each label so far this frame
+frameTotals: dict[str, float] = dict()
+# the totals of each label for the last ROLLING_FRAMES frames
+history: dict[str, deque[float]] = dict()
+lastFrameEnd = 0.0
+traceEvents: deque[dict] | type(None) = None
+overlaySurfaces: list[pygame.Surface] = []
+profiledFrames = 0
+
+def record(label: str, start: float, end: float):
+    """add a timed call to the totals of this frame (and to the trace if tracing)"""
+    frameTotals[label] = frameTotals.get(label, 0.0) + end - start
+    if traceEvents is not None:
+        traceEvents.append({"name": label, "ph": "X", "ts": start * 1e6, "dur": (end - start) * 1e6, "pid": 0, "tid": 0})
+
+def timed(label: str, function: callable):
+    """return a version of 'function' that records how long each call of it takes under 'label'"""
+    def timedFunction(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record(label, start, time.perf_counter())
+    return timedFunction
+
+def timedExecuteFunction(executeFunction: callable):
+    """return a version of PygameEventListener.executeFunction that is timed under the name of the listener's function"""
+    def timedFunction(listener: PygameEventListener, event: pygame.event.EventType):
+        start = time.perf_counter()
+        try:
+            return executeFunction(listener, event)
+        finally:
+            record("listener " + getattr(listener.onEvent, "__qualname__", repr(listener.onEvent)), start, time.perf_counter())
+    return timedFunction
+
+def timedRefreshWindow(refreshWindow: callable):
+    """return a version of window.refreshWindow that is timed, draws the overlay and ends the profiler's frame"""
+    def timedFunction():
+        if isOverlayEnabled:
+            drawOverlay()
+        start = time.perf_counter()
+        try:
+            return refreshWindow()
+        finally:
+            record("window.refreshWindow", start, time.perf_counter())
+            endFrame()
+    return timedFunction
+
+def replace(owner: object, name: str, replacement: callable):
+    originals.append((owner, name, owner.__dict__[name] if isinstance(owner, type) else getattr(owner, name)))
+    setattr(owner, name, replacement)
+
+def getAllSubclasses(cls: type):
+    """return 'cls' and all of the classes that inherit from it (directly or not)"""
+    classes = [cls]
+    for subclass in cls.__subclasses__():
+        classes.extend(getAllSubclasses(subclass))
+    return classes
+
+def enableProfiling(overlay: bool = False, trace: bool = False):
+    """start timing everything (see the module docstring)
+
+    :param overlay: whether to draw the slowest things on top of the screen every frame
+    :param trace: whether to keep every timed call so they can be saved with dumpChromeTrace
+    :return: None
+    """
+    global isEnabled, isOverlayEnabled, traceEvents, lastFrameEnd
+    isOverlayEnabled = overlay
+    traceEvents = deque(maxlen=MAX_TRACE_EVENTS) if trace else None
+    if isEnabled:
+        return
+    isEnabled = True
+
+    for cls in dict.fromkeys(getAllSubclasses(GUIElement)):
+        if "draw" in cls.__dict__:
+            replace(cls, "draw", timed(cls.__name__ + ".draw", cls.__dict__["draw"]))
+
+    for cls in dict.fromkeys(getAllSubclasses(Scene)):
+        for name in ("onFrame", "onTick"):
+            if name in cls.__dict__:
+                replace(cls, name, timed(cls.__name__ + "." + name, cls.__dict__[name]))
+
+    replace(PygameEventListener, "executeFunction", timedExecuteFunction(PygameEventListener.executeFunction))
+    replace(window, "refreshWindow", timedRefreshWindow(window.refreshWindow))
+
+    lastFrameEnd = time.perf_counter()
+
+def disableProfiling():
+    """put back all of the original methods (the collected timings are kept)"""
+    global isEnabled
+    for owner, name, original in reversed(originals):
+        setattr(owner, name, original)
+    originals.clear()
+    isEnabled = False
+
+def endFrame():
+    """add the totals of this frame to the rolling history (called by the timed window.refreshWindow)"""
+    global lastFrameEnd, profiledFrames
+    now = time.perf_counter()
+    frameTotals[FRAME_LABEL] = now - lastFrameEnd
+    lastFrameEnd = now
+
+    for label in frameTotals.keys() - history.keys():
+        history[label] = deque(maxlen=ROLLING_FRAMES)
+    for label, totals in history.items():
+        totals.append(frameTotals.get(label, 0.0))
+    frameTotals.clear()
+
+    profiledFrames += 1
+
+def getPercentile(samples: deque[float] | list[float], fraction: float):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def getStats():
+    """return a dict of label -> the mean, 50th, 95th and 99th percentiles and max of its time per frame (in milliseconds)"""
+    return {label: {
+        "meanMs": sum(totals) / len(totals) * 1000,
+        "p50Ms": getPercentile(totals, 0.5) * 1000,
+        "p95Ms": getPercentile(totals, 0.95) * 1000,
+        "p99Ms": getPercentile(totals, 0.99) * 1000,
+        "maxMs": max(totals) * 1000,
+    } for label, totals in history.items() if totals}
+
+def drawOverlay():
+    """draw the labels with the highest 95th percentile times to the top left of the screen"""
+    if profiledFrames % OVERLAY_UPDATE_FRAMES == 0 or not overlaySurfaces:
+        updateOverlay()
+
+    y = 0
+    for surface in overlaySurfaces:
+        window.blit(surface, Vec2(0, y))
+        y += surface.get_height()
+
+def updateOverlay():
+    if not pygame.font.get_init():
+        pygame.font.init()
+    font = pygame.font.Font(None, 20)
+
+    stats = sorted(getStats().items(), key=lambda item: item[1]["p95Ms"], reverse=True)[:OVERLAY_LINES]
+    overlaySurfaces.clear()
+    for label, stat in stats:
+        text = f"{label}: p50 {stat['p50Ms']:.2f} ms  p95 {stat['p95Ms']:.2f} ms  max {stat['maxMs']:.2f} ms"
+        overlaySurfaces.append(font.render(text, True, (255, 255, 255), (0, 0, 0)))
+
+def dumpChromeTrace(filePath: str):
+    """save every timed call since tracing was enabled to a Chrome trace format file"""
+    assert traceEvents is not None, "tracing was not enabled (see enableProfiling)"
+    with open(filePath, "w") as file:
+        json.dump({"traceEvents": list(traceEvents), "displayTimeUnit": "ms"}, file)
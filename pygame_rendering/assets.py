@@ -0,0 +1,189 @@
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+import pygame
+
+# the number of bytes that loaded assets can use before unreferenced ones start being evicted
+ASSET_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# loaded surfaces by file path, with the least recently used at the front
+assets: OrderedDict[str, pygame.Surface] = OrderedDict()
+assetBytes: dict[str, int] = dict()
+# how many things (usually Images) are currently using each asset, assets with references are never evicted
+referenceCounts: dict[str, int] = dict()
+
+# the number of threads used to decode images in the background (see preloadAssets)
+ASSET_LOADER_THREADS = 4
+assetLoader: ThreadPoolExecutor | type(None) = None
+# images currently being decoded in the background by file path
+pendingLoads: dict[str, Future] = dict()
+# images that failed to load in the background, they are loaded again (on the main thread) when they are next needed
+# so that the error is raised by whatever actually needs that image
+failedLoads: set[str] = set()
+
+totalBytes = 0
+hits = 0
+misses = 0
+evictions = 0
+
+def getSurfaceBytes(surface: pygame.Surface):
+    """return the (approximate) number of bytes used by the pixels of a surface"""
+    return surface.get_pitch() * surface.get_height()
+
+def convertSurface(surface: pygame.Surface):
+    """return a copy of 'surface' converted to the pixel format of the display so that blitting it is as fast as possible
+
+    surfaces with per pixel alpha keep it (convert_alpha), the rest are converted with convert
+    note: if there is no display yet the surface is returned unchanged, as there is nothing to convert it to
+    """
+    if pygame.display.get_surface() is None:
+        return surface
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
+
+def loadSurface(filePath: str):
+    """load an image file from the disk and convert it (does not use or add to the cache)"""
+    return convertSurface(pygame.image.load(filePath))
+
+def addAsset(filePath: str, surface: pygame.Surface):
+    """add an already loaded surface to the cache (replacing the old one if there is one)"""
+    global totalBytes
+    if filePath in assets:
+        totalBytes -= assetBytes[filePath]
+
+    assets[filePath] = surface
+    assets.move_to_end(filePath)
+    assetBytes[filePath] = getSurfaceBytes(surface)
+    totalBytes += assetBytes[filePath]
+
+    evictUnreferencedAssets()
+
+def getAsset(filePath: str):
+    """return the surface of an image file, loading it if it is not already loaded"""
+    global hits, misses
+    if filePath in assets:
+        hits += 1
+        assets.move_to_end(filePath)
+        return assets[filePath]
+
+    if filePath in pendingLoads:
+        # it is already being loaded in the background, so wait for that instead of loading it twice
+        wait([pendingLoads[filePath]])
+        finishPreloads()
+        if filePath in assets:
+            return assets[filePath]
+
+    # if it failed to load in the background, this tries again so the error is raised here
+    failedLoads.discard(filePath)
+
+    misses += 1
+    surface = loadSurface(filePath)
+    addAsset(filePath, surface)
+    return surface
+
+def isAssetLoaded(filePath: str):
+    return filePath in assets
+
+def acquireAsset(filePath: str):
+    """return the surface of an image file (see getAsset) and stop it from being evicted until releaseAsset is called"""
+    # referenced before it is loaded, so that loading it can't evict it straight away to make room
+    referenceCounts[filePath] = referenceCounts.get(filePath, 0) + 1
+    try:
+        return getAsset(filePath)
+    except BaseException:
+        # it failed to load (e.g. the file doesn't exist), so nothing is holding the reference that was just added
+        releaseAsset(filePath)
+        raise
+
+def releaseAsset(filePath: str):
+    """mark one use of an asset as finished, once nothing is using it it is allowed to be evicted"""
+    if filePath not in referenceCounts:
+        return
+    referenceCounts[filePath] -= 1
+    if referenceCounts[filePath] <= 0:
+        del referenceCounts[filePath]
+        evictUnreferencedAssets()
+
+def evictUnreferencedAssets(maxBytes: int = None):
+    """remove the least recently used unreferenced assets until the cache uses at most 'maxBytes'
+
+    if maxBytes is None it will be ASSET_CACHE_MAX_BYTES
+    assets that are still referenced are skipped, so the cache can go over the limit if they take up too much space
+    """
+    global totalBytes, evictions
+    if maxBytes is None:
+        maxBytes = ASSET_CACHE_MAX_BYTES
+    if totalBytes <= maxBytes:
+        return
+
+    for filePath in list(assets.keys()):
+        if totalBytes <= maxBytes:
+            break
+        if filePath in referenceCounts:
+            continue
+
+        del assets[filePath]
+        totalBytes -= assetBytes.pop(filePath)
+        evictions += 1
+
+def preloadAssets(filePaths: list[str] | tuple[str, ...]):
+    """start loading image files in the background so that they are already loaded when they are needed
+
+    the images are decoded on other threads (pygame releases the GIL while decoding) and are added to the cache
+    by finishPreloads (or areAssetsLoaded) on the main thread, as converting them to the display format has to be done there
+
+    all of the assets are referenced (so they will not be evicted) until releaseAssets is called with the same file paths
+    """
+    global assetLoader
+    if assetLoader is None:
+        assetLoader = ThreadPoolExecutor(ASSET_LOADER_THREADS, thread_name_prefix="asset_loader")
+
+    for filePath in filePaths:
+        referenceCounts[filePath] = referenceCounts.get(filePath, 0) + 1
+        if filePath not in assets and filePath not in pendingLoads:
+            failedLoads.discard(filePath)
+            pendingLoads[filePath] = assetLoader.submit(pygame.image.load, filePath)
+
+def finishPreloads():
+    """add any images that have finished loading in the background to the cache
+
+    images that failed to load are put in failedLoads instead of raising their error here (where it would have nothing
+    to do with whatever is being loaded), getAsset loads them again and raises the error when they are actually needed
+    """
+    global misses
+    for filePath, future in list(pendingLoads.items()):
+        if future.done():
+            del pendingLoads[filePath]
+            try:
+                surface = convertSurface(future.result())
+            except Exception:
+                failedLoads.add(filePath)
+                continue
+            misses += 1
+            addAsset(filePath, surface)
+
+def areAssetsLoaded(filePaths: list[str] | tuple[str, ...]):
+    """return whether all of the image files are loaded (finishing any background loads that are done first)
+
+    images that failed to load count as loaded, as they will be loaded again when they are needed (see finishPreloads)
+    """
+    finishPreloads()
+    return all(filePath in assets or filePath in failedLoads for filePath in filePaths)
+
+def releaseAssets(filePaths: list[str] | tuple[str, ...]):
+    for filePath in filePaths:
+        releaseAsset(filePath)
+
+def getAssetStats():
+    """return a dict of statistics about the asset cache"""
+    return {
+        "assets": len(assets),
+        "referencedAssets": len(referenceCounts),
+        "bytes": totalBytes,
+        "maxBytes": ASSET_CACHE_MAX_BYTES,
+        "hits": hits,
+        "misses": misses,
+        "evictions": evictions,
+        "pendingLoads": len(pendingLoads),
+    }
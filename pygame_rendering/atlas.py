@@ -0,0 +1,108 @@
+from __future__ import annotations
+import os
+import pygame
+from pygame_rendering import assets
+
+# the size of each atlas surface
+ATLAS_PAGE_SIZE = (2048, 2048)
+# empty pixels left around each image so that scaling or rotating a region never picks up pixels of its neighbours
+ATLAS_PADDING = 1
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tga")
+
+# the atlas and the area within it of every image that has been packed into a registered atlas, by file path
+atlasRegions: dict[str, tuple[TextureAtlas, pygame.Rect]] = dict()
+
+class TextureAtlas:
+    """A large surface with many smaller images packed into it
+
+    images are packed into rows (shelves): each image is put to the right of the previous one,
+    and a new row is started above the tallest image of the current row when it runs out of space
+    packing images from tallest to shortest (like buildAtlases does) keeps the wasted space small
+    """
+
+    def __init__(self, size: tuple[int, int] = ATLAS_PAGE_SIZE, padding: int = ATLAS_PADDING):
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.surface.fill((0, 0, 0, 0))
+        self.padding = padding
+        self.regions: dict[str, pygame.Rect] = dict()
+
+        self.shelfX = padding
+        self.shelfY = padding
+        self.shelfHeight = 0
+
+    def add(self, filePath: str, surface: pygame.Surface):
+        """pack 'surface' into the atlas and return the area it was put in, or None if there is no space for it"""
+        width, height = surface.get_size()
+        atlasWidth, atlasHeight = self.surface.get_size()
+
+        if self.shelfX + width + self.padding > atlasWidth:
+            # start a new shelf
+            self.shelfX = self.padding
+            self.shelfY += self.shelfHeight + self.padding
+            self.shelfHeight = 0
+
+        if self.shelfX + width + self.padding > atlasWidth or self.shelfY + height + self.padding > atlasHeight:
+            return None
+
+        region = pygame.Rect(self.shelfX, self.shelfY, width, height)
+        self.surface.blit(surface, region.topleft)
+        self.regions[filePath] = region
+
+        self.shelfX += width + self.padding
+        self.shelfHeight = max(self.shelfHeight, height)
+        return region
+
+    def getImage(self, filePath: str):
+        """return a subsurface of the area of the atlas that the image was packed into (it shares its pixels with the atlas)"""
+        return self.surface.subsurface(self.regions[filePath])
+
+    def convert(self):
+        """convert the atlas surface to the display format (see assets.convertSurface), should be done once it is full"""
+        self.surface = assets.convertSurface(self.surface)
+
+def buildAtlases(filePaths: list[str], pageSize: tuple[int, int] = ATLAS_PAGE_SIZE, padding: int = ATLAS_PADDING):
+    """pack the images at 'filePaths' into as few atlases as possible and return them
+
+    images too big to fit into an atlas are left out (they will just be loaded normally)
+    """
+    surfaces = {filePath: pygame.image.load(filePath) for filePath in filePaths}
+    atlases: list[TextureAtlas] = []
+
+    for filePath in sorted(surfaces, key=lambda path: surfaces[path].get_height(), reverse=True):
+        surface = surfaces[filePath]
+        if surface.get_width() + 2 * padding > pageSize[0] or surface.get_height() + 2 * padding > pageSize[1]:
+            continue
+
+        # only the newest atlas can have space left, as images are added from tallest to shortest
+        if not atlases or atlases[-1].add(filePath, surface) is None:
+            atlases.append(TextureAtlas(pageSize, padding))
+            atlases[-1].add(filePath, surface)
+
+    for atlas in atlases:
+        atlas.convert()
+    return atlases
+
+def buildAtlasesFromDirectory(directory: str, pageSize: tuple[int, int] = ATLAS_PAGE_SIZE, padding: int = ATLAS_PADDING):
+    """build atlases (see buildAtlases) from every image file in 'directory' (not including subdirectories)
+
+    the file paths are the same as they would be written when creating an Image, for example "sprites/play_button.png"
+    """
+    filePaths = [directory + "/" + fileName for fileName in sorted(os.listdir(directory)) if fileName.lower().endswith(IMAGE_EXTENSIONS)]
+    return buildAtlases(filePaths, pageSize, padding)
+
+def registerAtlases(atlases: list[TextureAtlas]):
+    """make any Images created from now on use the atlases for the images packed into them"""
+    for atlas in atlases:
+        for filePath, region in atlas.regions.items():
+            atlasRegions[filePath] = (atlas, region)
+
+def getAtlasImage(filePath: str):
+    """return the subsurface of a registered atlas for an image, or None if it is not in one"""
+    if filePath not in atlasRegions:
+        return None
+    return atlasRegions[filePath][0].getImage(filePath)
+
+def getFilesNotInAtlases(filePaths: list[str] | tuple[str, ...]):
+    """return the file paths that have not been packed into a registered atlas (and so need to be loaded separately)"""
+    return [filePath for filePath in filePaths if filePath not in atlasRegions]
@@ -1,79 +1,136 @@
+import math
 import pygame
+import weakref
+from collections import OrderedDict
 from general_utils.vec2 import Vec2
 from general_utils.rect import Rect
-from pygame_rendering import window
+from pygame_rendering import window, assets, atlas
+from pygame_rendering.assets import getSurfaceBytes
 
-images: dict[str, pygame.surface.Surface] = dict()
+# the maximum number of bytes of pre-rotated surfaces that can be kept in the rotationCache
+ROTATION_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# pre-rotated surfaces shared by every Image that has a rotationStep
+# keys are (filePath, size, angle) and the least recently used surfaces are at the front
+rotationCache: OrderedDict[tuple[str, tuple[float, float], float], pygame.surface.Surface] = OrderedDict()
+rotationCacheBytes = 0
+
+def getCachedRotation(filePath: str, scaledImage: pygame.surface.Surface, size: Vec2, angle: float):
+    """return 'scaledImage' rotated by 'angle' degrees, using the rotationCache if it has already been rotated
+
+    if it has not been rotated yet, it will be rotated and added to the cache,
+    evicting the least recently used surfaces if the cache goes over ROTATION_CACHE_MAX_BYTES
+    """
+    global rotationCacheBytes
+    key = (filePath, size.asTuple(), angle)
+
+    if key in rotationCache:
+        rotationCache.move_to_end(key)
+        return rotationCache[key]
+
+    rotated = pygame.transform.rotate(scaledImage, angle)
+    rotationCache[key] = rotated
+    rotationCacheBytes += getSurfaceBytes(rotated)
+
+    # always keep the surface that was just added, even if it is bigger than the whole budget
+    while rotationCacheBytes > ROTATION_CACHE_MAX_BYTES and len(rotationCache) > 1:
+        _, evicted = rotationCache.popitem(last=False)
+        rotationCacheBytes -= getSurfaceBytes(evicted)
+
+    return rotated
+
+def getRotatedSize(size: tuple[float, float], angle: float):
+    """return roughly how many pixels a surface of 'size' has after being rotated by 'angle' degrees
+    (the area of the box around the rotated surface)"""
+    cos = abs(math.cos(math.radians(angle)))
+    sin = abs(math.sin(math.radians(angle)))
+    return math.ceil(size[0] * cos + size[1] * sin) * math.ceil(size[0] * sin + size[1] * cos)
+
+def clearRotationCache():
+    global rotationCacheBytes
+    rotationCache.clear()
+    rotationCacheBytes = 0
 
 class Image:
     """A diverse image class that allows for rotating, scaling, and the displaying of images to the screen
 
     designed so that it can be versatile enough to be used in both GUIs and the rendering of the game world (in the future)
-    """
-    def __init__(self, filePath: str, rotation: float = 0.0, size: Vec2 = None):
-        if filePath not in images.keys():
-            images[filePath] = pygame.image.load(filePath)
 
-        self.originalImage = images[filePath]
-        self.scaledImage = images[filePath]
-        self.image = images[filePath]
+    if rotationStep is given, rotations are rounded to the nearest multiple of rotationStep degrees and the rotated
+    surfaces are shared with every other Image of the same file and size through the rotationCache,
+    so that images that rotate every frame only need to be rotated once per angle
+    (rotationStep should divide 360 evenly)
+
+    the image file is loaded through the assets module, and is kept loaded for as long as the Image exists
+    (unless it has been packed into a registered atlas, in which case the area of the atlas is used instead)
+    """
+    def __init__(self, filePath: str, rotation: float = 0.0, size: Vec2 = None, rotationStep: float = None):
+        self.filePath = filePath
+        self.rotationStep = rotationStep
+
+        self.originalImage = atlas.getAtlasImage(filePath)
+        if self.originalImage is None:
+            self.originalImage = assets.acquireAsset(filePath)
+            # lets the asset be evicted once this Image is garbage collected
+            weakref.finalize(self, assets.releaseAsset, filePath)
+        self.scaledImage = self.originalImage
+        self.image = self.originalImage
 
         self.__size = size
         self.__rotation = rotation
 
         if size is not None:
-            self.image = pygame.transform.scale(self.image, size.asTuple())
+            self.scaledImage = pygame.transform.scale(self.originalImage, size.asTuple())
+            self.image = self.scaledImage
         else:
             rect = self.image.get_rect()
             self.__size = Vec2(rect.width, rect.height)
 
         if rotation != 0.0:
-            self.image = pygame.transform.rotate(self.image, rotation)
+            self.image = self.getRotatedImage(self.image, rotation)
 
     def blitAt(self, pos: Vec2, cull: bool = True, cullRect: Rect = None):
         """blit (draw) this image to the screen
 
         if cull is true then it will cull (not draw) the image if it is entirely outside the cullRect
-        if cullRect is left as None, it will become a Rect representing the size of the screen (Rect(Vec2(0.0, 0.0), window.getScreenSize()))
+        if cullRect is left as None, it will become a Rect representing the area being drawn to (usually the whole screen, see window.getRenderRect)
 
         :param pos: where to draw the image (top left corner)
         :param cull: whether to cull this image or not
         :param cullRect: the rectangle to cull the image in (if cull is True)
         :return: None
         """
+        rect = self.getRect(pos)
+
         if cull:
 
             if cullRect is None:
-                cullRect = Rect(Vec2(0.0, 0.0), window.getScreenSize())
+                cullRect = window.getRenderRect()
 
-            if cullRect.isRectColliding(self.getRect(pos)):
-                window.display.blit(self.image, self.getRect(pos).toPygameRect())
+            if cullRect.isRectColliding(rect):
+                window.blit(self.image, rect.topLeft)
 
         else:
 
-            window.display.blit(self.image, self.getRect(pos).toPygameRect())
+            window.blit(self.image, rect.topLeft)
 
     def blitAtCropped(self, pos: Vec2, boundingBox: Rect):
         """blit (draw) a cropped version of this image to the screen
 
         draws the image so that any pixels outside the boundingBox are not displayed and all that are inside the boundingBox are displayed
+        the visible part is drawn with the area argument of blit (see window.blitClipped), so no cropped surface is created
 
         :param pos: where to draw the image (top left corner)
         :param boundingBox: the rectangle to crop the image in
         :return: None
         """
-        if boundingBox.isRectInside(self.getRect(pos)):
+        rect = self.getRect(pos)
+        if boundingBox.isRectInside(rect):
             # if it's completely inside the bounding box just draw it
-            window.display.blit(self.image, self.getRect(pos).toPygameRect())
-
-        elif boundingBox.isRectColliding(self.getRect(pos)):
-
-            # get a new rect from the parts of this image and the bounding box that overlap
-            rect = Rect.fromCornersValues(max(pos.x, boundingBox.getX()), max(pos.y, boundingBox.getY()),
-                                          min(pos.x + self.getSize().x, boundingBox.getX() + boundingBox.getWidth()) - 1.0,
-                                          min(pos.y + self.getSize().y, boundingBox.getY() + boundingBox.getHeight()) - 1.0).toPygameRect()
+            window.blit(self.image, rect.topLeft)
 
-            window.display.blit(self.image.subsurface(rect), rect)
+        elif boundingBox.isRectColliding(rect):
+            window.blitClipped(self.image, rect.topLeft, boundingBox.toPygameRect())
         # if it's not even colliding with the bounding box don't do anything
 
     def scaleTo(self, size: Vec2):
@@ -81,7 +138,8 @@ class Image:
         self.updateImageTransformation()
 
     def scaleBy(self, scale: Vec2):
-        self.__size *= scale
+        # not *= because __size could be a Vec2 that was passed in and is shared with something else
+        self.__size = self.__size * scale
         self.updateImageTransformation()
 
     def rotateBy(self, rotation: float):
@@ -97,7 +155,41 @@ class Image:
 
         note: this usually isn't necessary as any rotation function already calls this method
         """
-        self.image = pygame.transform.rotate(self.scaledImage, self.__rotation)
+        self.image = self.getRotatedImage(self.scaledImage, self.__rotation)
+
+    def getRotatedImage(self, scaledImage: pygame.surface.Surface, rotation: float):
+        """return scaledImage rotated by 'rotation' degrees, going through the rotationCache if rotationStep is set"""
+        if self.rotationStep is None:
+            return pygame.transform.rotate(scaledImage, rotation)
+        return getCachedRotation(self.filePath, scaledImage, self.__size, self.quantizeRotation(rotation))
+
+    def quantizeRotation(self, rotation: float):
+        """return 'rotation' rounded to the nearest multiple of rotationStep (between 0 and 360)"""
+        bucketCount = round(360 / self.rotationStep)
+        return (round(rotation / self.rotationStep) % bucketCount) * self.rotationStep
+
+    def prewarmRotationCache(self):
+        """rotate this image to every multiple of rotationStep ahead of time and add them to the rotationCache
+
+        this is meant to be called when a scene is loaded so that no rotating needs to be done while it is running
+        returns whether it prewarmed the cache, it does nothing if rotationStep is None or if the rotations that aren't
+        cached yet wouldn't fit in the cache along with what is already in it (they would just evict each other)
+        """
+        if self.rotationStep is None:
+            return False
+
+        sizeTuple = self.__size.asTuple()
+        angles = [bucket * self.rotationStep for bucket in range(round(360 / self.rotationStep))]
+        missingAngles = [angle for angle in angles if (self.filePath, sizeTuple, angle) not in rotationCache]
+        bytesPerPixel = self.originalImage.get_bytesize()
+        missingBytes = sum(getRotatedSize(sizeTuple, angle) * bytesPerPixel for angle in missingAngles)
+        if rotationCacheBytes + missingBytes > ROTATION_CACHE_MAX_BYTES:
+            return False
+
+        scaledImage = pygame.transform.scale(self.originalImage, sizeTuple)
+        for angle in missingAngles:
+            getCachedRotation(self.filePath, scaledImage, self.__size, angle)
+        return True
 
     def updateImageTransformation(self):
         """updates the image scale and rotation
@@ -109,9 +201,8 @@ class Image:
 
     def getRect(self, offset: Vec2 = Vec2()):
         """return a Rect that the image fits into"""
-        rect = self.image.get_rect()
-        rect.center = (offset + self.__size / 2.0).asTuple()
-        return Rect.fromPygameRect(rect)
+        width, height = self.image.get_size()
+        return Rect(Vec2(offset.x + (self.__size.x - width) / 2.0, offset.y + (self.__size.y - height) / 2.0), Vec2(width, height))
 
     def getSize(self):
         return self.__size
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from general_utils.vec2 import Vec2
+from general_utils.rect import Rect
 import pygame
 import time
 
@@ -16,16 +17,47 @@ previousLastFrameTime = 0
 lastFrameTime = 0
 
 isOpen: bool = False
+# whether vsync was requested when the window was created (see createWindow)
+isVsyncEnabled: bool = False
 
-def createWindow():
-    """create a window and initialize pygame"""
-    global display, previousLastFrameTime, lastFrameTime, isOpen
+# when True, only the parts of the screen that were drawn to are cleared and updated each frame (see refreshWindow)
+useDirtyRects: bool = False
+# if the dirty rects cover more than this fraction of the screen, the whole screen is updated instead
+DIRTY_RECT_FULL_UPDATE_THRESHOLD = 0.5
+
+# areas of the display drawn to this frame and last frame (only recorded if useDirtyRects is True)
+dirtyRects: list[pygame.Rect] = []
+previousDirtyRects: list[pygame.Rect] = []
+
+# when True, blits to the display are queued and then all drawn with a single Surface.blits call (see flushRenderQueue)
+useRenderQueue: bool = True
+renderQueue: list[tuple[pygame.Surface, tuple[float, float], pygame.Rect | type(None)]] = []
+
+# stack of (surface, origin) pairs that drawing is redirected to instead of the display, the last one being the current one
+# the origin is where the top left of the surface is on the screen, so that things can still be drawn in screen coordinates
+renderTargets: list[tuple[pygame.Surface, Vec2]] = []
+
+# stack of areas (in screen coordinates) that drawing is clipped to, the last one being the current one (see pushClipRect)
+# pushing a render target pushes None, as clipping from outside of a render target should not apply to what is drawn to it
+clipRects: list[pygame.Rect | type(None)] = []
+
+def createWindow(vsync: bool = False):
+    """create a window and initialize pygame
+
+    if vsync is True, the display will wait for the monitor's refresh before updating (this is only a request, it may not be supported)
+    """
+    global display, previousLastFrameTime, lastFrameTime, isOpen, isVsyncEnabled
     if display is None:
         pygame.init()
-        display = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        isVsyncEnabled = vsync
+        if vsync:
+            # pygame only supports vsync with the SCALED or OPENGL flags
+            display = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SCALED, vsync=1)
+        else:
+            display = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 
-        previousLastFrameTime = time.time()
-        lastFrameTime = time.time()
+        previousLastFrameTime = time.perf_counter()
+        lastFrameTime = time.perf_counter()
 
         isOpen = True
 
@@ -35,13 +67,174 @@ def refreshWindow():
     more precisely, it updates the Pygame display (draws any images that were blitted to the screen) and
     then sets the screen to the background color so that any new images are ready to be drawn on top
 
+    if useDirtyRects is True, only the areas that were drawn to this frame or last frame are updated
+    (last frame's areas need updating because they were cleared), and only this frame's areas are cleared
+
     should be called exactly once every frame so that all images are displayed as intended"""
-    global frameCount, previousLastFrameTime, lastFrameTime
-    pygame.display.update()
-    display.fill(BACKGROUND_COLOR)
+    global frameCount, previousLastFrameTime, lastFrameTime, dirtyRects, previousDirtyRects
+    flushRenderQueue()
+    if useDirtyRects:
+        updateRects = mergeRects(previousDirtyRects + dirtyRects)
+        if sum(rect.width * rect.height for rect in updateRects) > SCREEN_WIDTH * SCREEN_HEIGHT * DIRTY_RECT_FULL_UPDATE_THRESHOLD:
+            pygame.display.update()
+        else:
+            pygame.display.update(updateRects)
+
+        for rect in dirtyRects:
+            display.fill(BACKGROUND_COLOR, rect)
+        previousDirtyRects = dirtyRects
+        dirtyRects = []
+    else:
+        pygame.display.update()
+        display.fill(BACKGROUND_COLOR)
     frameCount += 1
     previousLastFrameTime = lastFrameTime
-    lastFrameTime = time.time()
+    lastFrameTime = time.perf_counter()
+
+def setDirtyRectMode(enabled: bool):
+    """turn dirty rect rendering on or off (see refreshWindow)"""
+    global useDirtyRects, dirtyRects, previousDirtyRects
+    useDirtyRects = enabled
+    dirtyRects = []
+    # anything drawn before switching wasn't recorded, so the whole screen has to be cleared once
+    previousDirtyRects = [display.get_rect()] if display is not None else []
+    if display is not None:
+        display.fill(BACKGROUND_COLOR)
+
+def mergeRects(rects: list[pygame.Rect]):
+    """return a list of rects where any overlapping rects in 'rects' have been combined into the rect that contains both"""
+    merged: list[pygame.Rect] = []
+    for rect in rects:
+        if rect.width <= 0 or rect.height <= 0:
+            continue
+        rect = rect.copy()
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+def pushRenderTarget(surface: pygame.Surface, origin: Vec2):
+    """redirect all drawing to 'surface' until popRenderTarget is called
+
+    :param surface: the surface to draw to
+    :param origin: the position on the screen that the top left of the surface represents
+    :return: None
+    """
+    renderTargets.append((surface, origin))
+    clipRects.append(None)
+
+def popRenderTarget():
+    """stop redirecting drawing to the most recently pushed render target"""
+    renderTargets.pop()
+    clipRects.pop()
+
+def pushClipRect(rect: Rect):
+    """stop anything from being drawn outside of 'rect' (in screen coordinates) until popClipRect is called
+
+    if there already is a clip rect, only the area inside both of them can be drawn to
+    parts of surfaces outside the clip rect are left out with the area argument of blit, so no cropped copies are made
+    """
+    clipRect = rect.toPygameRect()
+    if clipRects and clipRects[-1] is not None:
+        clipRect = clipRect.clip(clipRects[-1])
+    clipRects.append(clipRect)
+
+def popClipRect():
+    """stop clipping drawing to the most recently pushed clip rect"""
+    clipRects.pop()
+
+def getClipRect():
+    """return the pygame Rect that drawing is currently clipped to, or None if it isn't clipped"""
+    if clipRects:
+        return clipRects[-1]
+    return None
+
+def getRenderTarget():
+    """return the surface that is currently being drawn to"""
+    if renderTargets:
+        return renderTargets[-1][0]
+    return display
+
+def getRenderRect():
+    """return a Rect of the area (in screen coordinates) that the current render target covers
+
+    if drawing is being clipped (see pushClipRect), only the clipped area is returned
+    """
+    clipRect = getClipRect()
+    if clipRect is not None:
+        return Rect.fromPygameRect(clipRect)
+    if renderTargets:
+        surface, origin = renderTargets[-1]
+        return Rect(origin, Vec2.fromTuple(surface.get_size()))
+    return Rect(Vec2(0.0, 0.0), getScreenSize())
+
+def blit(surface: pygame.Surface, pos: Vec2, area: pygame.Rect = None):
+    """blit (draw) a surface to the current render target
+
+    :param surface: the surface to draw
+    :param pos: where to draw the surface (top left corner) in screen coordinates
+    :param area: the part of the surface to draw (the whole surface if None)
+    :return: None
+    """
+    x = pos.x
+    y = pos.y
+    clipRect = getClipRect()
+    if clipRect is not None:
+        clipped = getClippedBlit(surface, x, y, area, clipRect)
+        if clipped is None:
+            return
+        x, y, area = clipped
+
+    if renderTargets:
+        target, origin = renderTargets[-1]
+        target.blit(surface, (x - origin.x, y - origin.y), area)
+    elif useRenderQueue:
+        renderQueue.append((surface, (x, y), area))
+    else:
+        rect = display.blit(surface, (x, y), area)
+        if useDirtyRects:
+            dirtyRects.append(rect)
+
+def blitClipped(surface: pygame.Surface, pos: Vec2, clipRect: pygame.Rect):
+    """blit (draw) only the part of a surface that is inside 'clipRect' (in screen coordinates)
+
+    the part is drawn with the area argument of blit, so this does not create a subsurface or any other surface
+    """
+    clipped = getClippedBlit(surface, pos.x, pos.y, None, clipRect)
+    if clipped is not None:
+        blit(surface, Vec2(clipped[0], clipped[1]), clipped[2])
+
+def getClippedBlit(surface: pygame.Surface, x: float, y: float, area: pygame.Rect | type(None), clipRect: pygame.Rect):
+    """return the (x, y, area) to blit with so that only the part of the surface inside 'clipRect' is drawn,
+    or None if none of it is inside"""
+    x = int(x)
+    y = int(y)
+    if area is None:
+        areaX = 0
+        areaY = 0
+        width, height = surface.get_size()
+    else:
+        areaX, areaY, width, height = area
+
+    clipped = clipRect.clip((x, y, width, height))
+    if clipped.width <= 0 or clipped.height <= 0:
+        return None
+    return clipped.x, clipped.y, pygame.Rect(areaX + clipped.x - x, areaY + clipped.y - y, clipped.width, clipped.height)
+
+def flushRenderQueue():
+    """draw everything in the render queue to the display with one Surface.blits call
+
+    note: this usually isn't necessary as refreshWindow calls it, but it should be called before reading from the display
+    """
+    if not renderQueue:
+        return
+    if useDirtyRects:
+        dirtyRects.extend(display.blits(renderQueue, doreturn=True))
+    else:
+        display.blits(renderQueue, doreturn=False)
+    renderQueue.clear()
 
 def closeWindow():
     global isOpen
@@ -1,31 +1,63 @@
-from scenes.scenes import Scene, switchCurrentSceneByType
+import pygame
+from scenes.scenes import Scene, switchCurrentSceneByType, pushSceneByType, popScene, stopGame
+from events.event_handler import PygameEventListener
 from guis.interactable_guis import ImageButton
 from general_utils.vec2 import Vec2
 from guis.base_guis import RootContainer
 from guis.image_guis import GUIImage
-from guis.container_guis import AlignmentContainer
+from guis.container_guis import AlignmentContainer, CachedGUIContainer
 from pygame_rendering import window
 
 class MainMenuScene(Scene):
     """Main menu scene
 
     currently this is just a placeholder"""
+    assetManifest = ("sprites/play_button.png",)
+
+    def __init__(self):
+        super().__init__(RootContainer(children=[
+            CachedGUIContainer(children=[
+                AlignmentContainer(children=[
+                    ImageButton("sprites/play_button.png", size=Vec2(512, 256), onUp=switchCurrentSceneByType, onUpArgs=(TestScene, True)),
+                ], childrenAlignments=[
+                    "CENTER"
+                ])
+            ])
+        ]))
+
+class PauseMenuScene(Scene):
+    """Pause menu that is pushed on top of another scene
+
+    drawn over a frozen picture of the paused scene, which is resumed when the play button is pressed"""
+    isOverlay = True
+    assetManifest = ("sprites/play_button.png", "sprites/quit_button.png")
 
     def __init__(self):
         super().__init__(RootContainer(children=[
             AlignmentContainer(children=[
-                ImageButton("sprites/play_button.png", size=Vec2(512, 256), onUp=switchCurrentSceneByType, onUpArgs=(TestScene,)),
+                AlignmentContainer(size=Vec2(512, 576), children=[
+                    ImageButton("sprites/play_button.png", size=Vec2(512, 256), onUp=popScene),
+                    ImageButton("sprites/quit_button.png", size=Vec2(512, 256), onUp=stopGame),
+                ], childrenAlignments=[
+                    "TOP",
+                    "BOTTOM"
+                ])
             ], childrenAlignments=[
                 "CENTER"
             ])
         ]))
 
 class TestScene(Scene):
-    """Test scene to demonstrate how scenes can be switched to and from"""
+    """Test scene to demonstrate how scenes can be switched to and from
+
+    pressing escape pauses it by pushing a PauseMenuScene on top of it"""
+    assetManifest = ("sprites/SpriteTest.png",)
 
     def __init__(self):
-        self.testImage1 = GUIImage("sprites/SpriteTest.png", size=Vec2(640, 640))
-        self.testImage2 = GUIImage("sprites/SpriteTest.png", size=Vec2(320, 320))
+        # big images take a lot of memory per rotation, so they use a coarse rotationStep that all the rotations of both
+        # images fit in the rotation cache with (about 185MB and 45MB), and only the smaller one is prewarmed so loading stays quick
+        self.testImage1 = GUIImage("sprites/SpriteTest.png", size=Vec2(640, 640), rotationStep=5.0)
+        self.testImage2 = GUIImage("sprites/SpriteTest.png", size=Vec2(320, 320), rotationStep=5.0, prewarmRotations=True)
 
         super().__init__(RootContainer(children=[
             AlignmentContainer(children=[
@@ -36,6 +68,8 @@ class TestScene(Scene):
                 "R"
             ])
         ]))
+        self.eventListeners.append(PygameEventListener(pygame.KEYDOWN, pushSceneByType, False, PauseMenuScene,
+                                                       filterAttribute="key", filterValue=pygame.K_ESCAPE))
 
     def onFrame(self):
         super().onFrame()
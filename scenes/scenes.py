@@ -2,9 +2,16 @@ from __future__ import annotations
 from typing import Type
 from guis.base_guis import RootContainer, GUIElement
 from inspect import signature
-from pygame_rendering import window
+from pygame_rendering import window, assets, atlas
+from general_utils.vec2 import Vec2
+from events.event_handler import PygameEventListener
+import pygame
 
-currentScene: Scene = None
+# every scene that is currently running or suspended, the last one being the current scene (see pushScene)
+sceneStack: list[Scene] = []
+
+# the scene type waiting for its assets to load before being switched to (see switchCurrentSceneWhenLoaded)
+pendingSceneType: Type[Scene] | type(None) = None
 
 class Scene:
     """Scene class for handling GUIs and the game world
@@ -13,38 +20,191 @@ class Scene:
     another will have no side effects and will retain nothing from the previous scene
 
     Scenes do not have to have a game world, and can instead be purely GUI scenes
-    such as the main menu or other menus"""
+    such as the main menu or other menus
+
+    'assetManifest' should list the file paths of every image the scene uses when it is created,
+    so that they can be loaded in the background before switching to it (see switchCurrentSceneWhenLoaded)
+
+    scenes can also be pushed on top of each other (see pushScene), which suspends the scene below so it can be resumed
+    instantly later. if 'isOverlay' is True, the scene below is drawn one last time when it is suspended and that
+    frozen picture is drawn behind this scene (for things like pause menus)
+
+    'eventListeners' are added when the scene is loaded or resumed, and removed when it is unloaded or suspended"""
     hasGameWorld = False
+    isOverlay = False
+    assetManifest: tuple[str, ...] = ()
 
     def __init__(self, guiRoot: RootContainer):
         self.guiRoot = guiRoot
+        self.isSuspended = False
+        self.eventListeners: list[PygameEventListener] = []
+        # the frozen picture of the scene below, if this is an overlay scene that has been pushed on top of one
+        self.backgroundSnapshot: pygame.Surface | type(None) = None
+
+    def onTick(self, tickDelta: float):
+        """called once per fixed length simulation tick (see general_utils.game_clock)
+
+        anything that needs to be deterministic (like physics) should be done here instead of in onFrame
+        :param tickDelta: the length of a tick in seconds (always the same)
+        """
+        pass
 
     def onFrame(self):
+        if self.backgroundSnapshot is not None:
+            window.blit(self.backgroundSnapshot, Vec2(0, 0))
+        self.draw()
+
+    def draw(self):
+        """draw everything in the scene (without updating anything)"""
         self.guiRoot.draw()
 
     def load(self):
         self.guiRoot.load()
+        for listener in self.eventListeners:
+            listener.add()
 
     def unload(self):
         self.guiRoot.unload()
+        for listener in self.eventListeners:
+            listener.remove()
+
+    def suspend(self):
+        """stop the scene while another scene is pushed on top of it, keeping everything in memory
+
+        only the event listeners of the scene and its GUIs are removed, nothing is unloaded,
+        so resuming is instant (unlike loading, which can do slow things like prewarming caches)
+        """
+        self.guiRoot.suspend()
+        for listener in self.eventListeners:
+            listener.remove()
+        self.isSuspended = True
+
+    def resume(self):
+        """start the scene again after the scene on top of it has been popped"""
+        self.isSuspended = False
+        self.guiRoot.resume()
+        for listener in self.eventListeners:
+            listener.add()
+
+    def takeSnapshot(self):
+        """return a surface of the whole screen with just this scene drawn on it"""
+        snapshot = pygame.Surface(window.getScreenSize().asTuple())
+        snapshot.fill(window.BACKGROUND_COLOR)
+        window.pushRenderTarget(snapshot, Vec2(0, 0))
+        if self.backgroundSnapshot is not None:
+            window.blit(self.backgroundSnapshot, Vec2(0, 0))
+        self.draw()
+        window.popRenderTarget()
+        return snapshot
+
+def pushScene(scene: Scene):
+    """suspend the current scene (if there is one) and put 'scene' on top of it"""
+    if sceneStack:
+        below = sceneStack[-1]
+        if scene.isOverlay:
+            scene.backgroundSnapshot = below.takeSnapshot()
+        below.suspend()
+    sceneStack.append(scene)
+    scene.load()
+
+def pushSceneByType(sceneType: Type[Scene]):
+    """push a new instance of 'sceneType' (see pushScene)"""
+    assertIsPremadeScene(sceneType)
+    # noinspection PyArgumentList
+    pushScene(sceneType())
+
+def popScene():
+    """unload and discard the current scene and resume the one below it"""
+    assert len(sceneStack) > 1, "Can't pop the last scene"
+    scene = sceneStack.pop()
+    scene.unload()
+    scene.backgroundSnapshot = None
+    sceneStack[-1].resume()
+    return scene
+
+def replaceScene(scene: Scene):
+    """unload and discard the current scene and put 'scene' in its place (the scenes below it are left alone)"""
+    if sceneStack:
+        old = sceneStack.pop()
+        old.unload()
+        if scene.isOverlay:
+            scene.backgroundSnapshot = old.backgroundSnapshot
+    sceneStack.append(scene)
+    scene.load()
+
+def unloadAllScenes():
+    """unload and discard every scene on the stack"""
+    # suspended scenes are still loaded (see Scene.suspend), so every scene on the stack is unloaded, from the top down
+    for scene in reversed(sceneStack):
+        scene.unload()
+        scene.backgroundSnapshot = None
+    sceneStack.clear()
 
 def switchCurrentScene(scene: Scene):
-    global currentScene
-    if currentScene is not None:
-        currentScene.unload()
-    currentScene = scene
-    currentScene.load()
+    """unload and discard every scene (including any suspended below the current one) and make 'scene' the only one
+
+    use replaceScene to replace just the current scene instead
+    """
+    unloadAllScenes()
+    sceneStack.append(scene)
+    scene.load()
 
-def switchCurrentSceneByType(sceneType: Type[Scene]):
+def assertIsPremadeScene(sceneType: Type[Scene]):
     assert len(signature(sceneType.__init__).parameters) == 0 or ("self" in signature(sceneType.__init__).parameters and len(signature(sceneType.__init__).parameters) == 1), \
         f"Scene '{sceneType}' should have no constructor parameters (should be a pre-made scene)"
-    # noinspection PyArgumentList
-    switchCurrentScene(sceneType())
+
+def switchCurrentSceneByType(sceneType: Type[Scene], loadInBackground: bool = False, loadingScene: Scene = None):
+    """switch to a new instance of 'sceneType'
+
+    if loadInBackground is True, the switch is done with switchCurrentSceneWhenLoaded instead of immediately
+    """
+    assertIsPremadeScene(sceneType)
+    if loadInBackground:
+        switchCurrentSceneWhenLoaded(sceneType, loadingScene)
+    else:
+        # noinspection PyArgumentList
+        switchCurrentScene(sceneType())
+
+def switchCurrentSceneWhenLoaded(sceneType: Type[Scene], loadingScene: Scene = None):
+    """start loading the assets in the manifest of 'sceneType' in the background and switch to it once they are all loaded
+
+    the current scene (or 'loadingScene' if it is given) keeps running until then
+    updatePendingSceneSwitch needs to be called every frame for the switch to happen
+    if this is called again before the switch happens, the newer scene type replaces the older one
+    """
+    global pendingSceneType
+    if pendingSceneType is not None:
+        assets.releaseAssets(atlas.getFilesNotInAtlases(pendingSceneType.assetManifest))
+
+    pendingSceneType = sceneType
+    assets.preloadAssets(atlas.getFilesNotInAtlases(sceneType.assetManifest))
+
+    if loadingScene is not None:
+        switchCurrentScene(loadingScene)
+
+def updatePendingSceneSwitch():
+    """switch to the scene given to switchCurrentSceneWhenLoaded if all of its assets have finished loading"""
+    global pendingSceneType
+    if pendingSceneType is None or not assets.areAssetsLoaded(atlas.getFilesNotInAtlases(pendingSceneType.assetManifest)):
+        return
+
+    sceneType = pendingSceneType
+    pendingSceneType = None
+    try:
+        # any assets that failed to load in the background are loaded again here, raising their error if they fail again
+        # noinspection PyArgumentList
+        switchCurrentScene(sceneType())
+    finally:
+        # the scene's images hold their own references to the assets now (or the switch failed and nothing needs them)
+        assets.releaseAssets(atlas.getFilesNotInAtlases(sceneType.assetManifest))
+
+def isSceneSwitchPending():
+    return pendingSceneType is not None
 
 def stopGame():
-    getCurrentScene().unload()
+    unloadAllScenes()
     window.closeWindow()
 
 def getCurrentScene():
-    assert currentScene is not None
-    return currentScene
+    assert sceneStack
+    return sceneStack[-1]
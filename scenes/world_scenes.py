@@ -0,0 +1,123 @@
+import os
+import pygame
+from scenes.scenes import Scene
+from events.event_handler import PygameEventListener
+from events.input_state import getInputState
+from general_utils import game_clock
+from general_utils.vec2 import Vec2
+from guis.base_guis import RootContainer
+from world.camera import Camera
+from world.car_physics import CarPhysics
+from world.car_renderer import CarRenderer
+from world.replay import ReplayRecorder, ReplayPlayer
+from world.tilemap import loadTileMap
+from world.track_fields import loadTrackFields
+from world.track_renderer import TrackRenderer
+
+class TrackScene(Scene):
+    """Scene with a track (game world) drawn under its GUIs
+
+    the player's car is driven with the arrow keys or WASD (space to brake), and the camera follows it
+    while the scene is loaded (or suspended) the player's inputs are recorded to replayFilePath (see world.replay)
+    """
+    hasGameWorld = True
+    trackFilePath = "tracks/oval.trk"
+    replayFilePath = "replays/latest.replay"
+    recordsReplay = True
+    # where the player's car starts, and the heading (in radians, see car_physics) it starts facing
+    startPosition = Vec2(2400, 336)
+    startHeading = 0.0
+    carImagePath = "sprites/SpriteTest.png"
+    carSize = Vec2(48, 24)
+
+    def __init__(self):
+        self.tileMap = loadTileMap(self.trackFilePath)
+        self.trackFields = loadTrackFields(self.trackFilePath, self.tileMap)
+        self.trackRenderer = TrackRenderer(self.tileMap)
+
+        self.carPhysics = CarPhysics(self.trackFields)
+        self.playerCar = self.carPhysics.addCar(self.startPosition, self.startHeading)
+        self.carRenderer = CarRenderer(self.carPhysics, self.carImagePath, self.carSize)
+
+        self.camera = Camera(self.startPosition)
+        self.replayRecorder: ReplayRecorder | type(None) = None
+        super().__init__(RootContainer())
+
+    def load(self):
+        super().load()
+        if self.recordsReplay:
+            os.makedirs(os.path.dirname(self.replayFilePath), exist_ok=True)
+            self.replayRecorder = ReplayRecorder(self.replayFilePath, [self.playerCar])
+
+    def unload(self):
+        super().unload()
+        if self.replayRecorder is not None:
+            self.replayRecorder.close()
+            self.replayRecorder = None
+
+    def onTick(self, tickDelta: float):
+        self.updatePlayerInputs()
+        if self.replayRecorder is not None:
+            self.replayRecorder.recordTick(self.carPhysics)
+        self.carPhysics.step(tickDelta)
+
+    def updatePlayerInputs(self):
+        """set the inputs of the player's car from the keys that are held"""
+        inputState = getInputState()
+        throttle = inputState.isKeyHeld(pygame.K_UP) or inputState.isKeyHeld(pygame.K_w)
+        reverse = inputState.isKeyHeld(pygame.K_DOWN) or inputState.isKeyHeld(pygame.K_s)
+        brake = inputState.isKeyHeld(pygame.K_SPACE)
+        steer = ((inputState.isKeyHeld(pygame.K_RIGHT) or inputState.isKeyHeld(pygame.K_d)) -
+                 (inputState.isKeyHeld(pygame.K_LEFT) or inputState.isKeyHeld(pygame.K_a)))
+        # reversing is just a weaker throttle backwards
+        self.carPhysics.setInputs(self.playerCar, throttle - 0.5 * reverse, brake, steer)
+
+    def draw(self):
+        alpha = game_clock.getInterpolationAlpha()
+        self.camera.moveTo(self.carPhysics.getInterpolatedPositions(alpha)[self.playerCar])
+        self.camera.clampTo(self.tileMap.getWorldSize())
+
+        self.trackRenderer.draw(self.camera)
+        self.carRenderer.draw(self.camera, alpha)
+        super().draw()
+
+class ReplayScene(TrackScene):
+    """Scene that plays back the last replay recorded by a TrackScene
+
+    the left and right arrow keys skip backwards and forwards by seekSeconds
+    if there is no replay to play (nothing has been recorded yet, or the file is not a valid replay),
+    the car just sits at the start, as if an empty replay was being played
+    """
+    recordsReplay = False
+    seekSeconds = 5.0
+
+    def __init__(self):
+        super().__init__()
+        # opened when the scene is loaded, after any TrackScene being switched away from has finished recording
+        self.replayPlayer: ReplayPlayer | type(None) = None
+        self.eventListeners += [
+            PygameEventListener(pygame.KEYDOWN, self.seekBy, False, -self.seekSeconds, filterAttribute="key", filterValue=pygame.K_LEFT),
+            PygameEventListener(pygame.KEYDOWN, self.seekBy, False, self.seekSeconds, filterAttribute="key", filterValue=pygame.K_RIGHT),
+        ]
+
+    def load(self):
+        super().load()
+        try:
+            self.replayPlayer = ReplayPlayer(self.replayFilePath)
+        except Exception:
+            # missing, truncated or not a replay file at all
+            self.replayPlayer = None
+            return
+        self.replayPlayer.seek(self.carPhysics, 0)
+
+    def onTick(self, tickDelta: float):
+        if self.replayPlayer is None or self.replayPlayer.isFinished():
+            return
+        self.replayPlayer.playTick(self.carPhysics)
+        self.carPhysics.step(tickDelta)
+
+    def seekBy(self, seconds: float):
+        if self.replayPlayer is None:
+            return
+        tick = self.replayPlayer.tick + round(seconds * self.replayPlayer.tickRate)
+        self.replayPlayer.seek(self.carPhysics, tick, game_clock.getTickDelta())
@@ -0,0 +1,103 @@
+"""headless race simulator, for tuning the AI and the balance of the cars without watching races in real time
+
+runs races between AI cars (see world.race_simulation) with no window or rendering, as fast as the simulation can go,
+spread over a pool of worker processes so every core is used, and saves every race's results along with a summary of
+the lap times and outcomes of all of them as JSON
+
+run from the root of the project with: python simulate.py --races 1000 --output race_results.json
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from general_utils import game_clock
+from world.race_simulation import simulateRace, getTrack, RACE_FINISHED
+
+DEFAULT_TRACK = "tracks/oval.trk"
+DEFAULT_OUTPUT = "race_results.json"
+
+def runRaces(trackFilePath: str, races: int, carCount: int, laps: int, firstSeed: int, maxSeconds: float, workers: int):
+    """run 'races' races (seeded firstSeed, firstSeed + 1, ...) and return their results in seed order
+
+    with 0 workers the races are run one after another in this process instead of in a process pool
+    """
+    # make sure the track's field cache exists before the workers start, so they all memory map the same files
+    # instead of each computing the fields (see track_fields.loadTrackFields)
+    getTrack(trackFilePath)
+
+    seeds = range(firstSeed, firstSeed + races)
+    if workers == 0:
+        return [simulateRace(trackFilePath, carCount, laps, seed, maxSeconds) for seed in seeds]
+
+    # races are quick, so hand them out in chunks to keep the cost of sending them to the workers down
+    chunkSize = max(1, races // (workers * 8))
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(simulateRace, repeat(trackFilePath), repeat(carCount), repeat(laps), seeds,
+                                 repeat(maxSeconds), chunksize=chunkSize))
+
+def summarizeRaces(races: list[dict]):
+    """return the lap times and outcomes of every car in every race, aggregated into one dict"""
+    results = [result for race in races for result in race["results"]]
+    lapTimes = [lapTime for result in results for lapTime in result["lapTimes"]]
+    finished = [result for result in results if result["outcome"] == RACE_FINISHED]
+    winners = [race["results"][0] for race in races if race["results"] and race["results"][0]["outcome"] == RACE_FINISHED]
+
+    # how each starting grid position did, as cars are added to the grid in order
+    gridPositions = {}
+    for result in results:
+        gridPositions.setdefault(result["car"], []).append(result)
+    byGridPosition = [{
+        "gridPosition": car + 1,
+        "wins": sum(result["position"] == 1 for result in carResults),
+        "averagePosition": statistics.fmean(result["position"] for result in carResults),
+        "finishRate": sum(result["outcome"] == RACE_FINISHED for result in carResults) / len(carResults),
+    } for car, carResults in sorted(gridPositions.items())]
+
+    bestLap = min((result for result in results if result["bestLapTime"] is not None),
+                  key=lambda result: result["bestLapTime"], default=None)
+    return {
+        "races": len(races),
+        "cars": len(results),
+        "finishRate": len(finished) / len(results) if results else 0.0,
+        "didNotFinish": len(results) - len(finished),
+        "laps": len(lapTimes),
+        "bestLapTime": bestLap["bestLapTime"] if bestLap is not None else None,
+        "averageLapTime": statistics.fmean(lapTimes) if lapTimes else None,
+        "lapTimeStandardDeviation": statistics.pstdev(lapTimes) if lapTimes else None,
+        "averageWinningTime": statistics.fmean(winner["time"] for winner in winners) if winners else None,
+        "byGridPosition": byGridPosition,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="headless batch race simulator")
+    parser.add_argument("--track", default=DEFAULT_TRACK, help="track file to race on")
+    parser.add_argument("--races", type=int, default=100, help="number of races to run")
+    parser.add_argument("--cars", type=int, default=8, help="number of cars in each race")
+    parser.add_argument("--laps", type=int, default=3, help="number of laps in each race")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first race (the rest count up from it)")
+    parser.add_argument("--max-seconds", type=float, default=600.0,
+                        help="simulated time limit of each race, cars that haven't finished by then do not finish")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes (0 runs the races in this process)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="file to write the results to (JSON)")
+    arguments = parser.parse_args()
+
+    start = time.perf_counter()
+    races = runRaces(arguments.track, arguments.races, arguments.cars, arguments.laps, arguments.seed,
+                     arguments.max_seconds, arguments.workers)
+    elapsed = time.perf_counter() - start
+
+    summary = summarizeRaces(races)
+    with open(arguments.output, "w") as file:
+        json.dump({"settings": vars(arguments), "summary": summary, "races": races}, file, indent=4)
+
+    simulatedSeconds = sum(race["ticks"] for race in races) / game_clock.TICK_RATE
+    print(f"{len(races)} races in {elapsed:.2f}s ({simulatedSeconds / elapsed:.0f}x real time) with {arguments.workers} workers")
+    print(f"finish rate {summary['finishRate']:.1%}, best lap {summary['bestLapTime']}, average lap {summary['averageLapTime']}")
+    print(f"results written to {arguments.output}")
+
+if __name__ == '__main__':
+    main()
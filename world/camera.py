@@ -0,0 +1,58 @@
+from __future__ import annotations
+from general_utils.vec2 import Vec2
+from general_utils.rect import Rect
+from pygame_rendering import window
+
+class Camera:
+    """A view into the game world, used to convert between world coordinates and screen coordinates
+
+    'position' is the point in the world at the centre of the view, and the view covers 'viewSize' pixels of the world
+    (the whole screen by default), with its top left at 'screenPos' on the screen
+    """
+    __slots__ = ("position", "viewSize", "screenPos")
+
+    def __init__(self, position: Vec2 = None, viewSize: Vec2 = None, screenPos: Vec2 = None):
+        self.position = Vec2(0.0, 0.0) if position is None else position.copy()
+        self.viewSize = window.getScreenSize() if viewSize is None else viewSize
+        self.screenPos = Vec2(0.0, 0.0) if screenPos is None else screenPos
+
+    def getTopLeft(self):
+        """return the world coordinates of the top left of the view"""
+        return Vec2(self.position.x - self.viewSize.x / 2, self.position.y - self.viewSize.y / 2)
+
+    def getViewRect(self):
+        """return a Rect of the area of the world that is in view"""
+        return Rect(self.getTopLeft(), self.viewSize)
+
+    def worldToScreen(self, worldPos: Vec2):
+        return Vec2(*self.worldToScreenValues(worldPos.x, worldPos.y))
+
+    def worldToScreenValues(self, x: float, y: float):
+        """the same as worldToScreen, but without needing to create a Vec2 (returns a tuple of (x, y))"""
+        return (x - self.position.x + self.viewSize.x / 2 + self.screenPos.x,
+                y - self.position.y + self.viewSize.y / 2 + self.screenPos.y)
+
+    def screenToWorld(self, screenPos: Vec2):
+        return Vec2(screenPos.x - self.screenPos.x - self.viewSize.x / 2 + self.position.x,
+                    screenPos.y - self.screenPos.y - self.viewSize.y / 2 + self.position.y)
+
+    def isRectVisible(self, rect: Rect):
+        """return whether any part of a Rect (in world coordinates) is in view"""
+        return self.getViewRect().isRectColliding(rect)
+
+    def moveTo(self, position: Vec2):
+        self.position.set(position.x, position.y)
+
+    def moveBy(self, offset: Vec2):
+        self.position += offset
+
+    def clampTo(self, worldSize: Vec2):
+        """move the camera as little as possible so that it doesn't show anything outside of a world of 'worldSize'
+
+        if the world is smaller than the view in a direction, the camera is centred on the world in that direction
+        """
+        halfWidth = self.viewSize.x / 2
+        halfHeight = self.viewSize.y / 2
+        x = worldSize.x / 2 if worldSize.x <= self.viewSize.x else min(max(self.position.x, halfWidth), worldSize.x - halfWidth)
+        y = worldSize.y / 2 if worldSize.y <= self.viewSize.y else min(max(self.position.y, halfHeight), worldSize.y - halfHeight)
+        self.position.set(x, y)
@@ -0,0 +1,213 @@
+"""top down car physics for every car at once
+
+the state of every car is kept in NumPy arrays (struct of arrays) instead of in one object per car, so one tick of any number
+of cars is a fixed number of whole array operations with no Python loop over the cars
+
+headings are in radians and work the same way as Vec2.rotateRadians (a heading of 0 faces along the x axis, and the
+heading increases towards the y axis), so the rotation to draw a car's Image at is -degrees(heading)
+"""
+from __future__ import annotations
+import math
+import numpy as np
+from general_utils.vec2 import Vec2
+from general_utils.vec2_array import Vec2Array
+from world.tilemap import SURFACE_ASPHALT, SURFACE_GRASS, SURFACE_WALL
+from world.track_fields import TrackFields
+
+# how fast a car with an engine power of 1 speeds up at full throttle (pixels per second per second)
+ENGINE_ACCELERATION = 600.0
+# how fast braking slows a car down (pixels per second per second)
+BRAKE_DECELERATION = 1200.0
+# the top speed is where the engine's acceleration is matched by the drag (pixels per second on asphalt)
+TOP_SPEED = 900.0
+# how quickly (per second) sideways sliding is stopped by the tyres when they have full grip
+LATERAL_GRIP = 8.0
+# how fast a car turns at full steering lock (radians per second), reached at STEERING_SPEED and above
+MAX_TURN_RATE = 3.0
+STEERING_SPEED = 250.0
+# how quickly (per second) the turn rate follows the steering
+STEERING_RESPONSE = 12.0
+# cars are treated as circles of this radius (in pixels) when colliding with walls
+CAR_WALL_RADIUS = 12.0
+# how much of its speed into a wall a car keeps (bounces back with) after hitting it
+WALL_RESTITUTION = 0.3
+
+# how much grip, and how much drag (multiplied by the asphalt drag), each surface type has, indexed by surface type
+SURFACE_GRIP = np.zeros(max(SURFACE_ASPHALT, SURFACE_GRASS, SURFACE_WALL) + 1)
+SURFACE_GRIP[[SURFACE_ASPHALT, SURFACE_GRASS, SURFACE_WALL]] = (1.0, 0.45, 1.0)
+SURFACE_DRAG = np.zeros_like(SURFACE_GRIP)
+SURFACE_DRAG[[SURFACE_ASPHALT, SURFACE_GRASS, SURFACE_WALL]] = (1.0, 4.0, 1.0)
+
+# the cars' buffers start with space for this many cars, and double in size whenever they run out of space
+INITIAL_CAR_CAPACITY = 16
+
+class CarPhysics:
+    """The state of every car and the physics to move them all each tick
+
+    each car is an index into the arrays, and the arrays only hold 'count' cars (the attributes are views of the first
+    'count' elements of bigger buffers, so adding cars rarely has to allocate)
+
+    inputs (set by players or AI before each step):
+        throttles from 0 to 1, brakes from 0 to 1, steers from -1 (turn towards negative headings) to 1
+    state (changed by step):
+        positions and velocities (Vec2Arrays, in pixels and pixels per second), headings (radians), turnRates (radians per second)
+    parameters (can be changed to make cars different from each other):
+        enginePowers and grips (multipliers, 1 is a normal car)
+
+    the positions and headings before the last step are kept as well, so drawing can interpolate between ticks
+    if trackFields is given, the grip of each car depends on the surface it is on, and cars collide with the walls
+    """
+
+    def __init__(self, trackFields: TrackFields = None, capacity: int = INITIAL_CAR_CAPACITY):
+        self.trackFields = trackFields
+        self.count = 0
+        self.capacity = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity: int):
+        """make the buffers big enough for 'capacity' cars, keeping the state of the existing cars"""
+        names = ("positionBuffer", "velocityBuffer", "previousPositionBuffer")
+        scalarNames = ("headingBuffer", "previousHeadingBuffer", "turnRateBuffer", "throttleBuffer", "brakeBuffer",
+                       "steerBuffer", "enginePowerBuffer", "gripBuffer")
+        for name in names:
+            buffer = np.zeros((capacity, 2))
+            if self.capacity > 0:
+                buffer[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, buffer)
+        for name in scalarNames:
+            buffer = np.zeros(capacity)
+            if self.capacity > 0:
+                buffer[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, buffer)
+        self.capacity = capacity
+        self.updateViews()
+
+    def updateViews(self):
+        """point the attributes at the first 'count' cars of the buffers"""
+        count = self.count
+        self.positions = Vec2Array(self.positionBuffer[:count])
+        self.velocities = Vec2Array(self.velocityBuffer[:count])
+        self.previousPositions = Vec2Array(self.previousPositionBuffer[:count])
+        self.headings = self.headingBuffer[:count]
+        self.previousHeadings = self.previousHeadingBuffer[:count]
+        self.turnRates = self.turnRateBuffer[:count]
+        self.throttles = self.throttleBuffer[:count]
+        self.brakes = self.brakeBuffer[:count]
+        self.steers = self.steerBuffer[:count]
+        self.enginePowers = self.enginePowerBuffer[:count]
+        self.grips = self.gripBuffer[:count]
+
+    def addCar(self, position: Vec2, heading: float = 0.0, enginePower: float = 1.0, grip: float = 1.0):
+        """add a stopped car and return its index"""
+        if self.count == self.capacity:
+            self.allocate(max(1, self.capacity * 2))
+
+        index = self.count
+        self.count += 1
+        self.updateViews()
+
+        self.positions.data[index] = (position.x, position.y)
+        self.previousPositions.data[index] = (position.x, position.y)
+        self.velocities.data[index] = 0.0
+        self.headings[index] = heading
+        self.previousHeadings[index] = heading
+        self.turnRates[index] = 0.0
+        self.throttles[index] = 0.0
+        self.brakes[index] = 0.0
+        self.steers[index] = 0.0
+        self.enginePowers[index] = enginePower
+        self.grips[index] = grip
+        return index
+
+    def setInputs(self, index: int, throttle: float, brake: float, steer: float):
+        self.throttles[index] = throttle
+        self.brakes[index] = brake
+        self.steers[index] = steer
+
+    def getPosition(self, index: int):
+        return self.positions[index]
+
+    def getHeading(self, index: int):
+        return float(self.headings[index])
+
+    def getSpeeds(self):
+        return self.velocities.length()
+
+    def getInterpolatedPositions(self, alpha: float):
+        """return a Vec2Array of the positions between the last two ticks (see game_clock.getInterpolationAlpha)"""
+        return Vec2Array(self.previousPositions.data + (self.positions.data - self.previousPositions.data) * alpha)
+
+    def getInterpolatedHeadings(self, alpha: float):
+        """return an array of the headings between the last two ticks (see game_clock.getInterpolationAlpha)"""
+        # the shortest way around, so that going from just under pi to just over -pi doesn't spin the wrong way
+        difference = (self.headings - self.previousHeadings + math.pi) % (2 * math.pi) - math.pi
+        return self.previousHeadings + difference * alpha
+
+    def step(self, tickDelta: float):
+        """move every car forward by one tick of 'tickDelta' seconds"""
+        if self.count == 0:
+            return
+
+        positions = self.positions.data
+        velocities = self.velocities.data
+        self.previousPositions.data[:] = positions
+        self.previousHeadings[:] = self.headings
+
+        if self.trackFields is not None:
+            surfaces = self.trackFields.getSurfacesAt(positions[:, 0], positions[:, 1])
+            grips = SURFACE_GRIP[surfaces] * self.grips
+            drags = SURFACE_DRAG[surfaces]
+        else:
+            grips = self.grips
+            drags = 1.0
+
+        # split the velocity into the parts going forwards and sideways relative to where each car is facing
+        cos = np.cos(self.headings)
+        sin = np.sin(self.headings)
+        forwardSpeeds = velocities[:, 0] * cos + velocities[:, 1] * sin
+        sidewaysSpeeds = velocities[:, 1] * cos - velocities[:, 0] * sin
+
+        # the engine (less on slippy surfaces), the drag that stops it going over TOP_SPEED, and the brakes
+        # (which can only slow a car down to a stop, never push it backwards)
+        forwardSpeeds += self.throttles * self.enginePowers * grips * (ENGINE_ACCELERATION * tickDelta)
+        forwardSpeeds -= forwardSpeeds * drags * (ENGINE_ACCELERATION / TOP_SPEED * tickDelta)
+        braking = np.minimum(np.abs(forwardSpeeds), self.brakes * (BRAKE_DECELERATION * tickDelta))
+        forwardSpeeds -= np.sign(forwardSpeeds) * braking
+
+        # the tyres stop the car sliding sideways, less so when there is less grip (so it drifts on grass)
+        sidewaysSpeeds *= np.exp(-LATERAL_GRIP * grips * tickDelta)
+
+        # steering only turns a car when it is moving, and turns it the other way when reversing
+        targetTurnRates = self.steers * MAX_TURN_RATE * np.clip(forwardSpeeds / STEERING_SPEED, -1.0, 1.0)
+        self.turnRates += (targetTurnRates - self.turnRates) * min(1.0, STEERING_RESPONSE * tickDelta)
+        self.headings += self.turnRates * tickDelta
+        # keep the headings between -pi and pi
+        np.remainder(self.headings + math.pi, 2 * math.pi, out=self.headings)
+        self.headings -= math.pi
+
+        # put the velocities back together (the old headings are used, so the sideways part left over is the drift)
+        velocities[:, 0] = forwardSpeeds * cos - sidewaysSpeeds * sin
+        velocities[:, 1] = forwardSpeeds * sin + sidewaysSpeeds * cos
+        positions += velocities * tickDelta
+
+        if self.trackFields is not None:
+            self.collideWithWalls()
+
+    def collideWithWalls(self):
+        """push every car that is overlapping a wall back out of it, and bounce it off the wall"""
+        positions = self.positions.data
+        velocities = self.velocities.data
+        distances = self.trackFields.getWallDistancesAt(positions[:, 0], positions[:, 1])
+        colliding = np.nonzero(distances < CAR_WALL_RADIUS)[0]
+        if len(colliding) == 0:
+            return
+
+        normalXs, normalYs = self.trackFields.getWallNormalsAt(positions[colliding, 0], positions[colliding, 1])
+        overlaps = CAR_WALL_RADIUS - distances[colliding]
+        positions[colliding, 0] += normalXs * overlaps
+        positions[colliding, 1] += normalYs * overlaps
+
+        # take away the speed going into the wall, plus a bit more so that it bounces off
+        speedsIntoWall = np.minimum(velocities[colliding, 0] * normalXs + velocities[colliding, 1] * normalYs, 0.0)
+        velocities[colliding, 0] -= (1.0 + WALL_RESTITUTION) * speedsIntoWall * normalXs
+        velocities[colliding, 1] -= (1.0 + WALL_RESTITUTION) * speedsIntoWall * normalYs
@@ -0,0 +1,45 @@
+from __future__ import annotations
+import numpy as np
+from general_utils.vec2 import Vec2
+from pygame_rendering.images import Image
+from world.camera import Camera
+from world.car_physics import CarPhysics
+
+# cars are rotated to the nearest multiple of this many degrees, so their rotated images can be shared (see Image)
+CAR_ROTATION_STEP = 3.0
+
+class CarRenderer:
+    """Draws the cars of a CarPhysics with one Image per car
+
+    only reads the positions and headings of the cars (interpolated between the last two ticks), so drawing never
+    changes the simulation, and cars that are out of view of the camera are culled before their images are rotated
+    """
+
+    def __init__(self, carPhysics: CarPhysics, imagePath: str, size: Vec2):
+        self.carPhysics = carPhysics
+        self.imagePath = imagePath
+        self.size = size
+        self.images: list[Image] = []
+
+    def draw(self, camera: Camera, alpha: float = 1.0):
+        """draw every car in view of the camera, 'alpha' of the way from their previous tick to their current one"""
+        carPhysics = self.carPhysics
+        while len(self.images) < carPhysics.count:
+            self.images.append(Image(self.imagePath, size=self.size, rotationStep=CAR_ROTATION_STEP))
+
+        positions = carPhysics.getInterpolatedPositions(alpha).data
+        rotations = -np.degrees(carPhysics.getInterpolatedHeadings(alpha))
+
+        # the distance from a car's centre that it can be seen from, whatever way it is facing
+        margin = max(self.size.x, self.size.y)
+        topLeft = camera.getTopLeft()
+        visible = np.nonzero((positions[:, 0] > topLeft.x - margin) & (positions[:, 0] < topLeft.x + camera.viewSize.x + margin) &
+                             (positions[:, 1] > topLeft.y - margin) & (positions[:, 1] < topLeft.y + camera.viewSize.y + margin))[0]
+
+        halfWidth = self.size.x / 2
+        halfHeight = self.size.y / 2
+        for index, (x, y), rotation in zip(visible.tolist(), positions[visible].tolist(), rotations[visible].tolist()):
+            image = self.images[index]
+            image.rotateTo(rotation)
+            screenX, screenY = camera.worldToScreenValues(x - halfWidth, y - halfHeight)
+            image.blitAt(Vec2(screenX, screenY))
@@ -0,0 +1,359 @@
+"""collision detection between things in the game world (cars, barriers, pickups)
+
+collisions are found in two phases:
+the broad phase uses SpatialHashes (uniform grids) to find the pairs of colliders whose bounding boxes share a cell,
+which is only a handful of pairs instead of checking every collider against every other one,
+then the narrow phase checks the exact shapes of just those pairs (circles and rotated boxes)
+
+angles are in degrees and work the same way as Vec2.rotate, so a box with an angle of 90 has its width along the y axis
+"""
+from __future__ import annotations
+import math
+from general_utils.vec2 import Vec2
+from general_utils.rect import Rect
+
+# the width and height (in world pixels) of each cell of a SpatialHash
+# should be around the size of the biggest moving things (cars), so most things are only in one to four cells
+COLLISION_CELL_SIZE = 128
+
+class CircleCollider:
+    """A circle shaped collider, cheapest to check so good for pickups and round obstacles"""
+    __slots__ = ("position", "radius", "owner")
+
+    def __init__(self, position: Vec2, radius: float, owner: object = None):
+        self.position = position
+        self.radius = radius
+        # whatever the collider belongs to (a car, for example), so it can be found from a collision
+        self.owner = owner
+
+    def getBounds(self):
+        """return (left, top, right, bottom) of the axis aligned box around this collider"""
+        x = self.position.x
+        y = self.position.y
+        radius = self.radius
+        return x - radius, y - radius, x + radius, y + radius
+
+class BoxCollider:
+    """A rotated rectangle shaped collider (an oriented bounding box), for cars and barriers
+
+    'position' is the centre of the box, 'size' is its width and height before it is rotated by 'angle' degrees
+    """
+    __slots__ = ("position", "size", "angle", "owner")
+
+    def __init__(self, position: Vec2, size: Vec2, angle: float = 0.0, owner: object = None):
+        self.position = position
+        self.size = size
+        self.angle = angle
+        self.owner = owner
+
+    def getAxes(self):
+        """return the directions of the width and height of the box after it has been rotated (both have a length of 1)"""
+        radians = math.radians(self.angle)
+        cos = math.cos(radians)
+        sin = math.sin(radians)
+        return Vec2(cos, sin), Vec2(-sin, cos)
+
+    def getCorners(self):
+        """return the four corners of the box after it has been rotated, going around it"""
+        x = self.position.x
+        y = self.position.y
+        halfWidth = self.size.x / 2
+        halfHeight = self.size.y / 2
+        return [Vec2(x + offsetX, y + offsetY).rotateAround(self.position, self.angle)
+                for offsetX, offsetY in ((-halfWidth, -halfHeight), (halfWidth, -halfHeight),
+                                         (halfWidth, halfHeight), (-halfWidth, halfHeight))]
+
+    def getBounds(self):
+        """return (left, top, right, bottom) of the axis aligned box around this collider"""
+        radians = math.radians(self.angle)
+        cos = abs(math.cos(radians))
+        sin = abs(math.sin(radians))
+        # half of the width and height of the axis aligned box that fits the rotated box
+        extentX = (self.size.x * cos + self.size.y * sin) / 2
+        extentY = (self.size.x * sin + self.size.y * cos) / 2
+        return self.position.x - extentX, self.position.y - extentY, self.position.x + extentX, self.position.y + extentY
+
+class Contact:
+    """How two colliders overlap: 'normal' is the direction (with a length of 1) to push the second collider
+    to separate them, and 'depth' is how far it would have to be pushed"""
+    __slots__ = ("normal", "depth")
+
+    def __init__(self, normal: Vec2, depth: float):
+        self.normal = normal
+        self.depth = depth
+
+    def __repr__(self):
+        return f"Contact({self.normal}, {self.depth})"
+
+class SpatialHash:
+    """A uniform grid of cells that each hold the ids of the colliders whose bounding boxes touch them
+
+    the cells each id is in are remembered, so moving a collider (see update) only changes any cells
+    if it has moved into a different set of cells, which for most colliders most ticks it hasn't
+    """
+
+    def __init__(self, cellSize: int = COLLISION_CELL_SIZE):
+        self.cellSize = cellSize
+        self.cells: dict[tuple[int, int], set[int]] = dict()
+        # the (left, top, right, bottom) range of cells that each id is in
+        self.cellRanges: dict[int, tuple[int, int, int, int]] = dict()
+
+    def getCellRange(self, left: float, top: float, right: float, bottom: float):
+        cellSize = self.cellSize
+        return int(left // cellSize), int(top // cellSize), int(right // cellSize), int(bottom // cellSize)
+
+    def insert(self, colliderId: int, bounds: tuple[float, float, float, float]):
+        """add an id with the (left, top, right, bottom) of its bounding box"""
+        cellRange = self.getCellRange(*bounds)
+        self.cellRanges[colliderId] = cellRange
+        self.addToCells(colliderId, cellRange)
+
+    def update(self, colliderId: int, bounds: tuple[float, float, float, float]):
+        """move an id that has already been inserted to a new bounding box"""
+        cellRange = self.getCellRange(*bounds)
+        oldCellRange = self.cellRanges[colliderId]
+        if cellRange == oldCellRange:
+            return
+        self.removeFromCells(colliderId, oldCellRange)
+        self.cellRanges[colliderId] = cellRange
+        self.addToCells(colliderId, cellRange)
+
+    def remove(self, colliderId: int):
+        self.removeFromCells(colliderId, self.cellRanges.pop(colliderId))
+
+    def clear(self):
+        self.cells.clear()
+        self.cellRanges.clear()
+
+    def addToCells(self, colliderId: int, cellRange: tuple[int, int, int, int]):
+        left, top, right, bottom = cellRange
+        for cellX in range(left, right + 1):
+            for cellY in range(top, bottom + 1):
+                cell = (cellX, cellY)
+                if cell in self.cells:
+                    self.cells[cell].add(colliderId)
+                else:
+                    self.cells[cell] = {colliderId}
+
+    def removeFromCells(self, colliderId: int, cellRange: tuple[int, int, int, int]):
+        left, top, right, bottom = cellRange
+        for cellX in range(left, right + 1):
+            for cellY in range(top, bottom + 1):
+                cell = (cellX, cellY)
+                ids = self.cells[cell]
+                ids.discard(colliderId)
+                if not ids:
+                    del self.cells[cell]
+
+    def query(self, bounds: tuple[float, float, float, float]):
+        """return a set of every id in the cells that a (left, top, right, bottom) bounding box touches"""
+        left, top, right, bottom = self.getCellRange(*bounds)
+        found: set[int] = set()
+        for cellX in range(left, right + 1):
+            for cellY in range(top, bottom + 1):
+                ids = self.cells.get((cellX, cellY))
+                if ids:
+                    found.update(ids)
+        return found
+
+    def getCandidatePairs(self):
+        """return a set of every pair of ids (smallest first) that share at least one cell"""
+        pairs: set[tuple[int, int]] = set()
+        for ids in self.cells.values():
+            if len(ids) < 2:
+                continue
+            ordered = sorted(ids)
+            for i, first in enumerate(ordered):
+                for second in ordered[i + 1:]:
+                    pairs.add((first, second))
+        return pairs
+
+def areBoundsOverlapping(a: tuple[float, float, float, float], b: tuple[float, float, float, float]):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def collideCircles(a: CircleCollider, b: CircleCollider):
+    offsetX = b.position.x - a.position.x
+    offsetY = b.position.y - a.position.y
+    radii = a.radius + b.radius
+    distanceSquared = offsetX * offsetX + offsetY * offsetY
+    if distanceSquared >= radii * radii:
+        return None
+
+    distance = math.sqrt(distanceSquared)
+    if distance == 0.0:
+        # exactly on top of each other, so any direction will do
+        return Contact(Vec2(1.0, 0.0), radii)
+    return Contact(Vec2(offsetX / distance, offsetY / distance), radii - distance)
+
+def getProjection(corners: list[Vec2], axis: Vec2):
+    """return the (min, max) of the corners projected onto an axis"""
+    projections = [corner.x * axis.x + corner.y * axis.y for corner in corners]
+    return min(projections), max(projections)
+
+def collideBoxes(a: BoxCollider, b: BoxCollider):
+    """check two rotated boxes with the separating axis theorem
+
+    two convex shapes are not overlapping if and only if there is an axis that their projections onto don't overlap,
+    and for two rectangles the only axes that need checking are the directions of their sides
+    """
+    cornersA = a.getCorners()
+    cornersB = b.getCorners()
+
+    smallestDepth = math.inf
+    smallestAxis: Vec2 | type(None) = None
+    for axis in a.getAxes() + b.getAxes():
+        minA, maxA = getProjection(cornersA, axis)
+        minB, maxB = getProjection(cornersB, axis)
+        depth = min(maxA, maxB) - max(minA, minB)
+        if depth <= 0.0:
+            return None
+        if depth < smallestDepth:
+            smallestDepth = depth
+            smallestAxis = axis
+
+    # make the normal point from a to b
+    if (b.position.x - a.position.x) * smallestAxis.x + (b.position.y - a.position.y) * smallestAxis.y < 0.0:
+        smallestAxis = Vec2(-smallestAxis.x, -smallestAxis.y)
+    return Contact(smallestAxis, smallestDepth)
+
+def collideBoxAndCircle(box: BoxCollider, circle: CircleCollider):
+    """check a rotated box and a circle by finding the closest point in the box to the centre of the circle
+
+    the normal points from the box to the circle
+    """
+    # the centre of the circle in the box's space (as if the box wasn't rotated and was centred at the origin)
+    local = circle.position.rotateAround(box.position, -box.angle) - box.position
+    halfWidth = box.size.x / 2
+    halfHeight = box.size.y / 2
+
+    # (a centre exactly on the edge counts as inside, as there is no offset from the edge to get a normal from)
+    if -halfWidth <= local.x <= halfWidth and -halfHeight <= local.y <= halfHeight:
+        # the centre of the circle is inside the box, so push it out through the closest side
+        distanceX = halfWidth - abs(local.x)
+        distanceY = halfHeight - abs(local.y)
+        if distanceX < distanceY:
+            normal = Vec2(math.copysign(1.0, local.x), 0.0)
+            depth = distanceX + circle.radius
+        else:
+            normal = Vec2(0.0, math.copysign(1.0, local.y))
+            depth = distanceY + circle.radius
+        return Contact(normal.rotate(box.angle), depth)
+
+    closestX = min(max(local.x, -halfWidth), halfWidth)
+    closestY = min(max(local.y, -halfHeight), halfHeight)
+    offsetX = local.x - closestX
+    offsetY = local.y - closestY
+    distanceSquared = offsetX * offsetX + offsetY * offsetY
+    if distanceSquared >= circle.radius * circle.radius:
+        return None
+
+    distance = math.sqrt(distanceSquared)
+    return Contact(Vec2(offsetX / distance, offsetY / distance).rotate(box.angle), circle.radius - distance)
+
+def collide(a: CircleCollider | BoxCollider, b: CircleCollider | BoxCollider):
+    """return a Contact if two colliders are overlapping (with the normal pointing from a to b), otherwise None"""
+    if a.__class__ is CircleCollider:
+        if b.__class__ is CircleCollider:
+            return collideCircles(a, b)
+        contact = collideBoxAndCircle(b, a)
+        if contact is not None:
+            contact.normal = Vec2(-contact.normal.x, -contact.normal.y)
+        return contact
+    if b.__class__ is CircleCollider:
+        return collideBoxAndCircle(a, b)
+    return collideBoxes(a, b)
+
+class CollisionWorld:
+    """Every collider in the game world, with a broad phase to quickly find which of them might be colliding
+
+    static colliders (barriers, walls) are put into their own SpatialHash once, and dynamic colliders (cars, moving pickups)
+    into another that is updated every tick (see updateDynamicColliders), so the static hash never needs to change
+    and static colliders are never checked against each other
+
+    colliders are referred to by the id that addCollider returns
+    """
+
+    def __init__(self, cellSize: int = COLLISION_CELL_SIZE):
+        self.colliders: dict[int, CircleCollider | BoxCollider] = dict()
+        self.staticIds: set[int] = set()
+        self.staticHash = SpatialHash(cellSize)
+        self.dynamicHash = SpatialHash(cellSize)
+        self.nextId = 0
+
+    def addCollider(self, collider: CircleCollider | BoxCollider, isStatic: bool = False):
+        """add a collider and return its id"""
+        colliderId = self.nextId
+        self.nextId += 1
+        self.colliders[colliderId] = collider
+        if isStatic:
+            self.staticIds.add(colliderId)
+            self.staticHash.insert(colliderId, collider.getBounds())
+        else:
+            self.dynamicHash.insert(colliderId, collider.getBounds())
+        return colliderId
+
+    def removeCollider(self, colliderId: int):
+        del self.colliders[colliderId]
+        if colliderId in self.staticIds:
+            self.staticIds.remove(colliderId)
+            self.staticHash.remove(colliderId)
+        else:
+            self.dynamicHash.remove(colliderId)
+
+    def getCollider(self, colliderId: int):
+        return self.colliders[colliderId]
+
+    def isStatic(self, colliderId: int):
+        return colliderId in self.staticIds
+
+    def updateDynamicColliders(self):
+        """update the broad phase with the current positions of every dynamic collider
+
+        should be called once per tick after everything has moved and before getCandidatePairs or getCollisions
+        """
+        colliders = self.colliders
+        for colliderId in self.dynamicHash.cellRanges:
+            self.dynamicHash.update(colliderId, colliders[colliderId].getBounds())
+
+    def getCandidatePairs(self):
+        """return a list of every pair of ids that might be colliding (the broad phase)
+
+        only pairs whose bounding boxes overlap are returned, and pairs of two static colliders are never returned
+        the static id is always second in pairs of a dynamic and a static collider
+        """
+        colliders = self.colliders
+        bounds = {colliderId: colliders[colliderId].getBounds() for colliderId in self.dynamicHash.cellRanges}
+
+        pairs = [pair for pair in self.dynamicHash.getCandidatePairs() if areBoundsOverlapping(bounds[pair[0]], bounds[pair[1]])]
+        for colliderId, colliderBounds in bounds.items():
+            for staticId in self.staticHash.query(colliderBounds):
+                if areBoundsOverlapping(colliderBounds, colliders[staticId].getBounds()):
+                    pairs.append((colliderId, staticId))
+        return pairs
+
+    def getCollisions(self):
+        """return a list of (id, id, Contact) for every pair of colliders that are overlapping (the broad then narrow phase)
+
+        the contact's normal points from the first collider to the second
+        """
+        colliders = self.colliders
+        collisions = []
+        for first, second in self.getCandidatePairs():
+            contact = collide(colliders[first], colliders[second])
+            if contact is not None:
+                collisions.append((first, second, contact))
+        return collisions
+
+    def queryRects(self, rects: list[Rect]):
+        """return a list with the ids of every collider whose bounding box overlaps each Rect
+
+        for checking many areas at once (the sensors of every AI car, for example)
+        """
+        colliders = self.colliders
+        results = []
+        for rect in rects:
+            bounds = (rect.topLeft.x, rect.topLeft.y, rect.topLeft.x + rect.size.x, rect.topLeft.y + rect.size.y)
+            found = [colliderId for colliderId in self.staticHash.query(bounds) | self.dynamicHash.query(bounds)
+                     if areBoundsOverlapping(bounds, colliders[colliderId].getBounds())]
+            results.append(found)
+        return results
@@ -0,0 +1,117 @@
+"""AI drivers that race cars around a track that loops around a centre point (like the oval tracks)
+
+like CarPhysics, every AI car is handled at once with whole array operations instead of one object per car:
+each car chases a point a little way ahead of it on the middle of the track (the racing line, see computeRacingLine),
+and lifts off when the track doesn't carry on straight ahead of it
+"""
+from __future__ import annotations
+import math
+import numpy as np
+from general_utils.vec2 import Vec2
+from world.car_physics import CarPhysics
+from world.tilemap import SURFACE_ASPHALT
+from world.track_fields import TrackFields
+
+# the number of angles around the centre of the track that the racing line is worked out at
+RACING_LINE_STEPS = 720
+# how far ahead along the racing line (in pixels at a speed of AI_LOOK_AHEAD_SPEED) the AI aims for
+AI_LOOK_AHEAD = 240.0
+AI_LOOK_AHEAD_SPEED = 600.0
+# how hard the AI steers towards the point it is aiming for (steering per radian it is facing away from it)
+AI_STEERING = 2.5
+# the speed (pixels per second) the AI slows to when the track doesn't carry on straight ahead
+AI_CORNER_SPEED = 450.0
+# how much faster or slower than the average AI each AI can be (see RaceAI.randomizeSkills)
+AI_SKILL_SPREAD = 0.15
+
+def computeRacingLine(trackFields: TrackFields, centre: Vec2, steps: int = RACING_LINE_STEPS):
+    """return the distance from 'centre' to the middle of the asphalt at each of 'steps' angles around it
+
+    the middle is the average distance of the asphalt along a line out from the centre at that angle
+    """
+    angles = np.arange(steps) * (2 * math.pi / steps)
+    height, width = trackFields.surfaces.shape
+    radii = np.arange(0.0, math.hypot(width, height) * trackFields.tileSize, trackFields.tileSize / 2)
+
+    xs = centre.x + np.cos(angles)[:, None] * radii
+    ys = centre.y + np.sin(angles)[:, None] * radii
+    onAsphalt = trackFields.getSurfacesAt(xs.ravel(), ys.ravel()).reshape(xs.shape) == SURFACE_ASPHALT
+    asphaltCounts = onAsphalt.sum(axis=1)
+    if np.any(asphaltCounts == 0):
+        raise Exception("The track doesn't go all the way around its centre")
+    return (onAsphalt * radii).sum(axis=1) / asphaltCounts
+
+class RaceAI:
+    """Sets the inputs of some of the cars of a CarPhysics every tick so they race around the track
+
+    'cars' are the indices of the cars it drives, 'centre' is the point the track loops around and 'direction' is 1 if the
+    race goes around it with the angle increasing (clockwise on screen) or -1 if it goes the other way
+
+    per car parameters (arrays, one per AI car, can be changed to make the AIs drive differently):
+        lookAheads (multiplier of AI_LOOK_AHEAD), cornerSpeeds (the speed it lifts off to when heading off the track,
+        in pixels per second) and aggressions (the throttle it uses, from 0 to 1)
+    """
+
+    def __init__(self, carPhysics: CarPhysics, trackFields: TrackFields, cars: list[int], centre: Vec2, direction: int = 1):
+        self.carPhysics = carPhysics
+        self.trackFields = trackFields
+        self.cars = np.array(cars, dtype=np.intp)
+        self.centre = centre
+        self.direction = direction
+        self.racingLine = computeRacingLine(trackFields, centre)
+
+        self.lookAheads = np.ones(len(cars))
+        self.cornerSpeeds = np.full(len(cars), AI_CORNER_SPEED)
+        self.aggressions = np.ones(len(cars))
+
+    def addCar(self, car: int):
+        """start driving another car of the CarPhysics, with the default parameters"""
+        self.cars = np.append(self.cars, car)
+        self.lookAheads = np.append(self.lookAheads, 1.0)
+        self.cornerSpeeds = np.append(self.cornerSpeeds, AI_CORNER_SPEED)
+        self.aggressions = np.append(self.aggressions, 1.0)
+
+    def randomizeSkills(self, rng: np.random.Generator, spread: float = AI_SKILL_SPREAD):
+        """give each AI slightly different parameters, so they don't all drive exactly the same line"""
+        count = len(self.cars)
+        self.lookAheads = rng.uniform(1.0 - spread, 1.0 + spread, count)
+        self.cornerSpeeds = AI_CORNER_SPEED * rng.uniform(1.0 - spread, 1.0 + spread, count)
+        self.aggressions = rng.uniform(1.0 - spread, 1.0, count)
+
+    def getRacingLineRadii(self, angles: np.ndarray):
+        """return the distance from the centre to the racing line at each angle (interpolated between the steps)"""
+        steps = len(self.racingLine)
+        positions = np.remainder(angles, 2 * math.pi) * (steps / (2 * math.pi))
+        indices = np.floor(positions).astype(np.intp) % steps
+        fractions = positions - np.floor(positions)
+        return self.racingLine[indices] * (1 - fractions) + self.racingLine[(indices + 1) % steps] * fractions
+
+    def update(self):
+        """set the throttle, brake and steering of every AI car for the next step"""
+        carPhysics = self.carPhysics
+        cars = self.cars
+        positions = carPhysics.positions.data[cars]
+        headings = carPhysics.headings[cars]
+        speeds = carPhysics.getSpeeds()[cars]
+
+        # aim for the point on the racing line that is roughly 'lookAheads' further around the track (further the faster the car goes)
+        offsetXs = positions[:, 0] - self.centre.x
+        offsetYs = positions[:, 1] - self.centre.y
+        angles = np.arctan2(offsetYs, offsetXs)
+        lookAheads = AI_LOOK_AHEAD * self.lookAheads * np.maximum(speeds / AI_LOOK_AHEAD_SPEED, 0.5)
+        targetAngles = angles + self.direction * lookAheads / np.maximum(np.hypot(offsetXs, offsetYs), lookAheads)
+        targetRadii = self.getRacingLineRadii(targetAngles)
+        targetHeadings = np.arctan2(np.sin(targetAngles) * targetRadii - offsetYs, np.cos(targetAngles) * targetRadii - offsetXs)
+        headingErrors = (targetHeadings - headings + math.pi) % (2 * math.pi) - math.pi
+        steers = np.clip(headingErrors * AI_STEERING, -1.0, 1.0)
+
+        # lift off (and brake if it is going much too fast) when the track doesn't carry on straight ahead
+        aheadSurfaces = self.trackFields.getSurfacesAt(positions[:, 0] + np.cos(headings) * lookAheads,
+                                                       positions[:, 1] + np.sin(headings) * lookAheads)
+        tooFast = (aheadSurfaces != SURFACE_ASPHALT) & (speeds > self.cornerSpeeds)
+        throttles = np.where(tooFast, 0.0, self.aggressions)
+        brakes = np.where(tooFast & (speeds > self.cornerSpeeds * 1.3), 1.0, 0.0)
+
+        carPhysics.throttles[cars] = throttles
+        carPhysics.brakes[cars] = brakes
+        carPhysics.steers[cars] = steers
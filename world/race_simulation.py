@@ -0,0 +1,172 @@
+"""headless races between AI cars, simulated as fast as possible with no window, rendering or game clock
+
+a race is just a CarPhysics stepped by a fixed tick delta in a loop with RaceAI setting the inputs, so it runs many times
+faster than real time, and nothing here imports pygame so races can run in worker processes (see simulate.py)
+
+laps are counted by how far each car has gone around the centre of the track (the angle around it, unwrapped so it
+keeps counting past a full turn), so tracks have to loop around the centre of their tile map (like the oval tracks)
+"""
+from __future__ import annotations
+import math
+import numpy as np
+from general_utils import game_clock
+from general_utils.vec2 import Vec2
+from world.car_physics import CarPhysics
+from world.race_ai import RaceAI
+from world.tilemap import TileMap, loadTileMap
+from world.track_fields import TrackFields, loadTrackFields
+
+# where the start line is (the first car starts on it, the rest in rows behind it) and which way the race goes from it
+# (the same as TrackScene, so races on the oval track start where the player does)
+START_POSITION = Vec2(2400, 336)
+START_HEADING = 0.0
+# the starting grid is GRID_COLUMNS cars across, GRID_COLUMN_SPACING apart, with rows GRID_ROW_SPACING behind each other
+GRID_COLUMNS = 2
+GRID_COLUMN_SPACING = 96.0
+GRID_ROW_SPACING = 72.0
+# how much the engine power of each car can differ from 1 (see simulateRace)
+ENGINE_POWER_SPREAD = 0.05
+
+RACE_FINISHED = "finished"
+# did not finish before the race's time limit
+RACE_DID_NOT_FINISH = "dnf"
+
+# tracks already loaded by this process, by file path, so a worker process only loads each track once however many races it runs
+loadedTracks: dict[str, tuple[TileMap, TrackFields]] = {}
+
+def getTrack(trackFilePath: str):
+    """return the (TileMap, TrackFields) of a track file, loading it the first time"""
+    if trackFilePath not in loadedTracks:
+        tileMap = loadTileMap(trackFilePath)
+        loadedTracks[trackFilePath] = (tileMap, loadTrackFields(trackFilePath, tileMap))
+    return loadedTracks[trackFilePath]
+
+class Race:
+    """A race of 'laps' laps around a track between cars driven by a RaceAI
+
+    call addCar for every car (they are put on the grid in the order they are added), then run (or step until isOver)
+    lapTicks[car] is the tick each lap of that car was finished on
+    """
+
+    def __init__(self, tileMap: TileMap, trackFields: TrackFields, laps: int, startPosition: Vec2 = START_POSITION,
+                 startHeading: float = START_HEADING):
+        self.tileMap = tileMap
+        self.trackFields = trackFields
+        self.laps = laps
+        self.startPosition = startPosition
+        self.startHeading = startHeading
+
+        self.centre = tileMap.getWorldSize() / 2
+        # the way around the centre the race goes, from the way the start heading goes around it
+        fromCentre = startPosition - self.centre
+        self.direction = 1 if fromCentre.x * math.sin(startHeading) - fromCentre.y * math.cos(startHeading) >= 0 else -1
+        self.startAngle = math.atan2(fromCentre.y, fromCentre.x)
+
+        self.carPhysics = CarPhysics(trackFields)
+        self.tick = 0
+        self.lapTicks: list[list[int]] = []
+        self.lapsCompleted = np.zeros(0, dtype=np.intp)
+        self.ai = RaceAI(self.carPhysics, trackFields, [], self.centre, self.direction)
+        # how many laps each car has gone around the track (negative until it crosses the start line), and the angle
+        # around the centre it was at after the last tick
+        self.progresses = np.zeros(0)
+        self.lastAngles = np.zeros(0)
+
+    def getGridPosition(self, gridIndex: int):
+        row, column = divmod(gridIndex, GRID_COLUMNS)
+        forward = Vec2(math.cos(self.startHeading), math.sin(self.startHeading))
+        sideways = Vec2(-forward.y, forward.x)
+        return (self.startPosition - forward * (row * GRID_ROW_SPACING) +
+                sideways * ((column - (GRID_COLUMNS - 1) / 2) * GRID_COLUMN_SPACING))
+
+    def addCar(self, enginePower: float = 1.0, grip: float = 1.0):
+        """add a car to the back of the grid and return its index"""
+        car = self.carPhysics.addCar(self.getGridPosition(self.carPhysics.count), self.startHeading, enginePower, grip)
+        self.lapTicks.append([])
+        self.lapsCompleted = np.append(self.lapsCompleted, 0)
+        self.lastAngles = np.append(self.lastAngles, self.getAngles()[car])
+        self.progresses = np.append(self.progresses, self.getAngleFromStart(self.lastAngles[car]) / (2 * math.pi))
+        self.ai.addCar(car)
+        return car
+
+    def getAngles(self):
+        """return the angle of every car around the centre of the track"""
+        positions = self.carPhysics.positions.data
+        return np.arctan2(positions[:, 1] - self.centre.y, positions[:, 0] - self.centre.x)
+
+    def getAngleFromStart(self, angle: float):
+        """return how far around the track (in radians, from -pi to pi, in the direction of the race) an angle is from the start line"""
+        return (self.direction * (angle - self.startAngle) + math.pi) % (2 * math.pi) - math.pi
+
+    def hasFinished(self, car: int):
+        return self.lapsCompleted[car] >= self.laps
+
+    def isOver(self):
+        return bool(np.all(self.lapsCompleted >= self.laps))
+
+    def step(self, tickDelta: float):
+        """simulate one tick of the race"""
+        self.ai.update()
+        self.carPhysics.step(tickDelta)
+        self.tick += 1
+
+        angles = self.getAngles()
+        self.progresses += self.direction * ((angles - self.lastAngles + math.pi) % (2 * math.pi) - math.pi) / (2 * math.pi)
+        self.lastAngles = angles
+
+        # only cars that have just gone past the start line again need looking at in Python
+        for car in np.nonzero((np.floor(self.progresses) > self.lapsCompleted) & (self.lapsCompleted < self.laps))[0].tolist():
+            self.lapsCompleted[car] += 1
+            self.lapTicks[car].append(self.tick)
+
+    def run(self, maxTicks: int, tickDelta: float = 1.0 / game_clock.TICK_RATE):
+        """step until every car has finished or 'maxTicks' ticks have gone by"""
+        while self.tick < maxTicks and not self.isOver():
+            self.step(tickDelta)
+
+    def getResults(self, tickRate: int = game_clock.TICK_RATE):
+        """return the result of every car in finishing order, as dicts of plain values (so they can be saved as JSON)
+
+        cars that finished are ordered by when they finished, and the rest by how far around the track they got
+        """
+        def finishingOrder(car: int):
+            if self.hasFinished(car):
+                return 0, self.lapTicks[car][-1], car
+            return 1, -float(self.progresses[car]), car
+
+        results = []
+        for position, car in enumerate(sorted(range(self.carPhysics.count), key=finishingOrder), 1):
+            lapTicks = self.lapTicks[car]
+            lapTimes = [(tick - previousTick) / tickRate for previousTick, tick in zip([0] + lapTicks, lapTicks)]
+            results.append({
+                "car": car,
+                "position": position,
+                "outcome": RACE_FINISHED if self.hasFinished(car) else RACE_DID_NOT_FINISH,
+                "time": lapTicks[-1] / tickRate if self.hasFinished(car) else None,
+                "lapTimes": lapTimes,
+                "bestLapTime": min(lapTimes) if lapTimes else None,
+                "enginePower": float(self.carPhysics.enginePowers[car]),
+                "grip": float(self.carPhysics.grips[car]),
+            })
+        return results
+
+def simulateRace(trackFilePath: str, carCount: int, laps: int, seed: int, maxSeconds: float):
+    """run one race of 'carCount' AI cars and return its results (see Race.getResults) along with the race's settings
+
+    'seed' picks the small differences between the cars and their AIs, so the same seed always gives the same race
+    """
+    tileMap, trackFields = getTrack(trackFilePath)
+    rng = np.random.default_rng(seed)
+    race = Race(tileMap, trackFields, laps)
+    for _ in range(carCount):
+        race.addCar(enginePower=rng.uniform(1.0 - ENGINE_POWER_SPREAD, 1.0 + ENGINE_POWER_SPREAD))
+    race.ai.randomizeSkills(rng)
+    race.run(round(maxSeconds * game_clock.TICK_RATE))
+
+    return {
+        "seed": seed,
+        "track": trackFilePath,
+        "laps": laps,
+        "ticks": race.tick,
+        "results": race.getResults(),
+    }
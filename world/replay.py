@@ -0,0 +1,307 @@
+"""recording and playing back races
+
+only the inputs of the recorded cars are saved (the simulation is deterministic, so replaying the same inputs from the same
+start gives the same race), and only when they change, so a replay is a few bytes per second of racing
+every KEYFRAME_INTERVAL ticks the whole state of the CarPhysics is saved as well, so that seeking only has to simulate
+from the keyframe before the point being seeked to instead of from the start
+
+inputs are rounded to INPUT_STEPS steps before the simulation uses them (see ReplayRecorder.recordTick),
+so the rounded inputs that are saved are exactly the ones that were simulated
+
+a replay file is a header followed by records, written as the race goes on:
+
+    magic "BCRP", version (u8), tick rate (u16), keyframe interval (u16, in ticks), number of recorded cars (u8),
+    then the index of each recorded car (u16 each)
+
+    every record starts with a byte whose top 4 bits are the record type and bottom 4 bits are type specific,
+    followed by the number of ticks since the previous record (a varint, see writeVarint)
+    input record (type 0): the bottom bits say which inputs changed (1 throttle, 2 brake, 4 steer), then
+        the recorded car number (u8) and the new value of each changed input (i8 each)
+    keyframe record (type 1): the length (u32) of the zlib compressed state of the CarPhysics that follows (see packState)
+    end record (type 2): nothing else, the tick it is at is the length of the replay
+
+all numbers are little endian
+"""
+from __future__ import annotations
+import struct
+import zlib
+import numpy as np
+from general_utils import game_clock
+from world.car_physics import CarPhysics
+
+REPLAY_FILE_MAGIC = b"BCRP"
+REPLAY_FILE_VERSION = 1
+
+# how many ticks apart keyframes are (5 seconds at the default tick rate)
+KEYFRAME_INTERVAL = game_clock.TICK_RATE * 5
+# inputs are rounded to multiples of 1 / INPUT_STEPS (so they fit in a signed byte)
+INPUT_STEPS = 127
+
+RECORD_INPUT = 0
+RECORD_KEYFRAME = 1
+RECORD_END = 2
+
+INPUT_THROTTLE = 1
+INPUT_BRAKE = 2
+INPUT_STEER = 4
+# the attribute of CarPhysics that has each input
+INPUT_ATTRIBUTES = ((INPUT_THROTTLE, "throttles"), (INPUT_BRAKE, "brakes"), (INPUT_STEER, "steers"))
+
+# the arrays of CarPhysics that make up its state, in the order they are packed into keyframes
+STATE_ATTRIBUTES = ("positionBuffer", "velocityBuffer", "previousPositionBuffer", "headingBuffer", "previousHeadingBuffer",
+                    "turnRateBuffer", "throttleBuffer", "brakeBuffer", "steerBuffer", "enginePowerBuffer", "gripBuffer")
+
+def quantizeInput(value: float):
+    """return an input value (from -1 to 1) as the whole number of INPUT_STEPS steps closest to it"""
+    return int(round(min(max(value, -1.0), 1.0) * INPUT_STEPS))
+
+def dequantizeInput(steps: int):
+    return steps / INPUT_STEPS
+
+def writeVarint(data: bytearray, value: int):
+    """add a non negative int to 'data' using 7 bits per byte, with the top bit set on every byte but the last
+    (so small numbers, like the ticks between most records, only take one byte)"""
+    while value >= 0x80:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+    data.append(value)
+
+def readVarint(data: bytes, offset: int):
+    """return (the int written by writeVarint at 'offset', the offset after it)"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def packState(carPhysics: CarPhysics):
+    """return the state of every car as bytes (the number of cars, then each of the STATE_ATTRIBUTES arrays)"""
+    count = carPhysics.count
+    return struct.pack("<I", count) + b"".join(getattr(carPhysics, name)[:count].tobytes() for name in STATE_ATTRIBUTES)
+
+def unpackState(carPhysics: CarPhysics, state: bytes):
+    """set the state of the cars to one packed by packState (the CarPhysics is given the same number of cars)"""
+    count = struct.unpack_from("<I", state)[0]
+    if count > carPhysics.capacity:
+        carPhysics.allocate(count)
+    carPhysics.count = count
+    carPhysics.updateViews()
+
+    offset = struct.calcsize("<I")
+    for name in STATE_ATTRIBUTES:
+        buffer = getattr(carPhysics, name)
+        values = np.frombuffer(state, dtype=buffer.dtype, count=count * (buffer.size // len(buffer)), offset=offset)
+        buffer[:count] = values.reshape((count,) + buffer.shape[1:])
+        offset += values.nbytes
+
+class ReplayRecorder:
+    """Writes the inputs of some of the cars of a CarPhysics to a replay file as a race goes on (see the top of this module)
+
+    recordTick should be called every tick, after the inputs have been set and before the CarPhysics is stepped,
+    and close should be called at the end of the race (or the replay will be missing its end record)
+    the file is flushed after every keyframe, so if the game crashes the replay is only missing the last few seconds
+    """
+
+    def __init__(self, filePath: str, recordedCars: list[int], keyframeInterval: int = KEYFRAME_INTERVAL):
+        assert len(recordedCars) < 256, "too many recorded cars"
+        self.file = open(filePath, "wb")
+        self.recordedCars = recordedCars
+        self.keyframeInterval = keyframeInterval
+        self.tick = 0
+        self.lastRecordTick = 0
+        # the last recorded input values of each recorded car, as whole numbers of steps (see quantizeInput)
+        self.lastInputs = [[0, 0, 0] for _ in recordedCars]
+
+        header = bytearray(REPLAY_FILE_MAGIC)
+        header += struct.pack("<BHHB", REPLAY_FILE_VERSION, game_clock.TICK_RATE, keyframeInterval, len(recordedCars))
+        for index in recordedCars:
+            header += struct.pack("<H", index)
+        self.file.write(header)
+
+    def recordTick(self, carPhysics: CarPhysics):
+        """round the inputs of the recorded cars (see quantizeInput), write any that changed, and write a keyframe if one is due"""
+        # (car number, which inputs changed, their new values)
+        changes = []
+        for carNumber, index in enumerate(self.recordedCars):
+            lastInputs = self.lastInputs[carNumber]
+            changed = 0
+            values = []
+            for i, (flag, name) in enumerate(INPUT_ATTRIBUTES):
+                inputs = getattr(carPhysics, name)
+                steps = quantizeInput(float(inputs[index]))
+                inputs[index] = dequantizeInput(steps)
+                if steps != lastInputs[i]:
+                    lastInputs[i] = steps
+                    changed |= flag
+                    values.append(steps)
+            if changed:
+                changes.append((carNumber, changed, values))
+
+        # after rounding, so the keyframe has the same inputs that are simulated
+        if self.tick % self.keyframeInterval == 0:
+            self.writeKeyframe(carPhysics)
+
+        for carNumber, changed, values in changes:
+            record = self.startRecord(RECORD_INPUT, changed)
+            record += struct.pack(f"<B{len(values)}b", carNumber, *values)
+            self.file.write(record)
+
+        self.tick += 1
+
+    def startRecord(self, recordType: int, bits: int = 0):
+        """return a bytearray with the start of a record (its type and the ticks since the last record)"""
+        record = bytearray((recordType << 4 | bits,))
+        writeVarint(record, self.tick - self.lastRecordTick)
+        self.lastRecordTick = self.tick
+        return record
+
+    def writeKeyframe(self, carPhysics: CarPhysics):
+        state = zlib.compress(packState(carPhysics))
+        record = self.startRecord(RECORD_KEYFRAME)
+        record += struct.pack("<I", len(state))
+        self.file.write(record + state)
+        self.file.flush()
+
+    def close(self):
+        """write the end record and close the file"""
+        if self.file.closed:
+            return
+        self.file.write(self.startRecord(RECORD_END))
+        self.file.close()
+
+class ReplayPlayer:
+    """Plays back a replay file by setting the inputs of the recorded cars of a CarPhysics each tick
+
+    playTick should be called every tick in place of setting the inputs of the recorded cars, before the CarPhysics is stepped
+    the whole file is read when it is opened (replays are small), and the position of every keyframe is found so that
+    seek only has to simulate from the closest keyframe before the tick being seeked to
+    replays that were not closed properly (no end record) can still be played up to their last complete record
+    """
+
+    def __init__(self, filePath: str):
+        with open(filePath, "rb") as file:
+            self.data = file.read()
+        if self.data[:len(REPLAY_FILE_MAGIC)] != REPLAY_FILE_MAGIC:
+            raise Exception("Not a replay file: " + filePath)
+
+        offset = len(REPLAY_FILE_MAGIC)
+        version, self.tickRate, self.keyframeInterval, carCount = struct.unpack_from("<BHHB", self.data, offset)
+        if version != REPLAY_FILE_VERSION:
+            raise Exception(f"Unsupported replay file version {version}: {filePath}")
+        offset += struct.calcsize("<BHHB")
+        self.recordedCars = list(struct.unpack_from(f"<{carCount}H", self.data, offset))
+        self.recordsOffset = offset + struct.calcsize(f"<{carCount}H")
+
+        # (tick, offset of the record) of every keyframe, in order
+        self.keyframes: list[tuple[int, int]] = []
+        self.length = 0
+        self.indexRecords()
+
+        self.tick = 0
+        # the offset of the next record, and its (type, bits, tick, offset of the body) (None if there are no more)
+        self.offset = self.recordsOffset
+        self.nextRecord: tuple[int, int, int, int] | type(None) = None
+        self.readNextRecord(0)
+
+    def indexRecords(self):
+        """find every keyframe and the length of the replay"""
+        offset = self.recordsOffset
+        tick = 0
+        while True:
+            record = self.readRecordHeader(offset, tick)
+            if record is None:
+                break
+            recordType, bits, tick, bodyOffset = record
+            if recordType == RECORD_KEYFRAME:
+                self.keyframes.append((tick, offset))
+            elif recordType == RECORD_END:
+                break
+            offset = self.skipRecordBody(recordType, bits, bodyOffset)
+        self.length = tick
+
+    def readRecordHeader(self, offset: int, tick: int):
+        """return (type, bits, tick, offset of the body) of the record at 'offset' after a record at 'tick',
+        or None if there is not a complete record there"""
+        if offset >= len(self.data):
+            return None
+        recordType = self.data[offset] >> 4
+        bits = self.data[offset] & 0x0F
+        try:
+            ticks, bodyOffset = readVarint(self.data, offset + 1)
+        except IndexError:
+            return None
+        if self.skipRecordBody(recordType, bits, bodyOffset) > len(self.data):
+            return None
+        return recordType, bits, tick + ticks, bodyOffset
+
+    def skipRecordBody(self, recordType: int, bits: int, offset: int):
+        """return the offset after the body of a record"""
+        if recordType == RECORD_INPUT:
+            return offset + 1 + bin(bits).count("1")
+        if recordType == RECORD_KEYFRAME:
+            if offset + 4 > len(self.data):
+                return offset + 4
+            return offset + 4 + struct.unpack_from("<I", self.data, offset)[0]
+        return offset
+
+    def readNextRecord(self, previousTick: int):
+        record = self.readRecordHeader(self.offset, previousTick)
+        self.nextRecord = None if record is None or record[0] == RECORD_END else record
+
+    def isFinished(self):
+        return self.tick >= self.length
+
+    def playTick(self, carPhysics: CarPhysics):
+        """apply every record for the current tick to the CarPhysics (setting inputs or restoring a keyframe)"""
+        while self.nextRecord is not None and self.nextRecord[2] <= self.tick:
+            recordType, bits, tick, bodyOffset = self.nextRecord
+            self.applyRecord(carPhysics, recordType, bits, bodyOffset)
+            self.offset = self.skipRecordBody(recordType, bits, bodyOffset)
+            self.readNextRecord(tick)
+        self.tick += 1
+
+    def applyRecord(self, carPhysics: CarPhysics, recordType: int, bits: int, offset: int):
+        if recordType == RECORD_INPUT:
+            index = self.recordedCars[self.data[offset]]
+            offset += 1
+            for flag, name in INPUT_ATTRIBUTES:
+                if bits & flag:
+                    getattr(carPhysics, name)[index] = dequantizeInput(struct.unpack_from("<b", self.data, offset)[0])
+                    offset += 1
+        elif recordType == RECORD_KEYFRAME:
+            length = struct.unpack_from("<I", self.data, offset)[0]
+            unpackState(carPhysics, zlib.decompress(self.data[offset + 4:offset + 4 + length]))
+
+    def seek(self, carPhysics: CarPhysics, tick: int, tickDelta: float = None):
+        """put the CarPhysics into the state it was in at the start of 'tick' (before that tick's inputs were applied)
+
+        the state is restored from the closest keyframe before 'tick', and then simulated forward from there
+        note: the recorded cars' inputs are also restored by the keyframe, so playing on from here gives the same race
+        """
+        if tickDelta is None:
+            tickDelta = 1.0 / self.tickRate
+        if not self.keyframes:
+            return
+        tick = min(max(tick, 0), self.length)
+        keyframeTick, keyframeOffset = self.keyframes[0]
+        for candidateTick, candidateOffset in self.keyframes:
+            if candidateTick > tick:
+                break
+            keyframeTick, keyframeOffset = candidateTick, candidateOffset
+
+        recordType, bits, _, bodyOffset = self.readRecordHeader(keyframeOffset, 0)
+        self.applyRecord(carPhysics, recordType, bits, bodyOffset)
+        self.offset = self.skipRecordBody(recordType, bits, bodyOffset)
+        self.tick = keyframeTick
+        self.readNextRecord(keyframeTick)
+
+        while self.tick < tick:
+            self.playTick(carPhysics)
+            carPhysics.step(tickDelta)
+
+    def getLengthInSeconds(self):
+        return self.length / self.tickRate
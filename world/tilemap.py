@@ -0,0 +1,152 @@
+"""tile maps that tracks (the game world) are made out of, and the compact file format they are saved in
+
+a track file is a small header, a palette of tile types and then the index of every tile's type (one byte per tile)
+compressed with zlib, so even tracks that are many screens wide are only a few kilobytes:
+
+    magic "BCTM", version (u8)
+    width, height, tileSize (u16 each, width and height in tiles, tileSize in pixels)
+    palette length (u8), then for each tile type:
+        surface type (u8), red, green, blue (u8 each), image file path length (u16), image file path (utf-8, can be empty)
+    zlib compressed tile indices (u8, row by row from the top left)
+
+all numbers are little endian
+"""
+from __future__ import annotations
+import struct
+import zlib
+import numpy as np
+from general_utils.vec2 import Vec2
+
+TRACK_FILE_MAGIC = b"BCTM"
+TRACK_FILE_VERSION = 1
+
+# the surface types of tiles, used by the physics to work out grip and collisions
+SURFACE_ASPHALT = 0
+SURFACE_GRASS = 1
+SURFACE_WALL = 2
+SURFACE_NAMES = ("ASPHALT", "GRASS", "WALL")
+
+class TileType:
+    """A type of tile that can be placed in a TileMap
+
+    tiles are drawn with the image at 'imagePath' if there is one, otherwise they are filled with 'color'
+    """
+    __slots__ = ("surface", "color", "imagePath")
+
+    def __init__(self, surface: int, color: tuple[int, int, int], imagePath: str = ""):
+        self.surface = surface
+        self.color = color
+        self.imagePath = imagePath
+
+    def __repr__(self):
+        return f"TileType({SURFACE_NAMES[self.surface]}, {self.color}, {self.imagePath!r})"
+
+class TileMap:
+    """A grid of tiles that makes up a track
+
+    the type of every tile is kept as an index into the palette in a NumPy array with shape (height, width),
+    so the whole map is one small contiguous block of memory no matter how big it is
+    world coordinates are in pixels, with (0, 0) at the top left of the top left tile
+    """
+
+    def __init__(self, tiles: np.ndarray, palette: list[TileType], tileSize: int):
+        assert tiles.ndim == 2, "tiles should be a 2d array of palette indices"
+        assert len(palette) <= 256, "a palette can have at most 256 tile types"
+        self.tiles = np.ascontiguousarray(tiles, dtype=np.uint8)
+        self.palette = palette
+        self.tileSize = tileSize
+        # incremented whenever a tile is changed, so that anything made from the tiles knows to remake it
+        self.version = 0
+
+    def getWidth(self):
+        """return the width of the map in tiles"""
+        return self.tiles.shape[1]
+
+    def getHeight(self):
+        """return the height of the map in tiles"""
+        return self.tiles.shape[0]
+
+    def getWorldSize(self):
+        """return the size of the map in world coordinates (pixels)"""
+        return Vec2(self.getWidth() * self.tileSize, self.getHeight() * self.tileSize)
+
+    def getTile(self, tileX: int, tileY: int):
+        """return the TileType of a tile, or None if it is outside of the map"""
+        if 0 <= tileX < self.getWidth() and 0 <= tileY < self.getHeight():
+            return self.palette[self.tiles[tileY, tileX]]
+        return None
+
+    def getTileAt(self, x: float, y: float):
+        """return the TileType at a point in world coordinates, or None if it is outside of the map"""
+        return self.getTile(int(x // self.tileSize), int(y // self.tileSize))
+
+    def setTile(self, tileX: int, tileY: int, paletteIndex: int):
+        assert 0 <= paletteIndex < len(self.palette), "not an index of the palette"
+        self.tiles[tileY, tileX] = paletteIndex
+        self.version += 1
+
+def saveTileMap(tileMap: TileMap, filePath: str):
+    """write a TileMap to a track file (see the top of this module for the format)"""
+    data = bytearray(TRACK_FILE_MAGIC)
+    data += struct.pack("<BHHHB", TRACK_FILE_VERSION, tileMap.getWidth(), tileMap.getHeight(), tileMap.tileSize, len(tileMap.palette))
+    for tileType in tileMap.palette:
+        imagePath = tileType.imagePath.encode("utf-8")
+        data += struct.pack("<BBBBH", tileType.surface, *tileType.color, len(imagePath))
+        data += imagePath
+    data += zlib.compress(tileMap.tiles.tobytes(), 9)
+
+    with open(filePath, "wb") as file:
+        file.write(data)
+
+def loadTileMap(filePath: str):
+    """read a TileMap from a track file (see the top of this module for the format)"""
+    with open(filePath, "rb") as file:
+        data = file.read()
+
+    if data[:len(TRACK_FILE_MAGIC)] != TRACK_FILE_MAGIC:
+        raise Exception("Not a track file: " + filePath)
+    offset = len(TRACK_FILE_MAGIC)
+
+    version, width, height, tileSize, paletteLength = struct.unpack_from("<BHHHB", data, offset)
+    if version != TRACK_FILE_VERSION:
+        raise Exception(f"Unsupported track file version {version}: {filePath}")
+    offset += struct.calcsize("<BHHHB")
+
+    palette = []
+    for _ in range(paletteLength):
+        surface, red, green, blue, pathLength = struct.unpack_from("<BBBBH", data, offset)
+        offset += struct.calcsize("<BBBBH")
+        imagePath = data[offset:offset + pathLength].decode("utf-8")
+        offset += pathLength
+        palette.append(TileType(surface, (red, green, blue), imagePath))
+
+    tiles = np.frombuffer(zlib.decompress(data[offset:]), dtype=np.uint8)
+    if len(tiles) != width * height:
+        raise Exception("Track file has the wrong number of tiles: " + filePath)
+    # frombuffer arrays are read only, and tiles can be changed with setTile
+    return TileMap(tiles.reshape(height, width).copy(), palette, tileSize)
+
+def createOvalTileMap(width: int, height: int, trackWidth: int, tileSize: int = 32):
+    """return a TileMap of an oval track of asphalt 'trackWidth' tiles wide, with grass inside and outside and walls around the edge
+
+    used to make the test tracks, and useful for benchmarks
+    """
+    palette = [
+        TileType(SURFACE_ASPHALT, (70, 70, 75)),
+        TileType(SURFACE_GRASS, (40, 120, 50)),
+        TileType(SURFACE_WALL, (200, 200, 200)),
+    ]
+
+    # how far each tile is from the centre line of the oval, measured as a fraction of the oval's radii
+    ys, xs = np.mgrid[0:height, 0:width]
+    # leave room for the track (which gets wider than trackWidth at the ends of the long side) and the walls
+    radiusX = width / 2 - trackWidth - 2
+    radiusY = height / 2 - trackWidth - 2
+    distance = np.hypot((xs + 0.5 - width / 2) / radiusX, (ys + 0.5 - height / 2) / radiusY)
+    # roughly how many tiles from the centre line each tile is
+    tilesFromCentreLine = np.abs(distance - 1.0) * min(radiusX, radiusY)
+
+    tiles = np.full((height, width), 1, dtype=np.uint8)
+    tiles[tilesFromCentreLine <= trackWidth / 2] = 0
+    tiles[0, :] = tiles[-1, :] = tiles[:, 0] = tiles[:, -1] = 2
+    return TileMap(tiles, palette, tileSize)
@@ -0,0 +1,205 @@
+"""per track lookup tables for the physics and AI, precomputed once from the tiles of a track
+
+- the surface grid has the surface type (see tilemap.SURFACE_ASPHALT etc.) of every tile, for looking up grip
+- the wall distance field has the signed distance (in world pixels) from the centre of each cell to the nearest wall edge,
+  positive outside of walls and negative inside them, for wall collisions and for AI keeping away from walls
+  each tile is split into FIELD_CELLS_PER_TILE by FIELD_CELLS_PER_TILE cells
+
+both are NumPy arrays, so single points and whole arrays of points (every car at once) are both just an indexing operation
+
+working out the distance field is slow for big tracks, so the arrays are saved as .npy files next to the track file
+and are memory mapped (only the parts that are used are read from the disk) when the track is loaded again
+the cache files have a hash of the track file in their names, so changing the track makes new ones
+"""
+from __future__ import annotations
+import glob
+import hashlib
+import os
+import numpy as np
+from world.tilemap import TileMap, SURFACE_WALL
+
+# how many cells along each side of a tile the wall distance field has
+FIELD_CELLS_PER_TILE = 4
+# changing how the fields are worked out should change this, so that old cache files aren't used
+FIELD_CACHE_VERSION = 1
+
+class TrackFields:
+    """The surface grid and wall distance field of a track (see the top of this module)
+
+    note: these are not updated if the TileMap is changed, new ones have to be made
+    """
+    __slots__ = ("surfaces", "wallDistances", "tileSize", "cellSize")
+
+    def __init__(self, surfaces: np.ndarray, wallDistances: np.ndarray, tileSize: int):
+        self.surfaces = surfaces
+        self.wallDistances = wallDistances
+        self.tileSize = tileSize
+        self.cellSize = tileSize / (wallDistances.shape[0] // surfaces.shape[0])
+
+    def getSurfaceAt(self, x: float, y: float):
+        """return the surface type at a point in world coordinates (anywhere outside of the track is a wall)"""
+        tileX = int(x // self.tileSize)
+        tileY = int(y // self.tileSize)
+        if 0 <= tileX < self.surfaces.shape[1] and 0 <= tileY < self.surfaces.shape[0]:
+            return int(self.surfaces[tileY, tileX])
+        return SURFACE_WALL
+
+    def getWallDistanceAt(self, x: float, y: float):
+        """return the signed distance to the nearest wall edge from a point in world coordinates (see the top of this module)
+
+        points outside of the track use the nearest cell on its edge
+        """
+        cellY = min(max(int(y // self.cellSize), 0), self.wallDistances.shape[0] - 1)
+        cellX = min(max(int(x // self.cellSize), 0), self.wallDistances.shape[1] - 1)
+        return float(self.wallDistances[cellY, cellX])
+
+    def getSurfacesAt(self, xs: np.ndarray, ys: np.ndarray):
+        """return an array of the surface type at every point (the same as getSurfaceAt for arrays of x and y values)"""
+        tileXs = np.floor_divide(xs, self.tileSize).astype(np.intp)
+        tileYs = np.floor_divide(ys, self.tileSize).astype(np.intp)
+        height, width = self.surfaces.shape
+        inside = (tileXs >= 0) & (tileXs < width) & (tileYs >= 0) & (tileYs < height)
+        surfaces = np.full(len(tileXs), SURFACE_WALL, dtype=np.uint8)
+        surfaces[inside] = self.surfaces[tileYs[inside], tileXs[inside]]
+        return surfaces
+
+    def getWallDistancesAt(self, xs: np.ndarray, ys: np.ndarray):
+        """return an array of the signed wall distance at every point (the same as getWallDistanceAt for arrays of x and y values)"""
+        cellXs, cellYs = self.getCellIndices(xs, ys)
+        return self.wallDistances[cellYs, cellXs].astype(np.float64)
+
+    def getWallNormalsAt(self, xs: np.ndarray, ys: np.ndarray):
+        """return arrays of the x and y of the direction away from the nearest wall at every point (with a length of 1)
+
+        worked out from the slope of the distance field between the neighbouring cells, so it is (0, 0) where the slope is flat
+        """
+        cellXs, cellYs = self.getCellIndices(xs, ys)
+        height, width = self.wallDistances.shape
+        field = self.wallDistances
+        slopeXs = (field[cellYs, np.minimum(cellXs + 1, width - 1)].astype(np.float64) -
+                   field[cellYs, np.maximum(cellXs - 1, 0)])
+        slopeYs = (field[np.minimum(cellYs + 1, height - 1), cellXs].astype(np.float64) -
+                   field[np.maximum(cellYs - 1, 0), cellXs])
+        lengths = np.hypot(slopeXs, slopeYs)
+        lengths[lengths == 0.0] = 1.0
+        return slopeXs / lengths, slopeYs / lengths
+
+    def getCellIndices(self, xs: np.ndarray, ys: np.ndarray):
+        """return the (x indices, y indices) of the wall distance field cells that points are in (clamped to the edges)"""
+        height, width = self.wallDistances.shape
+        cellXs = np.clip(np.floor_divide(xs, self.cellSize), 0, width - 1).astype(np.intp)
+        cellYs = np.clip(np.floor_divide(ys, self.cellSize), 0, height - 1).astype(np.intp)
+        return cellXs, cellYs
+
+def computeSurfaceGrid(tileMap: TileMap):
+    """return a uint8 array (with the same shape as the tiles) of the surface type of every tile"""
+    paletteSurfaces = np.array([tileType.surface for tileType in tileMap.palette], dtype=np.uint8)
+    return paletteSurfaces[tileMap.tiles]
+
+def computeNearestSeeds(isSeed: np.ndarray):
+    """return (ys, xs), the coordinates of the nearest True cell of 'isSeed' to every cell (-1 if there are no True cells)
+
+    uses jump flooding: each pass, every cell looks at the nearest seeds found so far by the cells 'step' cells away in
+    each of the 8 directions and keeps the closest, with step halving every pass (log2(size) passes in total)
+    every pass is a handful of whole array NumPy operations, so there are no Python loops over the cells
+    the result can very occasionally be a slightly further seed than the nearest, which doesn't matter here
+    """
+    height, width = isSeed.shape
+    rows, columns = np.indices((height, width), dtype=np.int32)
+    nearestYs = np.where(isSeed, rows, -1).astype(np.int32)
+    nearestXs = np.where(isSeed, columns, -1).astype(np.int32)
+    # squared distances to the nearest seeds (int64, as they can be too big for int32 on huge grids)
+    distances = np.where(isSeed, 0, np.iinfo(np.int64).max).astype(np.int64)
+
+    steps = []
+    step = 1
+    while step < max(height, width):
+        steps.append(step)
+        step *= 2
+    # going from the biggest step down to 1, with an extra pass of 1 at the end to fix most of the errors jump flooding makes
+    for step in steps[::-1] + [1]:
+        for offsetY in (-step, 0, step):
+            for offsetX in (-step, 0, step):
+                if (offsetY == 0 and offsetX == 0) or abs(offsetY) >= height or abs(offsetX) >= width:
+                    continue
+                # the cells that have a neighbour at this offset, and those neighbours
+                target = (slice(max(0, -offsetY), height - max(0, offsetY)), slice(max(0, -offsetX), width - max(0, offsetX)))
+                source = (slice(max(0, offsetY), height - max(0, -offsetY)), slice(max(0, offsetX), width - max(0, -offsetX)))
+
+                candidateYs = nearestYs[source]
+                candidateXs = nearestXs[source]
+                differenceYs = (candidateYs - rows[target]).astype(np.int64)
+                differenceXs = (candidateXs - columns[target]).astype(np.int64)
+                candidateDistances = differenceYs * differenceYs + differenceXs * differenceXs
+
+                better = (candidateYs >= 0) & (candidateDistances < distances[target])
+                # the targets are views, so this changes the arrays in place
+                np.copyto(nearestYs[target], candidateYs, where=better)
+                np.copyto(nearestXs[target], candidateXs, where=better)
+                np.copyto(distances[target], candidateDistances, where=better)
+
+    return nearestYs, nearestXs
+
+def computeDistanceToSeeds(isSeed: np.ndarray):
+    """return the distance (in cells) from the centre of every cell to the centre of the nearest True cell of 'isSeed'
+
+    the distance is infinite everywhere if there are no True cells
+    """
+    nearestYs, nearestXs = computeNearestSeeds(isSeed)
+    rows, columns = np.indices(isSeed.shape)
+    distances = np.hypot(nearestYs - rows, nearestXs - columns)
+    distances[nearestYs < 0] = np.inf
+    return distances
+
+def computeWallDistanceField(tileMap: TileMap, cellsPerTile: int = FIELD_CELLS_PER_TILE):
+    """return a float32 array of the signed distance (in world pixels) from every cell to the nearest wall edge
+
+    the edge is taken to be half a cell from the centre of the nearest cell on the other side of it
+    """
+    isWall = computeSurfaceGrid(tileMap) == SURFACE_WALL
+    isWall = np.repeat(np.repeat(isWall, cellsPerTile, axis=0), cellsPerTile, axis=1)
+    cellSize = tileMap.tileSize / cellsPerTile
+
+    outside = computeDistanceToSeeds(isWall) - 0.5
+    inside = computeDistanceToSeeds(~isWall) - 0.5
+    return (np.where(isWall, -inside, outside) * cellSize).astype(np.float32)
+
+def computeTrackFields(tileMap: TileMap, cellsPerTile: int = FIELD_CELLS_PER_TILE):
+    return TrackFields(computeSurfaceGrid(tileMap), computeWallDistanceField(tileMap, cellsPerTile), tileMap.tileSize)
+
+def getFieldCachePaths(trackFilePath: str, cellsPerTile: int = FIELD_CELLS_PER_TILE):
+    """return the paths of the (surface grid, wall distance field) cache files for a track file"""
+    hasher = hashlib.sha1()
+    with open(trackFilePath, "rb") as file:
+        hasher.update(file.read())
+    hasher.update(f"{FIELD_CACHE_VERSION},{cellsPerTile}".encode("utf-8"))
+    prefix = f"{trackFilePath}.{hasher.hexdigest()[:16]}"
+    return prefix + ".surfaces.npy", prefix + ".walls.npy"
+
+def loadTrackFields(trackFilePath: str, tileMap: TileMap, cellsPerTile: int = FIELD_CELLS_PER_TILE):
+    """return the TrackFields of a track, memory mapping them from the cache files if they exist,
+    otherwise computing them and saving them to the cache files (removing any old ones for the same track)
+
+    'tileMap' should be the TileMap loaded from 'trackFilePath'
+    note: if the cache files can't be written (read only directory, for example), the fields are still returned
+    """
+    surfacesPath, wallsPath = getFieldCachePaths(trackFilePath, cellsPerTile)
+    if os.path.exists(surfacesPath) and os.path.exists(wallsPath):
+        return TrackFields(np.load(surfacesPath, mmap_mode="r"), np.load(wallsPath, mmap_mode="r"), tileMap.tileSize)
+
+    fields = computeTrackFields(tileMap, cellsPerTile)
+    try:
+        for oldPath in glob.glob(glob.escape(trackFilePath) + ".*.npy"):
+            os.remove(oldPath)
+        saveArray(surfacesPath, fields.surfaces)
+        saveArray(wallsPath, fields.wallDistances)
+    except OSError:
+        pass
+    return fields
+
+def saveArray(filePath: str, array: np.ndarray):
+    """save an array to a .npy file, writing it to a temporary file first so that a half written file is never loaded"""
+    temporaryPath = filePath + ".tmp"
+    with open(temporaryPath, "wb") as file:
+        np.save(file, array)
+    os.replace(temporaryPath, filePath)
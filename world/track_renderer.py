@@ -0,0 +1,119 @@
+from __future__ import annotations
+from collections import OrderedDict
+import numpy as np
+import pygame
+from general_utils.vec2 import Vec2
+from pygame_rendering import window, assets
+from pygame_rendering.assets import getSurfaceBytes
+from pygame_rendering.images import Image
+from world.camera import Camera
+from world.tilemap import TileMap
+
+# the width and height (in tiles) of each chunk
+CHUNK_TILES = 16
+# the maximum number of bytes of chunk surfaces that a TrackRenderer keeps cached
+CHUNK_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+class TrackRenderer:
+    """Draws a TileMap by splitting it into square chunks of tiles that are each drawn to their own surface once
+
+    each frame only the chunks that are in view of the camera are blitted (a handful of blits, no matter how big the map is)
+    chunk surfaces are kept in a least recently used cache of at most maxBytes, so chunks that are far away from
+    the camera are thrown away and redrawn if they come back into view
+    all of the chunks are redrawn if the map is changed (see TileMap.setTile)
+    """
+
+    def __init__(self, tileMap: TileMap, chunkTiles: int = CHUNK_TILES, maxBytes: int = CHUNK_CACHE_MAX_BYTES):
+        self.tileMap = tileMap
+        self.chunkTiles = chunkTiles
+        self.chunkSize = chunkTiles * tileMap.tileSize
+        self.maxBytes = maxBytes
+
+        # chunk surfaces by (chunk x, chunk y), with the least recently used at the front
+        self.chunks: OrderedDict[tuple[int, int], pygame.Surface] = OrderedDict()
+        self.chunkBytes = 0
+        self.cachedVersion = tileMap.version
+
+        # the colour of every tile type, so a chunk's colours can be looked up with one NumPy indexing operation
+        self.paletteColors = np.array([tileType.color for tileType in tileMap.palette], dtype=np.uint8).reshape(-1, 3)
+        # the images of tile types that have one, by palette index
+        self.tileImages: dict[int, Image] = dict()
+        for index, tileType in enumerate(tileMap.palette):
+            if tileType.imagePath:
+                self.tileImages[index] = Image(tileType.imagePath, size=Vec2(tileMap.tileSize, tileMap.tileSize))
+
+    def draw(self, camera: Camera):
+        """draw every chunk that is in view of the camera"""
+        if self.cachedVersion != self.tileMap.version:
+            self.clearCache()
+            self.cachedVersion = self.tileMap.version
+
+        for chunkX, chunkY in self.getVisibleChunks(camera):
+            screenX, screenY = camera.worldToScreenValues(chunkX * self.chunkSize, chunkY * self.chunkSize)
+            window.blit(self.getChunk(chunkX, chunkY), Vec2(screenX, screenY))
+
+    def getVisibleChunks(self, camera: Camera):
+        """return the (chunk x, chunk y) of every chunk of the map that is at least partly in view of the camera"""
+        topLeft = camera.getTopLeft()
+        chunkCountX = -(-self.tileMap.getWidth() // self.chunkTiles)
+        chunkCountY = -(-self.tileMap.getHeight() // self.chunkTiles)
+
+        left = max(0, int(topLeft.x // self.chunkSize))
+        top = max(0, int(topLeft.y // self.chunkSize))
+        right = min(chunkCountX - 1, int((topLeft.x + camera.viewSize.x - 1) // self.chunkSize))
+        bottom = min(chunkCountY - 1, int((topLeft.y + camera.viewSize.y - 1) // self.chunkSize))
+        return [(x, y) for y in range(top, bottom + 1) for x in range(left, right + 1)]
+
+    def getChunk(self, chunkX: int, chunkY: int):
+        """return the surface of a chunk, drawing it (and evicting the least recently used chunks if needed) if it isn't cached"""
+        key = (chunkX, chunkY)
+        if key in self.chunks:
+            self.chunks.move_to_end(key)
+            return self.chunks[key]
+
+        surface = self.renderChunk(chunkX, chunkY)
+        self.chunks[key] = surface
+        self.chunkBytes += getSurfaceBytes(surface)
+
+        # always keep the chunk that was just drawn, even if it is bigger than the whole budget
+        while self.chunkBytes > self.maxBytes and len(self.chunks) > 1:
+            _, evicted = self.chunks.popitem(last=False)
+            self.chunkBytes -= getSurfaceBytes(evicted)
+
+        return surface
+
+    def renderChunk(self, chunkX: int, chunkY: int):
+        """draw the tiles of a chunk to a new surface
+
+        the colours of the tiles are looked up all at once and scaled up from one pixel per tile, then any tiles with images
+        have their images drawn on top
+        """
+        tileSize = self.tileMap.tileSize
+        left = chunkX * self.chunkTiles
+        top = chunkY * self.chunkTiles
+        tiles = self.tileMap.tiles[top:top + self.chunkTiles, left:left + self.chunkTiles]
+
+        # surfarray uses (x, y) indexing, while the tiles are (y, x)
+        colors = pygame.surfarray.make_surface(self.paletteColors[tiles].swapaxes(0, 1))
+        surface = pygame.transform.scale(colors, (tiles.shape[1] * tileSize, tiles.shape[0] * tileSize))
+
+        if self.tileImages:
+            blits = []
+            for index, image in self.tileImages.items():
+                for tileY, tileX in np.argwhere(tiles == index).tolist():
+                    blits.append((image.image, (tileX * tileSize, tileY * tileSize)))
+            surface.blits(blits, doreturn=False)
+
+        return assets.convertSurface(surface)
+
+    def clearCache(self):
+        self.chunks.clear()
+        self.chunkBytes = 0
+
+    def getCacheStats(self):
+        """return a dict of statistics about the chunk cache"""
+        return {
+            "chunks": len(self.chunks),
+            "bytes": self.chunkBytes,
+            "maxBytes": self.maxBytes,
+        }